@@ -6,7 +6,13 @@ from app.core.session_models import (
     TranscriptEdit,
     StructuredEdit,
 )
-from app.api.websocket import apply_structured_edits
+from app.api.websocket import (
+    apply_structured_edits,
+    apply_transcript_edit,
+    transcript_utterance,
+    transcript_utterances,
+)
+from app.core.frozen import FrozenList, freeze
 
 router = APIRouter(prefix="/sessions", tags=["edits"])
 
@@ -16,28 +22,53 @@ async def add_transcript_edit(
     edit: TranscriptEdit,
 ):
     try:
-        session = get_session(session_id)
+        session = await get_session(session_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    if edit.field not in ("text", "speaker"):
+        raise HTTPException(status_code=400, detail="field must be 'text' or 'speaker'")
+
     async with session.lock:
-        applied = StructuredEdit(
+        if session.final_transcript.index_of(edit.utterance_id) is None:
+            raise HTTPException(status_code=404, detail="Utterance not found")
+
+        applied = TranscriptEdit(
             edit_id=edit.edit_id,
-            section=edit.section,
-            action=edit.action,
-            value=edit.value,
+            utterance_id=edit.utterance_id,
+            field=edit.field,
+            old_value=edit.old_value,
+            new_value=edit.new_value,
             edited_by=edit.edited_by,
             edited_at=edit.edited_at or datetime.utcnow().isoformat(),
         )
 
-        session.structured_edits.append(applied)
+        session.transcript_edits.append(applied)
 
-        session.final_structured_state = apply_structured_edits(
-            session.final_structured_state,
-            [applied],
-        )
+        if session.active:
+            return {"status": "ok"}
 
-    return {"status": "ok"}
+        # already finalized: stop applied the earlier edits, so this one
+        # goes onto the corrected transcript, in place. It may still be
+        # the raw transcript itself, or share columns with it; copy()
+        # shares them and the edited column is copied on first write
+        if session.final_transcript is session.raw_transcript:
+            session.final_transcript = session.final_transcript.copy()
+        i = apply_transcript_edit(session.final_transcript, applied)
+        utterance = freeze(transcript_utterance(session.final_transcript, i))
+
+        # only the edited entry is rebuilt; the others are shared
+        utterances = list(session.final_structured_state.get("utterances") or [])
+        if len(utterances) == len(session.final_transcript):
+            utterances[i] = utterance
+        else:
+            utterances = transcript_utterances(session.final_transcript)
+        session.final_structured_state = freeze({
+            **session.final_structured_state,
+            "utterances": FrozenList(utterances),
+        })
+
+    return {"status": "ok", "utterance": utterance}
 
 @router.post("/{session_id}/structured-edits")
 async def add_structured_edit(
@@ -45,7 +76,7 @@ async def add_structured_edit(
     edit: StructuredEdit,
 ):
     try:
-        session = get_session(session_id)
+        session = await get_session(session_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     async with session.lock:
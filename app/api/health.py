@@ -0,0 +1,28 @@
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.asr.vosk_adapter import asr_status
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@router.get("/ready")
+async def ready():
+    """
+    200 once ASR is warm and sessions can start without a model load,
+    503 before that.
+    """
+    asr = asr_status()
+    body = {
+        "status": "ready" if asr["warm"] else "warming",
+        "pid": os.getpid(),
+        "asr": asr,
+    }
+    return JSONResponse(body, status_code=200 if asr["warm"] else 503)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+
+from app.core.memory import session_memory
+from app.storage.session_registry import get_session
+
+router = APIRouter(prefix="/sessions", tags=["memory"])
+
+
+@router.get("/{session_id}/memory")
+async def memory_report(session_id: str):
+    """
+    Approximate in-memory size of a session, per part.
+    """
+    try:
+        session = await get_session(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    async with session.lock:
+        return session_memory(session)
@@ -0,0 +1,28 @@
+import os
+
+from fastapi import APIRouter
+
+from app.asr.vosk_adapter import asr_status
+from app.llm.cache import response_cache
+from app.llm.gateway import gateway
+from app import warmup
+from app.storage import session_registry
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def metrics():
+    """
+    Process-local counters: LLM gateway load, token usage and call
+    policy (breakers, hedging, timeouts), response cache hits/misses,
+    ASR state, startup profile, resident sessions and evictions.
+    """
+    return {
+        "pid": os.getpid(),
+        "llm": gateway.stats(),
+        "llm_cache": response_cache.stats(),
+        "asr": asr_status(),
+        "startup": warmup.profile(),
+        "sessions": session_registry.stats(),
+    }
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
-import asyncio
 
 from app.storage.session_registry import get_session
-from app.llm.gemini import generate_report_from_state
+from app.llm.gemini import generate_report_from_state_async
 from app.storage.session_store import store_pdf_report, get_suggestions
 
 router = APIRouter(prefix="/sessions", tags=["regenerate"])
@@ -11,20 +10,14 @@ router = APIRouter(prefix="/sessions", tags=["regenerate"])
 @router.post("/{session_id}/regenerate")
 async def regenerate_report(session_id: str):
     try:
-        session = get_session(session_id)
+        session = await get_session(session_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
 
     async with session.lock:
         structured_state = session.final_structured_state
 
-    loop = asyncio.get_running_loop()
-
-    llm_result = await loop.run_in_executor(
-        None,
-        generate_report_from_state,
-        structured_state,
-    )
+    llm_result = await generate_report_from_state_async(structured_state)
 
     clinical_report = (
         llm_result.get("data", {}).get("clinical_report", "")
@@ -39,6 +32,8 @@ async def regenerate_report(session_id: str):
         clinical_report,
     )
 
+    # the session may have been evicted (and spilled) during the call
+    session = await get_session(session_id)
     async with session.lock:
         session.final_clinical_report = clinical_report
 
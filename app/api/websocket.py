@@ -1,16 +1,19 @@
 from datetime import datetime
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
 import time
 import asyncio
-import uuid
-from copy import deepcopy
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.config import settings
 from app.vectorstore.suggestions import generate_system_suggestions
 from app.asr.vosk_adapter import run_vosk_asr_stream
-from app.llm.incremental import update_structured_state
-from app.llm.gemini import generate_report_from_state
+from app.llm.incremental import update_structured_state_async, stream_structured_update
+from app.llm.gemini import generate_report_from_state_async
+from app.llm.speculative import ReportSpeculator
+from app.pipeline.fastpath import apply_findings, extract
+from app.core.frozen import freeze
+from app.pipeline.entities import EntityIndex
+from app.pipeline.schema import apply_state_patch, assign_entity_ids
 from app.datasets.jsonl_export import export_session
 from app.vectorstore.chroma_store import store_consultation
 from app.storage.session_store import (
@@ -28,27 +31,20 @@ from app.core.session_models import (
     TranscriptEdit,
     StructuredEdit,
     LLMDraft,
+    Transcript,
 )
+from app.core.update_scheduler import DebouncePolicy, UpdateScheduler
 
 SILENCE_THRESHOLD_SECONDS = 12
-MIN_UPDATE_INTERVAL = 20
-MIN_UTTERANCES_PER_UPDATE = 3
-
-@dataclass(frozen=True)
-class RawUtterance:
-    utterance_id: str
-    timestamp: str
-    text: str
-
-def _new_raw_utterance(text: str) -> RawUtterance:
-    return RawUtterance(
-        utterance_id=str(uuid.uuid4()),
-        timestamp=datetime.utcnow().isoformat(),
-        text=text,
-    )
+
+UPDATE_POLICY = DebouncePolicy(
+    min_utterances=settings.LLM_UPDATE_MIN_UTTERANCES,
+    min_interval=settings.LLM_UPDATE_MIN_INTERVAL,
+    max_delay=settings.LLM_UPDATE_MAX_DELAY,
+)
 
 def _base_structured_state() -> Dict[str, Any]:
-    return {
+    return freeze({
         "patient": {"name": None, "age": None, "gender": None},
         "utterances": [],
         "symptoms": [],
@@ -57,7 +53,7 @@ def _base_structured_state() -> Dict[str, Any]:
         "advice": [],
         "investigations": [],
         "tests": [],
-    }
+    })
 
 def ws_safe_structured_state(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -68,57 +64,96 @@ def ws_safe_structured_state(state: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 def apply_transcript_edits(
-    transcript: List[FinalUtterance],
+    transcript: Transcript,
     edits: List[TranscriptEdit],
-) -> List[FinalUtterance]:
-    by_id = {u.utterance_id: u for u in transcript}
-    edited = dict(by_id)
+) -> Transcript:
+    """
+    The transcript with doctor edits applied, as a new Transcript; the
+    one passed in is returned unchanged when there are no edits.
+    """
+    if not edits:
+        return transcript
 
+    out = transcript.copy()
     for e in edits:
-        u = edited.get(e.utterance_id)
-        if not u:
-            continue
+        apply_transcript_edit(out, e)
 
-        if e.field == "text":
-            edited[e.utterance_id] = FinalUtterance(
-                utterance_id=u.utterance_id,
-                timestamp=u.timestamp,
-                text=e.new_value,
-                speaker=u.speaker,
-            )
-        elif e.field == "speaker":
-            edited[e.utterance_id] = FinalUtterance(
-                utterance_id=u.utterance_id,
-                timestamp=u.timestamp,
-                text=u.text,
-                speaker=e.new_value,
-            )
+    return out
 
-    return [edited[u.utterance_id] for u in transcript]
+def apply_transcript_edit(transcript: Transcript, edit: TranscriptEdit) -> Optional[int]:
+    """
+    Apply one edit in place; returns the edited index (None if the
+    utterance is not in this transcript).
+    """
+    i = transcript.index_of(edit.utterance_id)
+    if i is None:
+        return None
+
+    if edit.field == "text":
+        transcript.set_text(i, edit.new_value)
+    elif edit.field == "speaker":
+        transcript.set_speaker(i, edit.new_value)
+    return i
+
+def transcript_utterance(transcript: Transcript, i: int) -> Dict[str, Any]:
+    """
+    Entry i of the "utterances" section.
+    """
+    return {
+        "index": i + 1,
+        "speaker": transcript.speaker(i),
+        "text": transcript.text(i),
+        "timestamp": transcript.timestamp(i),
+    }
+
+def transcript_utterances(transcript: Transcript) -> List[Dict[str, Any]]:
+    """
+    The "utterances" section of a finalized structured state.
+    """
+    return [transcript_utterance(transcript, i) for i in range(len(transcript))]
 
 def apply_structured_edits(
     state: Dict[str, Any],
     edits: List[StructuredEdit],
 ) -> Dict[str, Any]:
-    out = deepcopy(state)
+    """
+    Replay doctor edits on a state. Entries are found by id, else by
+    canonical name, so replaying an edit is idempotent: an "add" of an
+    entity that is already there merges into it.
+
+    Only the edited sections are rebuilt; everything else (utterances
+    included) is shared with `state`, which is never modified.
+    """
+    out = dict(state)
+    indexes: Dict[str, EntityIndex] = {}
 
     for e in edits:
         section = e.section
-        if section not in out:
+        if section not in out or not isinstance(out[section], list):
             continue
+        if section not in indexes:
+            indexes[section] = EntityIndex(section, out[section])
+        index = indexes[section]
 
         if e.action == "add":
-            out[section].append(e.value)
+            index.add(e.value)
 
         elif e.action == "remove":
-            out[section] = [v for v in out[section] if v != e.value]
+            index.remove(e.value)
 
         elif e.action == "modify":
-            for i, v in enumerate(out[section]):
-                if isinstance(v, dict) and v.get("name") == e.value.get("name"):
-                    out[section][i] = e.value
+            pos = index.find(e.value)
+            if pos is not None:
+                current = index.get(pos)
+                value = e.value
+                if isinstance(current, dict) and isinstance(value, dict) and current.get("id"):
+                    value = {**value, "id": current["id"]}
+                index.replace(pos, value)
 
-    return out
+    for section, index in indexes.items():
+        out[section] = index.items()
+
+    return assign_entity_ids(out)
 
 
 ws_router = APIRouter()
@@ -136,114 +171,192 @@ async def websocket_endpoint(ws: WebSocket):
         session_date=session_date,
         final_structured_state=_base_structured_state(),
     )
-    register_session(state)
-
-    last_llm_update_time = 0.0
-    llm_lock = asyncio.Lock()
-
-    async def run_incremental_update(
-        new_utts: List[FinalUtterance],
-        force: bool = False,
-    ):
-        nonlocal last_llm_update_time
-
-        if not new_utts:
-            return
-
-        if not force and len(new_utts) < MIN_UTTERANCES_PER_UPDATE:
-            return
-
-        now_ts = time.time()
-        if not force and now_ts - last_llm_update_time < MIN_UPDATE_INTERVAL:
-            return
-
-        async with llm_lock:
-            loop = asyncio.get_running_loop()
-
-            async with state.lock:
-                base_state = deepcopy(state.final_structured_state)
-
-            utterance_dicts = [
-                {
-                    "index": i + 1,
-                    "speaker": u.speaker,
-                    "text": u.text,
-                    "timestamp": u.timestamp,
-                }
-                for i, u in enumerate(new_utts)
-            ]
-
-            updated_state = await loop.run_in_executor(
-                None,
-                update_structured_state,
+    await register_session(state)
+
+    # fast-path findings per transcript index, re-applied on top of LLM
+    # results whose request started before those utterances arrived
+    fastpath_found: List[Dict[str, Any]] = []
+
+    speculator = (
+        ReportSpeculator(settings.LLM_SPECULATIVE_MAX_PER_SESSION)
+        if settings.LLM_SPECULATIVE_REPORTS
+        else None
+    )
+
+    async def send_partial(section: str, value: Any):
+        try:
+            await ws.send_json({
+                "type": "structured_partial",
+                "session_id": session_id,
+                "section": section,
+                "value": value,
+            })
+        except (WebSocketDisconnect, RuntimeError):
+            # client already gone (e.g. final update after stop)
+            pass
+
+    async def run_incremental_update(start: int, new_utts: List[FinalUtterance]):
+        """
+        One LLM update for transcript[start:start + len(new_utts)]; only
+        ever called by the session's UpdateScheduler.
+        """
+        async with state.lock.local:
+            # the state is immutable, so the reference is the snapshot
+            base_state = state.final_structured_state
+
+        utterance_dicts = [
+            {
+                "index": start + i + 1,
+                "speaker": u.speaker,
+                "text": u.text,
+                "timestamp": u.timestamp,
+            }
+            for i, u in enumerate(new_utts)
+        ]
+
+        if settings.LLM_STREAMING:
+            updated_state, patch, usage = base_state, None, {}
+            async for event in stream_structured_update(base_state, utterance_dicts):
+                if event["type"] == "section":
+                    await send_partial(event["section"], event["value"])
+                else:
+                    updated_state, patch, usage = event["state"], event["patch"], event["usage"]
+        else:
+            updated_state, patch, usage = await update_structured_state_async(
                 base_state,
                 utterance_dicts,
             )
+        print(
+            f"[LLM] Update {len(state.llm_drafts) + 1}: {len(new_utts)} utterances, "
+            f"{usage['prompt']} prompt / {usage['output']} output tokens"
+        )
+
+        draft = LLMDraft(
+            draft_id=len(state.llm_drafts) + 1,
+            created_at=time.time(),
+            input_range=(start, start + len(new_utts)),
+            structured_patch={},
+            model="gemini",
+            usage=usage,
+        )
+
+        async with state.lock.local:
+            if patch is not None:
+                # the patch refers to entities by id, so it applies to the
+                # current state as is, including fast-path entries added
+                # while the request was in flight
+                updated_state, changed = apply_state_patch(state.final_structured_state, patch)
+            else:
+                changed = []
+                for found in fastpath_found[start + len(new_utts):]:
+                    updated_state, reapplied = apply_findings(updated_state, found)
+                    changed.extend(reapplied)
+
+            state.final_structured_state = updated_state = freeze(updated_state)
+            # stored as a diff against the previous draft's version
+            state.llm_drafts.record(draft, updated_state)
+            state.last_processed_index = start + len(new_utts)
+
+            if speculator is not None:
+                # the state finalization would produce if stop came now
+                speculator.submit(
+                    apply_structured_edits(updated_state, state.structured_edits)
+                )
 
-            draft = LLMDraft(
-                draft_id=str(uuid.uuid4()),
-                created_at=datetime.utcnow().isoformat(),
-                input_utterance_ids=[u.utterance_id for u in new_utts],
-                structured_patch=updated_state,
-                model="gemini",
-            )
+        # streamed sections were merged into the request's snapshot; send
+        # the authoritative versions
+        for section in dict.fromkeys(changed):
+            await send_partial(section, updated_state[section])
+
+    async def load_pending(start: int) -> List[FinalUtterance]:
+        async with state.lock.local:
+            return state.final_transcript[start:]
+
+    scheduler = UpdateScheduler(run_incremental_update, load_pending, UPDATE_POLICY)
 
-            async with state.lock:
-                state.llm_drafts.append(draft)
-                state.final_structured_state = updated_state
-                state.last_processed_index = len(state.final_transcript)
-                last_llm_update_time = time.time()
+    silence_started = asyncio.Event()
+    speech_resumed = asyncio.Event()
 
     async def silence_watcher():
+        """
+        Driven by VAD events: once acoustic silence has lasted
+        SILENCE_THRESHOLD_SECONDS without speech resuming, tell the
+        scheduler it has reached a quiet point.
+        """
         while True:
-            await asyncio.sleep(1)
+            await silence_started.wait()
+            silence_started.clear()
 
-            async with state.lock:
+            try:
+                await asyncio.wait_for(
+                    speech_resumed.wait(),
+                    timeout=SILENCE_THRESHOLD_SECONDS,
+                )
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            async with state.lock.local:
                 if not state.active:
                     return
 
-                if time.monotonic() - state.last_text_time < SILENCE_THRESHOLD_SECONDS:
-                    continue
-
-                if state.last_processed_index >= len(state.final_transcript):
-                    continue
-
-                pending = state.final_transcript[state.last_processed_index:]
-
-            await run_incremental_update(pending)
+            scheduler.set_quiet(True)
 
+    scheduler.start()
     silence_task = asyncio.create_task(silence_watcher())
 
     try:
-        async for event in run_vosk_asr_stream(ws):
+        async for event in run_vosk_asr_stream(ws, session_id=session_id):
 
             if event["type"] == "partial":
                 await ws.send_json({"type": "partial", "text": event["text"]})
                 continue
 
+            if event["type"] == "vad":
+                speaking = event["state"] == "speech"
+                async with state.lock.local:
+                    state.in_speech = speaking
+
+                if speaking:
+                    speech_resumed.set()
+                    scheduler.set_quiet(False)
+                else:
+                    speech_resumed.clear()
+                    silence_started.set()
+
+                await ws.send_json({"type": "vad", "state": event["state"]})
+                continue
+
             if event["type"] == "transcript":
                 text = event["data"]["text"]
 
-                raw = _new_raw_utterance(text)
-                final = FinalUtterance(
-                    utterance_id=raw.utterance_id,
-                    timestamp=raw.timestamp,
-                    text=text,
-                    speaker="unknown",
-                )
+                found = extract(text) if settings.FASTPATH else {}
 
-                async with state.lock:
-                    state.raw_transcript.append(raw)
-                    state.final_transcript.append(final)
+                # per-event updates stay on this worker: no backend lease
+                async with state.lock.local:
+                    index = state.final_transcript.append(text)
+                    utterance_id = state.final_transcript.utterance_id(index)
                     state.last_text_time = time.monotonic()
 
+                    fastpath_found.append(found)
+                    changed = []
+                    if found:
+                        updated, changed = apply_findings(state.final_structured_state, found)
+                        state.final_structured_state = freeze(updated)
+                    fast_sections = {c: state.final_structured_state[c] for c in changed}
+
+                scheduler.utterance_added()
+
                 await ws.send_json({
                     "type": "transcript",
                     "time": datetime.now().strftime("%H:%M:%S"),
                     "speaker": "unknown",
                     "text": text,
-                    "utterance_id": raw.utterance_id,
+                    "utterance_id": utterance_id,
                 })
+
+                for section, value in fast_sections.items():
+                    await send_partial(section, value)
                 continue
 
             if event["type"] == "stop":
@@ -252,11 +365,14 @@ async def websocket_endpoint(ws: WebSocket):
 
                 silence_task.cancel()
 
-                async with state.lock:
-                    remaining = state.final_transcript[state.last_processed_index:]
+                if speculator is not None:
+                    # the final report goes on the report lane unless a
+                    # run already started for the final state
+                    speculator.close()
 
-                if remaining:
-                    await run_incremental_update(remaining, force=True)
+                # everything not yet sent goes out now, after any request
+                # already in flight
+                await scheduler.flush()
 
                 async with state.lock:
                     transcript = apply_transcript_edits(
@@ -269,18 +385,12 @@ async def websocket_endpoint(ws: WebSocket):
                         state.structured_edits,
                     )
 
-                    structured["utterances"] = [
-                        {
-                            "index": i + 1,
-                            "speaker": u.speaker,
-                            "text": u.text,
-                            "timestamp": u.timestamp,
-                        }
-                        for i, u in enumerate(transcript)
-                    ]
+                    structured["utterances"] = transcript_utterances(transcript)
 
+                    # the same object when nothing was edited
+                    state.raw_transcript = state.final_transcript
                     state.final_transcript = transcript
-                    state.final_structured_state = structured
+                    state.final_structured_state = freeze(structured)
 
                 # 1️⃣ SEND STRUCTURED SNAPSHOT (FAST, SMALL)
                 await ws.send_json({
@@ -293,13 +403,18 @@ async def websocket_endpoint(ws: WebSocket):
 
                 # 2️⃣ FINALIZE IN BACKGROUND (NO WS)
                 async def finalize_backend():
-                    loop = asyncio.get_running_loop()
+                    llm_result = None
+                    if speculator is not None:
+                        llm_result = await speculator.result(state.final_structured_state)
+                        print(
+                            f"[LLM] Speculative report {'used' if llm_result else 'missed'} "
+                            f"({speculator.stats()})"
+                        )
 
-                    llm_result = await loop.run_in_executor(
-                        None,
-                        generate_report_from_state,
-                        state.final_structured_state,
-                    )
+                    if llm_result is None:
+                        llm_result = await generate_report_from_state_async(
+                            state.final_structured_state,
+                        )
 
                     clinical_report = llm_result.get("data", {}).get(
                         "clinical_report", ""
@@ -314,12 +429,12 @@ async def websocket_endpoint(ws: WebSocket):
 
                     store_raw_transcript(
                         state.session_id,
-                        [u.__dict__ for u in state.raw_transcript],
+                        state.raw_transcript.to_dicts(speaker=False),
                     )
 
                     store_raw_transcript(
                         f"{state.session_id}_corrected",
-                        [u.__dict__ for u in state.final_transcript],
+                        state.final_transcript.to_dicts(),
                     )
 
                     store_structured_state(
@@ -338,6 +453,8 @@ async def websocket_endpoint(ws: WebSocket):
                             "patient": state.final_structured_state.get("patient"),
                         },
                     )
+                    # enough on disk for the registry to evict and reload it
+                    state.persisted = True
 
                     store_consultation(
                         session_id=state.session_id,
@@ -364,6 +481,16 @@ async def websocket_endpoint(ws: WebSocket):
                 break
 
     except WebSocketDisconnect:
-        async with state.lock:
-            state.active = False
+        pass
+    finally:
         silence_task.cancel()
+        if state.active:
+            # disconnected or failed (dead ASR worker, closed socket, bad
+            # audio) before stop: the session is abandoned, and the
+            # registry drops it after the TTL
+            async with state.lock.local:
+                state.active = False
+            if speculator is not None:
+                speculator.cancel()
+        # drop any pending/in-flight update
+        await scheduler.close()
@@ -0,0 +1,249 @@
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+SAMPLE_RATE = 16000
+DEFAULT_CODEC = "pcm16"
+
+# ---------------- G.711 mu-law ----------------
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 32635
+
+
+def _ulaw_to_linear(u: int) -> int:
+    u = ~u & 0xFF
+    t = ((u & 0x0F) << 3) + _MULAW_BIAS
+    t <<= (u & 0x70) >> 4
+    return _MULAW_BIAS - t if u & 0x80 else t - _MULAW_BIAS
+
+
+def _linear_to_ulaw(s: int) -> int:
+    sign = 0x80 if s < 0 else 0
+    s = min(-s if sign else s, _MULAW_CLIP) + _MULAW_BIAS
+    exponent = (s >> 7).bit_length() - 1
+    mantissa = (s >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+
+# Decoding is two bytes.translate() calls (low and high byte of each
+# little-endian sample) interleaved by slice assignment, all in C.
+_MULAW_LO = bytes(_ulaw_to_linear(u) & 0xFF for u in range(256))
+_MULAW_HI = bytes((_ulaw_to_linear(u) >> 8) & 0xFF for u in range(256))
+
+
+@lru_cache(maxsize=None)
+def _mulaw_encode_table() -> bytes:
+    # 64K entries; built on first encode rather than at import
+    return bytes(_linear_to_ulaw(s - 65536 if s > 32767 else s) for s in range(65536))
+
+
+def decode_mulaw(data: bytes) -> bytes:
+    out = bytearray(len(data) * 2)
+    out[0::2] = data.translate(_MULAW_LO)
+    out[1::2] = data.translate(_MULAW_HI)
+    return bytes(out)
+
+
+def encode_mulaw(pcm: bytes) -> bytes:
+    samples = array("H", pcm[: len(pcm) - len(pcm) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return bytes(map(_mulaw_encode_table().__getitem__, samples))
+
+
+# ---------------- IMA ADPCM ----------------
+#
+# One block per WebSocket frame, so a lost frame never desyncs the
+# decoder: <int16 initial predictor><uint8 step index><uint8 0>, then
+# one 4-bit code per sample, two per byte, low nibble first.
+
+_IMA_INDEX = (-1, -1, -1, -1, 2, 4, 6, 8) * 2
+_IMA_STEP = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37,
+    41, 45, 50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173,
+    190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658,
+    724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066,
+    2272, 2499, 2749, 3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894,
+    6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899, 15289,
+    16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+)
+_IMA_HEADER = struct.Struct("<hBx")
+
+
+def decode_ima_adpcm(block: bytes) -> bytes:
+    if len(block) < _IMA_HEADER.size:
+        return b""
+
+    predictor, index = _IMA_HEADER.unpack_from(block, 0)
+    index = min(index, 88)
+    out = array("h")
+    append = out.append
+
+    for byte in block[_IMA_HEADER.size:]:
+        for code in (byte & 0x0F, byte >> 4):
+            step = _IMA_STEP[index]
+            diff = step >> 3
+            if code & 4:
+                diff += step
+            if code & 2:
+                diff += step >> 1
+            if code & 1:
+                diff += step >> 2
+            predictor = predictor - diff if code & 8 else predictor + diff
+            predictor = -32768 if predictor < -32768 else 32767 if predictor > 32767 else predictor
+            index += _IMA_INDEX[code]
+            index = 0 if index < 0 else 88 if index > 88 else index
+            append(predictor)
+
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out.tobytes()
+
+
+def encode_ima_adpcm(pcm: bytes) -> bytes:
+    samples = array("h", pcm[: len(pcm) - len(pcm) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return b""
+
+    predictor, index = samples[0], 0
+    out = bytearray(_IMA_HEADER.pack(predictor, index))
+    codes: List[int] = []
+
+    for s in samples:
+        step = _IMA_STEP[index]
+        delta = s - predictor
+        code = 8 if delta < 0 else 0
+        delta = abs(delta)
+
+        diff = step >> 3
+        if delta >= step:
+            code |= 4
+            delta -= step
+            diff += step
+        if delta >= step >> 1:
+            code |= 2
+            delta -= step >> 1
+            diff += step >> 1
+        if delta >= step >> 2:
+            code |= 1
+            diff += step >> 2
+
+        predictor = predictor - diff if code & 8 else predictor + diff
+        predictor = max(-32768, min(32767, predictor))
+        index = max(0, min(88, index + _IMA_INDEX[code]))
+        codes.append(code)
+
+    if len(codes) % 2:
+        codes.append(0)
+    out.extend(codes[i] | (codes[i + 1] << 4) for i in range(0, len(codes), 2))
+    return bytes(out)
+
+
+# ---------------- Opus (optional) ----------------
+
+class _OpusDecoder:
+    """
+    Raw Opus packets, one per frame. Needs the optional `opuslib` package.
+    """
+
+    def __init__(self, sample_rate: int):
+        import opuslib
+
+        self._decoder = opuslib.Decoder(sample_rate, 1)
+        self._max_frame = sample_rate * 120 // 1000
+
+    def __call__(self, packet: bytes) -> bytes:
+        return self._decoder.decode(packet, self._max_frame)
+
+
+def _has_opus() -> bool:
+    try:
+        import opuslib  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def available_codecs() -> List[str]:
+    codecs = ["pcm16", "mulaw", "ima-adpcm"]
+    if _has_opus():
+        codecs.insert(0, "opus")
+    return codecs
+
+
+def _decoder_for(codec: str, sample_rate: int) -> Callable[[bytes], bytes]:
+    if codec == "mulaw":
+        return decode_mulaw
+    if codec == "ima-adpcm":
+        return decode_ima_adpcm
+    if codec == "opus":
+        return _OpusDecoder(sample_rate)
+    return bytes
+
+
+class AudioTransport:
+    """
+    Per-connection codec state for the /ws audio stream.
+
+    The client may open with a control message such as
+        {"type": "config", "codecs": ["opus", "mulaw"], "frame_samples": 4096}
+    ("codec" with a single name, or "codecs" as a comma-separated string,
+    is also accepted). The first codec the server supports wins; anything
+    else falls back to raw 16-bit PCM. Without a config message the
+    stream is raw PCM, as before.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.codec = DEFAULT_CODEC
+        self.frame_samples = None
+        self.negotiated = False
+        self._decode: Callable[[bytes], bytes] = bytes
+
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def negotiate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        offered = payload.get("codecs") or [payload.get("codec")]
+        if isinstance(offered, str):
+            offered = [c.strip() for c in offered.split(",")]
+        elif not isinstance(offered, list):
+            offered = []
+        supported = available_codecs()
+        codec = next((c for c in offered if c in supported), DEFAULT_CODEC)
+
+        try:
+            decoder = _decoder_for(codec, self.sample_rate)
+        except Exception as e:
+            print(f"[ASR] Codec {codec} unavailable ({e}), using {DEFAULT_CODEC}")
+            codec, decoder = DEFAULT_CODEC, bytes
+
+        self.codec = codec
+        self._decode = decoder
+        self.frame_samples = payload.get("frame_samples")
+        self.negotiated = True
+
+        return {
+            "type": "config",
+            "codec": self.codec,
+            "sample_rate": self.sample_rate,
+            "frame_samples": self.frame_samples,
+        }
+
+    @property
+    def passthrough(self) -> bool:
+        """
+        Raw PCM: decode() is a copy, not worth a thread hop.
+        """
+        return self._decode is bytes
+
+    def decode(self, data: bytes) -> bytes:
+        pcm = self._decode(data)
+        self.bytes_in += len(data)
+        self.bytes_out += len(pcm)
+        return pcm
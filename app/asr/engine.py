@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class ASREngine:
+    """
+    Runs recognizer work on a fixed set of single-thread lanes.
+
+    Every session is pinned to one lane, so its recognizer is only ever
+    touched by one thread, while sessions on different lanes decode in
+    parallel without blocking the event loop.
+    """
+
+    def __init__(self, workers: int):
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+
+        self._lanes = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"asr-{i}")
+            for i in range(workers)
+        ]
+        self._load = [0] * workers
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return len(self._lanes)
+
+    def acquire_lane(self) -> int:
+        """
+        Place a new session on the least-loaded lane.
+        """
+        with self._lock:
+            lane = min(range(len(self._load)), key=self._load.__getitem__)
+            self._load[lane] += 1
+            return lane
+
+    def release_lane(self, lane: int) -> None:
+        with self._lock:
+            self._load[lane] = max(0, self._load[lane] - 1)
+
+    async def run(self, lane: int, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._lanes[lane], fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": len(self._lanes), "sessions_per_lane": list(self._load)}
+
+    def shutdown(self) -> None:
+        for lane in self._lanes:
+            lane.shutdown(wait=False)
+
+
+def decode_chunk(recognizer, data: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Feed one PCM chunk to a Kaldi-style recognizer.
+    Runs on an ASR lane, never on the event loop.
+    """
+    if recognizer.AcceptWaveform(data):
+        result = json.loads(recognizer.Result())
+        text = result.get("text", "").strip()
+
+        if text:
+            return {
+                "type": "transcript",
+                "data": {
+                    "speaker": "unknown",
+                    "text": text,
+                    "timestamp": datetime.now().isoformat(),
+                },
+            }
+        return None
+
+    partial = json.loads(recognizer.PartialResult())
+    if partial.get("partial"):
+        return {
+            "type": "partial",
+            "text": partial["partial"],
+        }
+    return None
+
+
+def flush_recognizer(recognizer) -> Optional[Dict[str, Any]]:
+    """
+    Force an endpoint: finalize whatever the recognizer has buffered.
+    """
+    result = json.loads(recognizer.FinalResult())
+    text = result.get("text", "").strip()
+
+    if not text:
+        return None
+
+    return {
+        "type": "transcript",
+        "data": {
+            "speaker": "unknown",
+            "text": text,
+            "timestamp": datetime.now().isoformat(),
+        },
+    }
+
+
+class ASRStream:
+    """
+    One session's recognizer, bound to a single engine lane.
+    """
+
+    def __init__(self, engine: ASREngine, recognizer_factory: Callable[[], Any]):
+        self._engine = engine
+        self._factory = recognizer_factory
+        self._lane: Optional[int] = None
+        self._recognizer = None
+
+    async def open(self) -> "ASRStream":
+        self._lane = self._engine.acquire_lane()
+        self._recognizer = await self._engine.run(self._lane, self._factory)
+        return self
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run other blocking per-session work (codec decoding) on the
+        session's lane, next to its recognizer.
+        """
+        return await self._engine.run(self._lane, fn, *args)
+
+    async def accept(self, data: bytes) -> Optional[Dict[str, Any]]:
+        return await self._engine.run(self._lane, decode_chunk, self._recognizer, data)
+
+    async def flush(self) -> Optional[Dict[str, Any]]:
+        return await self._engine.run(self._lane, flush_recognizer, self._recognizer)
+
+    async def close(self) -> None:
+        if self._lane is None:
+            return
+        self._engine.release_lane(self._lane)
+        self._lane = None
+        self._recognizer = None
+
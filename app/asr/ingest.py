@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+INGEST_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+STOP = object()
+
+
+class IngestQueue:
+    """
+    Bounded buffer between ws.receive() and the recognizer.
+
+    Policies when the decoder falls behind and the queue is full:
+    - "block": the receiver waits, which stops reading the socket and
+      pushes back on the client through TCP flow control
+    - "drop_oldest": discard the oldest queued audio chunk
+    - "drop_newest": discard the incoming audio chunk
+
+    Control items (stop, disconnect) are never dropped and never wait.
+    """
+
+    def __init__(self, maxsize: int, policy: str = "block"):
+        if policy not in INGEST_POLICIES:
+            raise ValueError(f"unknown ingest policy: {policy}")
+
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._items: Deque[Any] = deque()
+        self._audio = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.dropped = 0
+        self.max_depth = 0
+
+    def backlog(self) -> int:
+        """
+        Audio chunks waiting to be decoded.
+        """
+        return self._audio
+
+    async def put_audio(self, data: bytes) -> None:
+        while self._audio >= self.maxsize:
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return
+            if self.policy == "drop_oldest":
+                self._drop_oldest_audio()
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        self._items.append(data)
+        self._audio += 1
+        self.max_depth = max(self.max_depth, self._audio)
+        self._not_empty.set()
+
+    def put_control(self, item: Any) -> None:
+        self._items.append(item)
+        self._not_empty.set()
+
+    def _drop_oldest_audio(self) -> None:
+        for i, item in enumerate(self._items):
+            if isinstance(item, (bytes, bytearray, memoryview)):
+                del self._items[i]
+                self._audio -= 1
+                self.dropped += 1
+                return
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        item = self._items.popleft()
+        if isinstance(item, (bytes, bytearray, memoryview)):
+            self._audio -= 1
+            self._not_full.set()
+        return item
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "depth": self._audio,
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+        }
+
+
+class PartialThrottle:
+    """
+    Rate limit for partial-result events sent to the browser.
+    """
+
+    def __init__(self, max_per_sec: float = 0.0, only_on_change: bool = True):
+        self._min_interval = 1.0 / max_per_sec if max_per_sec > 0 else 0.0
+        self._only_on_change = only_on_change
+        self._last_text: Optional[str] = None
+        self._last_sent = 0.0
+
+    def allow(self, text: str) -> bool:
+        if self._only_on_change and text == self._last_text:
+            return False
+
+        now = time.monotonic()
+        if now - self._last_sent < self._min_interval:
+            return False
+
+        self._last_text = text
+        self._last_sent = now
+        return True
+
+    def reset(self) -> None:
+        """
+        Called after a final result, so the next utterance's first partial
+        is never suppressed as a duplicate.
+        """
+        self._last_text = None
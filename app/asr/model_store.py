@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+_model = None
+_lock = threading.Lock()
+_load_seconds: Optional[float] = None
+
+
+def get_model():
+    """
+    The shared Vosk model, loaded on first use.
+
+    Loaded once per process. Under `python main.py --preload` the master
+    loads it before forking, so every worker shares the same pages
+    copy-on-write instead of holding its own multi-GB copy.
+    """
+    global _model, _load_seconds
+
+    if _model is not None:
+        return _model
+
+    with _lock:
+        if _model is None:
+            from vosk import Model
+
+            start = time.perf_counter()
+            _model = Model(settings.VOSK_MODEL_PATH)
+            _load_seconds = time.perf_counter() - start
+            print(f"[ASR] Model loaded in {_load_seconds:.1f}s: {settings.VOSK_MODEL_PATH}")
+
+    return _model
+
+
+def is_loaded() -> bool:
+    return _model is not None
+
+
+def model_status() -> Dict[str, Any]:
+    return {
+        "path": settings.VOSK_MODEL_PATH,
+        "loaded": _model is not None,
+        "load_seconds": _load_seconds,
+    }
@@ -0,0 +1,384 @@
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.asr.engine import decode_chunk, flush_recognizer
+
+_HEADER = struct.Struct("QQ")  # total bytes written, total bytes read
+RING_CAPACITY = 1 << 20         # ~32 s of 16 kHz 16-bit mono per session
+
+
+class AudioRing:
+    """
+    Single-producer / single-consumer byte ring in shared memory.
+
+    The server process writes PCM, one ASR worker process reads it. Only
+    the chunk length travels over the command queue, never the audio.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int):
+        self._shm = shm
+        self.capacity = capacity
+
+    @classmethod
+    def create(cls, capacity: int = RING_CAPACITY) -> "AudioRing":
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity)
+        _HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, capacity)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "AudioRing":
+        return cls(shared_memory.SharedMemory(name=name), capacity)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _positions(self) -> Tuple[int, int]:
+        return _HEADER.unpack_from(self._shm.buf, 0)
+
+    def write(self, data: bytes) -> None:
+        written, read = self._positions()
+        if len(data) > self.capacity - (written - read):
+            raise BufferError("audio ring full")
+
+        start = written % self.capacity
+        first = min(len(data), self.capacity - start)
+        base = _HEADER.size
+        self._shm.buf[base + start:base + start + first] = data[:first]
+        if first < len(data):
+            self._shm.buf[base:base + len(data) - first] = data[first:]
+
+        struct.pack_into("Q", self._shm.buf, 0, written + len(data))
+
+    def read(self, n: int) -> bytes:
+        written, read = self._positions()
+        n = min(n, written - read)
+
+        start = read % self.capacity
+        first = min(n, self.capacity - start)
+        base = _HEADER.size
+        out = bytes(self._shm.buf[base + start:base + start + first])
+        if first < n:
+            out += bytes(self._shm.buf[base:base + n - first])
+
+        struct.pack_into("Q", self._shm.buf, 8, read + n)
+        return out
+
+    def close(self) -> None:
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _worker_main(model_path: str, sample_rate: int, commands, results) -> None:
+    """
+    ASR worker process: one model, many recognizers.
+    """
+    from vosk import Model, KaldiRecognizer
+
+    model = Model(model_path)
+    streams: Dict[int, Tuple[Any, AudioRing]] = {}
+    results.put(("ready", None, None))
+
+    while True:
+        cmd = commands.get()
+        op = cmd[0]
+
+        if op == "shutdown":
+            break
+
+        if op == "open":
+            _, sid, ring_name, capacity = cmd
+            recognizer = KaldiRecognizer(model, sample_rate)
+            recognizer.SetPartialWords(True)
+            streams[sid] = (recognizer, AudioRing.attach(ring_name, capacity))
+            results.put(("ack", sid, None))
+
+        elif op in ("chunk", "flush") and cmd[1] not in streams:
+            # never opened here (or already closed): answer, don't crash
+            print(f"[ASR] Worker got {op} for unknown stream {cmd[1]}")
+            results.put(("event", cmd[1], None))
+
+        elif op == "chunk":
+            _, sid, n = cmd
+            recognizer, ring = streams[sid]
+            results.put(("event", sid, decode_chunk(recognizer, ring.read(n))))
+
+        elif op == "flush":
+            _, sid = cmd
+            recognizer, _ = streams[sid]
+            results.put(("event", sid, flush_recognizer(recognizer)))
+
+        elif op == "close":
+            _, sid = cmd
+            _, ring = streams.pop(sid, (None, None))
+            if ring is not None:
+                ring.close()
+            results.put(("ack", sid, None))
+
+    for _, ring in streams.values():
+        ring.close()
+
+
+class _Worker:
+    def __init__(self, ctx, index: int, model_path: str, sample_rate: int):
+        self.index = index
+        self.sessions = 0
+        # set once the process has exited; never placed on again
+        self.dead = False
+        self.commands = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(model_path, sample_rate, self.commands, self.results),
+            name=f"asr-shard-{index}",
+            daemon=True,
+        )
+
+
+class ShardedASR:
+    """
+    Pool of ASR worker processes fed through shared-memory audio rings.
+
+    Sessions are placed on the live worker with the fewest open streams.
+    Each request is answered in order on the worker's result queue, which
+    a reader thread per worker hands back to the waiting coroutine. When
+    a worker process dies, the requests of its sessions fail (those
+    streams are lost) and a replacement is started in its slot.
+
+    Queues and processes are created by start(), per process: a server
+    worker forked from the master gets a pool of its own.
+    """
+
+    def __init__(self, processes: int, model_path: str, sample_rate: int):
+        self._ctx = mp.get_context("spawn")
+        self._processes = processes
+        self._model_path = model_path
+        self._sample_rate = sample_rate
+        self._ids = itertools.count(1)
+        self._pid: Optional[int] = None
+        self._check_pid()
+
+    def _check_pid(self) -> None:
+        # queues, processes, reader threads and locks don't cross a fork
+        if self._pid == os.getpid():
+            return
+        self._workers: List[_Worker] = []
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._sessions: Dict[int, Tuple[_Worker, AudioRing]] = {}
+        self._started = False
+        self._stopping = False
+        self._start_lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def started(self) -> bool:
+        return self._started and self._pid == os.getpid()
+
+    def start(self) -> None:
+        """
+        Spawn the workers and block until every model is loaded.
+        """
+        self._check_pid()
+        with self._start_lock:
+            if self._started:
+                return
+
+            self._workers = [
+                _Worker(self._ctx, i, self._model_path, self._sample_rate)
+                for i in range(self._processes)
+            ]
+            for w in self._workers:
+                w.process.start()
+            for w in self._workers:
+                self._wait_ready(w)
+                self._start_reader(w)
+
+            self._started = True
+
+    def _start_reader(self, worker: _Worker) -> None:
+        threading.Thread(
+            target=self._read_results,
+            args=(worker,),
+            name=f"asr-shard-reader-{worker.index}",
+            daemon=True,
+        ).start()
+
+    def _wait_ready(self, worker: _Worker) -> None:
+        while True:
+            try:
+                worker.results.get(timeout=1.0)
+                return
+            except queue.Empty:
+                if not worker.process.is_alive():
+                    raise RuntimeError(f"ASR worker {worker.index} failed to start")
+
+    def _read_results(self, worker: _Worker) -> None:
+        while True:
+            try:
+                kind, sid, payload = worker.results.get(timeout=1.0)
+            except queue.Empty:
+                if not worker.process.is_alive():
+                    self._fail_worker(worker)
+                    return
+                continue
+
+            with self._lock:
+                waiters = self._pending.get(sid)
+                if not waiters:
+                    continue
+                loop, fut = waiters.pop(0)
+
+            loop.call_soon_threadsafe(_resolve, fut, payload)
+
+    def _fail_worker(self, worker: _Worker) -> None:
+        err = RuntimeError(f"ASR worker {worker.index} exited")
+        with self._lock:
+            worker.dead = True
+            sids = [sid for sid, (w, _) in self._sessions.items() if w is worker]
+            waiters = [wf for sid in sids for wf in self._pending.pop(sid, [])]
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_fail, fut, err)
+
+        if self._stopping:
+            return
+        print(f"[ASR] Worker {worker.index} exited; {len(sids)} streams lost, restarting it")
+        self._restart(worker)
+
+    def _restart(self, dead: _Worker) -> None:
+        """
+        Start a replacement in the dead worker's slot (on its reader
+        thread, which is about to exit).
+        """
+        worker = _Worker(self._ctx, dead.index, self._model_path, self._sample_rate)
+        try:
+            worker.process.start()
+            self._wait_ready(worker)
+        except Exception as e:
+            # the slot stays dead; placement skips it
+            print(f"[ASR] Restarting worker {dead.index} failed: {e}")
+            return
+        with self._lock:
+            self._workers[dead.index] = worker
+            self.restarts += 1
+        self._start_reader(worker)
+
+    def _submit(self, sid: int, worker: _Worker, cmd: tuple) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._lock:
+            if worker.dead:
+                fut.set_exception(RuntimeError(f"ASR worker {worker.index} exited"))
+                return fut
+            self._pending.setdefault(sid, []).append((loop, fut))
+        worker.commands.put(cmd)
+        return fut
+
+    async def open_session(self) -> Tuple[int, _Worker, AudioRing]:
+        if not self.started:
+            await asyncio.to_thread(self.start)
+
+        with self._lock:
+            live = [w for w in self._workers if not w.dead]
+            if not live:
+                raise RuntimeError("no ASR worker process is running")
+            worker = min(live, key=lambda w: w.sessions)
+            worker.sessions += 1
+            sid = next(self._ids)
+            ring = AudioRing.create()
+            self._sessions[sid] = (worker, ring)
+
+        await self._submit(sid, worker, ("open", sid, ring.name, ring.capacity))
+        return sid, worker, ring
+
+    async def decode(self, sid: int, worker: _Worker, ring: AudioRing, data: bytes):
+        ring.write(data)
+        return await self._submit(sid, worker, ("chunk", sid, len(data)))
+
+    async def flush(self, sid: int, worker: _Worker, ring: AudioRing):
+        return await self._submit(sid, worker, ("flush", sid))
+
+    async def close_session(self, sid: int, worker: _Worker, ring: AudioRing) -> None:
+        try:
+            if not worker.dead:
+                await self._submit(sid, worker, ("close", sid))
+        finally:
+            with self._lock:
+                worker.sessions = max(0, worker.sessions - 1)
+                self._sessions.pop(sid, None)
+                self._pending.pop(sid, None)
+            ring.unlink()
+
+    def stats(self) -> Dict[str, Any]:
+        self._check_pid()
+        with self._lock:
+            return {
+                "processes": self._processes,
+                "sessions_per_process": [w.sessions for w in self._workers],
+                "alive": [w.process.is_alive() for w in self._workers],
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self) -> None:
+        if not self.started:
+            return
+        self._stopping = True
+        for w in self._workers:
+            if w.process.is_alive():
+                w.commands.put(("shutdown",))
+        for w in self._workers:
+            w.process.join(timeout=5)
+
+
+def _resolve(fut: asyncio.Future, value) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+def _fail(fut: asyncio.Future, err: Exception) -> None:
+    if not fut.done():
+        fut.set_exception(err)
+
+
+class ShardedStream:
+    """
+    Same interface as ASRStream, backed by a ShardedASR worker process.
+    """
+
+    def __init__(self, pool: ShardedASR):
+        self._pool = pool
+        self._session: Optional[Tuple[int, _Worker, AudioRing]] = None
+
+    async def open(self) -> "ShardedStream":
+        self._session = await self._pool.open_session()
+        return self
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run other blocking per-session work (codec decoding) off the
+        event loop; the recognizer itself lives in the worker process.
+        """
+        return await asyncio.to_thread(fn, *args)
+
+    async def accept(self, data: bytes) -> Optional[Dict[str, Any]]:
+        return await self._pool.decode(*self._session, data)
+
+    async def flush(self) -> Optional[Dict[str, Any]]:
+        return await self._pool.flush(*self._session)
+
+    async def close(self) -> None:
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        await self._pool.close_session(*session)
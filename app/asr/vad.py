@@ -0,0 +1,150 @@
+import math
+import operator
+from array import array
+from collections import deque
+from typing import List, Tuple
+
+SAMPLE_RATE = 16000
+WEBRTC_FRAME_MS = 30
+
+
+class EnergyVAD:
+    """
+    RMS energy detector with an adaptive noise floor.
+
+    A chunk is speech when its level is above both the absolute threshold
+    and the noise floor plus a margin. The noise floor is the quietest
+    chunk of the last `floor_window_ms`, over every chunk, so it follows
+    ambient noise up as well as down, even when that noise is loud enough
+    to pass for speech. Speech has gaps between words, so the window
+    minimum stays below it.
+    """
+
+    name = "energy"
+
+    def __init__(
+        self,
+        threshold_dbfs: float = -45.0,
+        margin_db: float = 10.0,
+        floor_window_ms: float = 10000.0,
+        sample_rate: int = SAMPLE_RATE,
+    ):
+        self._threshold = 32768 * 10 ** (threshold_dbfs / 20)
+        self._margin = 10 ** (margin_db / 20)
+        self._noise_floor = self._threshold / self._margin
+        self._floor_window_ms = floor_window_ms
+        # (end time ms, rms), levels increasing: the first one is the minimum
+        self._levels: deque = deque()
+        self._elapsed_ms = 0.0
+        self.sample_rate = sample_rate
+
+    def _track_floor(self, rms: float, chunk_ms: float) -> None:
+        self._elapsed_ms += chunk_ms
+        levels = self._levels
+        while levels and levels[-1][1] >= rms:
+            levels.pop()
+        levels.append((self._elapsed_ms, rms))
+        while levels[0][0] <= self._elapsed_ms - self._floor_window_ms:
+            levels.popleft()
+        self._noise_floor = levels[0][1]
+
+    def is_speech(self, pcm: bytes) -> bool:
+        samples = array("h", pcm[: len(pcm) - len(pcm) % 2])
+        if not samples:
+            return False
+
+        rms = math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples))
+        speech = rms > max(self._threshold, self._noise_floor * self._margin)
+
+        self._track_floor(rms, len(samples) / self.sample_rate * 1000)
+        return speech
+
+
+class WebRTCVAD:
+    """
+    Google WebRTC VAD (optional `webrtcvad` package), run over 30 ms
+    frames. A chunk is speech when at least a third of its frames are.
+    """
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness: int = 2, sample_rate: int = SAMPLE_RATE):
+        import webrtcvad
+
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self._frame_bytes = sample_rate * WEBRTC_FRAME_MS // 1000 * 2
+
+    def is_speech(self, pcm: bytes) -> bool:
+        frames = [
+            pcm[i:i + self._frame_bytes]
+            for i in range(0, len(pcm) - self._frame_bytes + 1, self._frame_bytes)
+        ]
+        if not frames:
+            return False
+
+        voiced = sum(self._vad.is_speech(f, self.sample_rate) for f in frames)
+        return voiced * 3 >= len(frames)
+
+
+def create_vad(name: str, **kwargs):
+    if name == "webrtc":
+        try:
+            return WebRTCVAD(sample_rate=kwargs.get("sample_rate", SAMPLE_RATE))
+        except ImportError:
+            print("[VAD] webrtcvad not installed, falling back to energy VAD")
+    return EnergyVAD(**kwargs)
+
+
+class VADGate:
+    """
+    Decides which chunks reach the recognizer.
+
+    - speech chunks are always decoded
+    - up to `hangover_ms` of trailing silence is still decoded, so words
+      are not clipped and short pauses stay inside one utterance
+    - after `endpoint_ms` of silence the utterance is over: the caller
+      should flush the recognizer, and a "silence" event is reported
+    """
+
+    def __init__(self, vad, hangover_ms: int = 300, endpoint_ms: int = 800):
+        self._vad = vad
+        self._hangover_ms = hangover_ms
+        self._endpoint_ms = endpoint_ms
+        self._silence_ms = 0.0
+        self.in_speech = False
+
+        self.chunks_total = 0
+        self.chunks_skipped = 0
+
+    def process(self, pcm: bytes) -> Tuple[bool, List[str]]:
+        """
+        Returns (decode this chunk?, events), events being any of
+        "speech" (speech started) and "silence" (endpoint reached).
+        """
+        self.chunks_total += 1
+        chunk_ms = len(pcm) / 2 / self._vad.sample_rate * 1000
+
+        if self._vad.is_speech(pcm):
+            self._silence_ms = 0.0
+            if not self.in_speech:
+                self.in_speech = True
+                return True, ["speech"]
+            return True, []
+
+        self._silence_ms += chunk_ms
+
+        if not self.in_speech:
+            self.chunks_skipped += 1
+            return False, []
+
+        if self._silence_ms >= self._endpoint_ms:
+            self.in_speech = False
+            self.chunks_skipped += 1
+            return False, ["silence"]
+
+        if self._silence_ms <= self._hangover_ms:
+            return True, []
+
+        self.chunks_skipped += 1
+        return False, []
@@ -1,56 +1,181 @@
+import asyncio
 import json
-from datetime import datetime
-from vosk import Model, KaldiRecognizer
+from typing import Any, Dict, Optional
 
-MODEL_PATH = "models/vosk/hi/vosk-model-hi-0.22"
+from fastapi import WebSocketDisconnect
+
+from app.config import settings
+from app.asr.codecs import AudioTransport
+from app.asr.engine import ASREngine, ASRStream
+from app.asr.model_store import get_model, is_loaded, model_status
+from app.asr.ingest import STOP, IngestQueue, PartialThrottle
+from app.asr.sharded import ShardedASR, ShardedStream
+from app.asr.vad import VADGate, create_vad
+from app.storage.audio_log import AudioLogWriter
+
+MODEL_PATH = settings.VOSK_MODEL_PATH
 SAMPLE_RATE = 16000
-model = Model(MODEL_PATH)
+PARTIAL_SKIP_BACKLOG = 2
+
+if settings.ASR_MODE == "processes":
+    engine = None
+    shards = ShardedASR(settings.ASR_PROCESSES, MODEL_PATH, SAMPLE_RATE)
+else:
+    engine = ASREngine(settings.ASR_WORKERS)
+    shards = None
+
+
+def asr_status() -> Dict[str, Any]:
+    if shards is not None:
+        stats = shards.stats()
+        return {"mode": "processes", "warm": shards.started, **stats}
+    return {"mode": "threads", "warm": is_loaded(), **model_status(), **engine.stats()}
+
+
+def warm_up() -> None:
+    """
+    Load whatever the configured mode needs before the first session.
+    Blocking; run it off the event loop.
+    """
+    if shards is not None:
+        shards.start()
+    else:
+        get_model()
 
 
-async def run_vosk_asr_stream(ws):
-    recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+def shut_down() -> None:
+    """
+    Stop this process's ASR worker processes, if any.
+    """
+    if shards is not None:
+        shards.shutdown()
+
+
+def _new_recognizer():
+    from vosk import KaldiRecognizer
+
+    recognizer = KaldiRecognizer(get_model(), SAMPLE_RATE)
     recognizer.SetPartialWords(True)
+    return recognizer
+
+
+def _new_stream():
+    if shards is not None:
+        return ShardedStream(shards)
+    return ASRStream(engine, _new_recognizer)
+
+
+async def _receive(ws, ingest: IngestQueue, transport: AudioTransport) -> None:
+    """
+    Read the socket into the ingest queue until stop or disconnect.
+    A leading {"type": "config"} message negotiates the audio codec.
+    """
+    try:
+        while True:
+            msg = await ws.receive()
 
-    while True:
-        msg = await ws.receive()
+            if msg.get("type") == "websocket.disconnect":
+                ingest.put_control(WebSocketDisconnect(msg.get("code", 1000)))
+                return
 
-        if "text" in msg and msg["text"]:
-            raw = msg["text"].strip()
+            if "text" in msg and msg["text"]:
+                raw = msg["text"].strip()
 
-            if raw == "stop":
+                if raw == "stop":
+                    ingest.put_control(STOP)
+                    return
+
+                try:
+                    payload = json.loads(raw)
+                    if payload.get("type") == "stop":
+                        ingest.put_control(STOP)
+                        return
+                    if payload.get("type") == "config" and not transport.negotiated:
+                        await ws.send_json(transport.negotiate(payload))
+                        continue
+                except json.JSONDecodeError:
+                    pass
+
+            data = msg.get("bytes")
+            if data:
+                await ingest.put_audio(data)
+    except Exception as e:
+        ingest.put_control(e)
+
+
+async def run_vosk_asr_stream(ws, session_id: Optional[str] = None):
+    stream = await _new_stream().open()
+    audio_log = (
+        AudioLogWriter(session_id, SAMPLE_RATE)
+        if session_id and settings.AUDIO_LOG
+        else None
+    )
+    ingest = IngestQueue(settings.ASR_INGEST_QUEUE_SIZE, settings.ASR_INGEST_POLICY)
+    partials = PartialThrottle(
+        settings.ASR_PARTIALS_PER_SEC,
+        settings.ASR_PARTIALS_ON_CHANGE,
+    )
+    vad = VADGate(
+        create_vad(settings.ASR_VAD, sample_rate=SAMPLE_RATE),
+        hangover_ms=settings.ASR_VAD_HANGOVER_MS,
+        endpoint_ms=settings.ASR_VAD_ENDPOINT_MS,
+    )
+    transport = AudioTransport(SAMPLE_RATE)
+    receiver = asyncio.create_task(_receive(ws, ingest, transport))
+
+    try:
+        while True:
+            item = await ingest.get()
+
+            if item is STOP:
+                event = await stream.flush()
+                if event:
+                    yield event
                 yield {"type": "stop"}
                 break
 
-            try:
-                payload = json.loads(raw)
-                if payload.get("type") == "stop":
-                    yield {"type": "stop"}
-                    break
-            except json.JSONDecodeError:
-                pass
-
-        if "bytes" not in msg:
-            continue
-
-        data = msg["bytes"]
-
-        if recognizer.AcceptWaveform(data):
-            result = json.loads(recognizer.Result())
-            text = result.get("text", "").strip()
-
-            if text:
-                yield {
-                    "type": "transcript",
-                    "data": {
-                        "speaker": "unknown",
-                        "text": text,
-                        "timestamp": datetime.now().isoformat(),
-                    },
-                }
-        else:
-            partial = json.loads(recognizer.PartialResult())
-            if partial.get("partial"):
-                yield {
-                    "type": "partial",
-                    "text": partial["partial"],
-                }
+            if isinstance(item, BaseException):
+                raise item
+
+            if transport.passthrough:
+                pcm = transport.decode(item)
+            else:
+                # pure-Python decoders cost ~ms per frame: keep them off the loop
+                pcm = await stream.run(transport.decode, item)
+            if audio_log:
+                audio_log.append(pcm)
+
+            decode, vad_events = vad.process(pcm)
+
+            for state in vad_events:
+                if state == "silence":
+                    event = await stream.flush()
+                    if event:
+                        partials.reset()
+                        yield event
+                yield {"type": "vad", "state": state}
+
+            if not decode:
+                continue
+
+            event = await stream.accept(pcm)
+            if not event:
+                continue
+
+            if event["type"] == "partial":
+                # Behind real time: spend the time on final results only
+                if ingest.backlog() > PARTIAL_SKIP_BACKLOG:
+                    continue
+                if not partials.allow(event["text"]):
+                    continue
+            else:
+                partials.reset()
+
+            yield event
+    finally:
+        receiver.cancel()
+        if audio_log:
+            audio_log.close()
+        if ingest.dropped:
+            print(f"[ASR] Ingest dropped chunks: {ingest.stats()}")
+        await stream.close()
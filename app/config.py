@@ -8,5 +8,129 @@ class Settings:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL")
 
+    VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk/hi/vosk-model-hi-0.22")
+
+    # Gemini calls across all sessions: global concurrency, report-lane cap
+    # (keeps slots free for live updates) and requests/sec (0 = unlimited)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_REPORT_CONCURRENCY = int(os.getenv("LLM_REPORT_CONCURRENCY", "4"))
+    LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "0"))
+
+    # Pre-generate the report after each live update (lowest-priority lane),
+    # at most LLM_SPECULATIVE_MAX_PER_SESSION calls per session
+    LLM_SPECULATIVE_REPORTS = os.getenv("LLM_SPECULATIVE_REPORTS", "true").lower() == "true"
+    LLM_SPECULATIVE_CONCURRENCY = int(os.getenv("LLM_SPECULATIVE_CONCURRENCY", "2"))
+    LLM_SPECULATIVE_MAX_PER_SESSION = int(os.getenv("LLM_SPECULATIVE_MAX_PER_SESSION", "4"))
+
+    # Incremental updates send a windowed, short-key state (last N entries
+    # per section plus any mentioned again) instead of the full state
+    LLM_COMPACT_PROMPT = os.getenv("LLM_COMPACT_PROMPT", "true").lower() == "true"
+    LLM_PROMPT_WINDOW = int(os.getenv("LLM_PROMPT_WINDOW", "3"))
+
+    # Stream incremental updates and push each section to the client as
+    # soon as it is complete ("structured_partial" messages)
+    LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+
+    # Rule-based extraction of common symptoms, durations and vitals on
+    # every final utterance, shown before the LLM update arrives
+    FASTPATH = os.getenv("FASTPATH", "true").lower() == "true"
+
+    # Incremental update debounce: at a speech pause, update once this many
+    # utterances are pending; during continuous speech, once the oldest has
+    # waited LLM_UPDATE_MAX_DELAY s; never start two within MIN_INTERVAL s
+    LLM_UPDATE_MIN_UTTERANCES = int(os.getenv("LLM_UPDATE_MIN_UTTERANCES", "3"))
+    LLM_UPDATE_MIN_INTERVAL = float(os.getenv("LLM_UPDATE_MIN_INTERVAL", "20"))
+    LLM_UPDATE_MAX_DELAY = float(os.getenv("LLM_UPDATE_MAX_DELAY", "60"))
+
+    # Cache of LLM results keyed by (backend, model, prompt version,
+    # inputs): an in-memory LRU bounded by entries and size, backed by a
+    # disk tier with the gemini backend ("" for LLM_CACHE_DIR keeps it
+    # memory-only)
+    LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "32"))
+    LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "data/llm_cache")
+    LLM_CACHE_DISK_MAX_MB = int(os.getenv("LLM_CACHE_DISK_MAX_MB", "512"))
+
+    # LLM provider: "gemini", "http" (a server speaking the JSON protocol
+    # in app/llm/backends.py, e.g. app/llm/mock_server.py) or "mock"
+    # (in-process). Mock latency is "fixed:ms", "uniform:a,b",
+    # "normal:mu,sd" or "lognormal:median,sigma"; recorded reports are
+    # replayed from LLM_MOCK_RECORDINGS
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    LLM_HTTP_URL = os.getenv("LLM_HTTP_URL", "http://127.0.0.1:8090")
+    LLM_MOCK_LATENCY = os.getenv("LLM_MOCK_LATENCY", "lognormal:800,0.4")
+    LLM_MOCK_ERROR_RATE = float(os.getenv("LLM_MOCK_ERROR_RATE", "0"))
+    LLM_MOCK_RECORDINGS = os.getenv("LLM_MOCK_RECORDINGS", "data/sessions")
+
+    # Call policy (app/llm/policy.py): deadlines in seconds per call
+    # (reports also cover speculative runs); calls still unanswered after
+    # the lane's recent LLM_HEDGE_QUANTILE latency (at least
+    # LLM_HEDGE_MIN_MS) are duplicated, for at most LLM_HEDGE_MAX_RATIO of
+    # calls; LLM_BREAKER_FAILURES consecutive failures open a model's
+    # circuit for LLM_BREAKER_COOLDOWN s, and calls go to
+    # LLM_FALLBACK_MODEL ("" = none; live sessions keep fast-path results)
+    LLM_DEADLINE_LIVE = float(os.getenv("LLM_DEADLINE_LIVE", "20"))
+    LLM_DEADLINE_REPORT = float(os.getenv("LLM_DEADLINE_REPORT", "60"))
+    LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() == "true"
+    LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+    LLM_HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "500"))
+    LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+    LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+    LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "")
+
+    # ASR decoding runs on this many single-thread lanes; each session is
+    # pinned to the least-loaded lane, and sessions sharing a lane take turns
+    ASR_WORKERS = int(os.getenv("ASR_WORKERS", str(os.cpu_count() or 4)))
+
+    # "threads": one model in this process; "processes": one model per
+    # ASR worker process, audio passed through shared-memory rings
+    ASR_MODE = os.getenv("ASR_MODE", "threads")
+    ASR_PROCESSES = int(os.getenv("ASR_PROCESSES", str(os.cpu_count() or 4)))
+
+    # Audio chunks buffered per session before ASR_INGEST_POLICY applies:
+    # "block" (backpressure), "drop_oldest" or "drop_newest"
+    ASR_INGEST_QUEUE_SIZE = int(os.getenv("ASR_INGEST_QUEUE_SIZE", "32"))
+    ASR_INGEST_POLICY = os.getenv("ASR_INGEST_POLICY", "block")
+
+    # Partial results sent to the browser; 0 disables the rate limit
+    ASR_PARTIALS_PER_SEC = float(os.getenv("ASR_PARTIALS_PER_SEC", "4"))
+    ASR_PARTIALS_ON_CHANGE = os.getenv("ASR_PARTIALS_ON_CHANGE", "true").lower() == "true"
+
+    # Voice activity detection before the recognizer: "energy" or "webrtc"
+    ASR_VAD = os.getenv("ASR_VAD", "energy")
+    ASR_VAD_HANGOVER_MS = int(os.getenv("ASR_VAD_HANGOVER_MS", "300"))
+    ASR_VAD_ENDPOINT_MS = int(os.getenv("ASR_VAD_ENDPOINT_MS", "800"))
+
+    # Resources initialized in the background at startup (comma-separated:
+    # asr, vectorstore, llm, llm_cache); anything left out is created on
+    # first use
+    WARMUP = os.getenv("WARMUP", "asr,vectorstore,llm,llm_cache")
+
+    # Finished sessions stay in memory until idle for SESSION_IDLE_TTL
+    # seconds or pushed out (least recently used) beyond
+    # SESSION_MAX_RESIDENT; they are reloaded from data/sessions on access
+    SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+    SESSION_MAX_RESIDENT = int(os.getenv("SESSION_MAX_RESIDENT", "200"))
+    SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+    # Where session ownership and session locks live: memory (one
+    # worker), sqlite (the workers of one node) or resp (a Redis-compatible
+    # server shared by several nodes)
+    REGISTRY_BACKEND = os.getenv("REGISTRY_BACKEND", "memory")
+    REGISTRY_SQLITE_PATH = os.getenv("REGISTRY_SQLITE_PATH", "data/registry.db")
+    REGISTRY_RESP_URL = os.getenv("REGISTRY_RESP_URL", "redis://127.0.0.1:6379/0")
+    # Ownership and lock leases expire this long after their holder stops
+    # refreshing them (crashed worker)
+    REGISTRY_LEASE_SECONDS = float(os.getenv("REGISTRY_LEASE_SECONDS", "30"))
+    # Give up waiting for another worker's session lock after this long
+    REGISTRY_LOCK_TIMEOUT = float(os.getenv("REGISTRY_LOCK_TIMEOUT", "10"))
+    # Base URL other workers redirect a session's requests to; set per
+    # worker by `main.py --workers`
+    REGISTRY_ADVERTISE_URL = os.getenv("REGISTRY_ADVERTISE_URL", "")
+
+    # Persist session audio (audio.pcm + audio.idx) for audit and replay
+    AUDIO_LOG = os.getenv("AUDIO_LOG", "true").lower() == "true"
+
 settings = Settings()
-print("GEMINI_MODEL =", os.getenv("GEMINI_MODEL"))
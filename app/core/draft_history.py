@@ -0,0 +1,104 @@
+"""
+LLM draft history stored as diffs.
+
+Each accepted update used to keep the whole structured state on its
+draft, so a session's drafts grew quadratically with its length. A draft
+now carries only what changed since the previous draft's version:
+
+    {"set": {key: value}, "lists": {key: {"len": n, "at": [[i, entry], ...]}},
+     "unset": [key]}
+
+List sections record just the positions whose entry changed (appends
+and in-place updates, which is all the pipeline does between drafts) and
+the new length. Since the state is immutable (app/core/frozen.py), the
+values in a diff are shared with the state rather than copied. Any
+version is rebuilt on demand by replaying the diffs.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from app.core.frozen import freeze
+
+if TYPE_CHECKING:
+    from app.core.session_models import LLMDraft
+
+
+def state_diff(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    diff: Dict[str, Any] = {}
+
+    for key, value in current.items():
+        old = previous.get(key)
+        if value is old or (key in previous and value == old):
+            continue
+        if isinstance(value, list) and isinstance(old, list):
+            at = [
+                [i, v]
+                for i, v in enumerate(value)
+                if i >= len(old) or not (v is old[i] or v == old[i])
+            ]
+            diff.setdefault("lists", {})[key] = {"len": len(value), "at": at}
+        else:
+            diff.setdefault("set", {})[key] = value
+
+    unset = [k for k in previous if k not in current]
+    if unset:
+        diff["unset"] = unset
+    return diff
+
+
+def apply_diff(state: Dict[str, Any], diff: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(state)
+    out.update(diff.get("set", {}))
+
+    for key, change in diff.get("lists", {}).items():
+        items = list(out.get(key) or [])[:change["len"]]
+        items.extend([None] * (change["len"] - len(items)))
+        for i, v in change["at"]:
+            items[i] = v
+        out[key] = items
+
+    for key in diff.get("unset", []):
+        out.pop(key, None)
+    return freeze(out)
+
+
+class DraftHistory:
+    """
+    The session's LLM drafts, oldest first. Version n is the state
+    committed with draft n (1-based); version 0 is empty.
+    """
+
+    __slots__ = ("_drafts", "_head")
+
+    def __init__(self):
+        self._drafts: List["LLMDraft"] = []
+        # last recorded version, to diff the next one against
+        self._head: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._drafts)
+
+    def __iter__(self) -> Iterator["LLMDraft"]:
+        return iter(self._drafts)
+
+    def __getitem__(self, i):
+        return self._drafts[i]
+
+    def record(self, draft: "LLMDraft", state: Dict[str, Any]) -> "LLMDraft":
+        """
+        Append a draft for the committed `state`; its structured_patch
+        becomes the diff against the previous version.
+        """
+        draft.structured_patch = state_diff(self._head, state)
+        self._drafts.append(draft)
+        self._head = state
+        return draft
+
+    def version(self, n: Optional[int] = None) -> Dict[str, Any]:
+        n = len(self._drafts) if n is None else n
+        if not 0 <= n <= len(self._drafts):
+            raise IndexError(f"version {n} out of range 0..{len(self._drafts)}")
+
+        state: Dict[str, Any] = freeze({})
+        for draft in self._drafts[:n]:
+            state = apply_diff(state, draft.structured_patch)
+        return state
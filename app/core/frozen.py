@@ -0,0 +1,68 @@
+"""
+Immutable, structurally shared session state.
+
+The structured state is treated as a value: every update builds a new
+top-level dict that reuses the untouched sections (and entries) of the
+previous one, so a snapshot is just a reference and an update costs
+O(what changed) instead of a deepcopy of the whole state, utterances
+included.
+
+freeze() is applied where a new state is committed to the session. It
+stops at values that are already frozen, so committing an update only
+walks the sections that were rebuilt. The frozen types subclass dict and
+list, so isinstance checks and json serialization work unchanged; any
+in-place mutation raises TypeError, which keeps the sharing safe. Use
+dict(x) / list(x) (or {**x, ...}) to derive a modified copy.
+"""
+from typing import Any
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is immutable")
+
+
+class FrozenDict(dict):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+    __ior__ = _immutable
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class FrozenList(list):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(value: Any) -> Any:
+    """
+    Frozen version of a JSON-like value, sharing every subtree that is
+    already frozen.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(v) for v in value)
+    return value
@@ -0,0 +1,69 @@
+"""
+Approximate memory footprint of a live session.
+
+Sizes are sys.getsizeof summed over the object graph. Objects shared
+between parts of the session (unedited utterances, state sections reused
+by draft diffs) are counted once in the total, so the total is lower
+than the sum of the parts whenever sharing works.
+"""
+import sys
+from typing import Any, Dict, Optional, Set
+
+from app.core.session_models import SessionState
+
+
+def deep_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, "__dict__"):
+            stack.append(vars(o))
+        else:
+            stack.extend(
+                getattr(o, name)
+                for cls in type(o).__mro__
+                for name in getattr(cls, "__slots__", ())
+                if hasattr(o, name)
+            )
+
+    return size
+
+
+def session_memory(state: SessionState) -> Dict[str, Any]:
+    parts = {
+        "final_transcript": state.final_transcript,
+        "raw_transcript": state.raw_transcript,
+        "structured_state": state.final_structured_state,
+        "llm_drafts": list(state.llm_drafts),
+        "transcript_edits": state.transcript_edits,
+        "structured_edits": state.structured_edits,
+    }
+
+    seen: Set[int] = set()
+    total = sum(deep_size(v, seen) for v in parts.values())
+
+    return {
+        "session_id": state.session_id,
+        "active": state.active,
+        "counts": {
+            "utterances": len(state.final_transcript),
+            "drafts": len(state.llm_drafts),
+            "transcript_edits": len(state.transcript_edits),
+            "structured_edits": len(state.structured_edits),
+        },
+        "bytes": {name: deep_size(value) for name, value in parts.items()},
+        "total_bytes": total,
+    }
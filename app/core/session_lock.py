@@ -0,0 +1,82 @@
+"""
+The per-session lock.
+
+Within a worker it is an asyncio.Lock. With a shared registry backend
+the holder also takes a lease on `lock:<session_id>` in the backend, so
+two workers (or nodes) never mutate the same session at once, even
+while ownership moves between them. A lease outlives a crashed holder by
+at most REGISTRY_LEASE_SECONDS. Backend calls run on the registry's
+executor, never on the event loop.
+
+`lock.local` is the asyncio.Lock alone, for the live connection's
+per-event updates: only the owning worker ever sees those, so they
+skip the backend round trips.
+"""
+import asyncio
+import time
+import uuid
+from typing import Optional
+
+from app.config import settings
+
+
+class SessionLock:
+    __slots__ = ("key", "_local", "_token")
+
+    def __init__(self, session_id: str):
+        self.key = f"lock:{session_id}"
+        self._local = asyncio.Lock()
+        self._token: Optional[str] = None
+
+    def locked(self) -> bool:
+        return self._local.locked()
+
+    @property
+    def local(self) -> asyncio.Lock:
+        return self._local
+
+    async def acquire(self) -> bool:
+        from app.storage.registry_backends import call, get_backend, submit
+
+        await self._local.acquire()
+        if not get_backend().shared:
+            return True
+
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.REGISTRY_LEASE_SECONDS * 1000)
+        deadline = time.monotonic() + settings.REGISTRY_LOCK_TIMEOUT
+        delay = 0.005
+        try:
+            while not await call("set", self.key, token, ttl_ms, nx=True):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{self.key} is held by another worker")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+        except BaseException:
+            # a SET cut short by cancellation may still have landed
+            submit("compare_and_delete", self.key, token)
+            self._local.release()
+            raise
+        self._token = token
+        return True
+
+    async def release(self) -> None:
+        token, self._token = self._token, None
+        try:
+            if token is not None:
+                from app.storage.registry_backends import call
+
+                try:
+                    await call("compare_and_delete", self.key, token)
+                except Exception as e:
+                    # the lease runs out on its own
+                    print(f"[SESSIONS] Releasing {self.key} failed: {e}")
+        finally:
+            self._local.release()
+
+    async def __aenter__(self) -> "SessionLock":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.release()
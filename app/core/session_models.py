@@ -1,15 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
-import asyncio
+from typing import Dict, Any, List, Optional, Tuple
 
-@dataclass
-class FinalUtterance:
-    utterance_id: str
-    timestamp: str
-    text: str
-    speaker: str
+from app.core.draft_history import DraftHistory
+from app.core.session_lock import SessionLock
+from app.core.transcript import FinalUtterance, Transcript  # noqa: F401
+
+# Slotted: no per-instance __dict__, which adds up with hundreds of live
+# sessions per node
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptEdit:
     edit_id: str
     utterance_id: str
@@ -19,7 +18,7 @@ class TranscriptEdit:
     edited_by: str
     edited_at: str
 
-@dataclass
+@dataclass(slots=True)
 class StructuredEdit:
     edit_id: str
     section: str
@@ -28,31 +27,47 @@ class StructuredEdit:
     edited_by: str
     edited_at: str
 
-@dataclass
+@dataclass(slots=True)
 class LLMDraft:
-    draft_id: str
-    created_at: str
-    input_utterance_ids: List[str]
+    draft_id: int
+    # time.time() of the commit
+    created_at: float
+    # transcript indices [start, end) the update covered
+    input_range: Tuple[int, int]
+    # changes since the previous draft's version, see DraftHistory
     structured_patch: Dict[str, Any]
     model: str
     accepted: bool = False
+    usage: Dict[str, int] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class SessionState:
     session_id: str
     session_date: str
 
-    raw_transcript: list = field(default_factory=list)
+    # the transcript as recognized, before doctor edits; set at
+    # finalization and sharing its columns with final_transcript when
+    # there were no edits
+    raw_transcript: Transcript = field(default_factory=Transcript)
     asr_utterances: list = field(default_factory=list)
-    llm_drafts: List[LLMDraft] = field(default_factory=list)
+    llm_drafts: DraftHistory = field(default_factory=DraftHistory)
     transcript_edits: List[TranscriptEdit] = field(default_factory=list)
     structured_edits: List[StructuredEdit] = field(default_factory=list)
-    final_transcript: List[FinalUtterance] = field(default_factory=list)
+    final_transcript: Transcript = field(default_factory=Transcript)
     final_structured_state: Dict[str, Any] = field(default_factory=dict)
     final_clinical_report: str | None = None
 
     active: bool = True
+    # finalization has written the session's artifacts to data/sessions
+    persisted: bool = False
+    in_speech: bool = False
     last_text_time: float = 0.0
     last_processed_index: int = 0
 
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # an asyncio.Lock, plus a lease in the registry backend when it is
+    # shared between workers
+    lock: Optional[SessionLock] = None
+
+    def __post_init__(self):
+        if self.lock is None:
+            self.lock = SessionLock(self.session_id)
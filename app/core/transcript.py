@@ -0,0 +1,193 @@
+"""
+Columnar transcript storage.
+
+A live session appends an utterance every few seconds, and hundreds of
+sessions can run on one node, so the transcript is kept as columns
+rather than one object per utterance:
+
+- utterance ids: 16 raw bytes of a uuid4 each, in one bytearray
+- timestamps: integer milliseconds since the session started (monotonic
+  clock), in an array
+- speakers: small integer codes into an interned name table
+- texts: a list of str
+
+FinalUtterance objects, UUID strings and ISO timestamps are only built
+at the edges (prompts, API responses, files on disk).
+
+copy() shares the columns; either side copies a column the first time
+it writes to it, so editing a copy costs one flat copy of the edited
+column, then O(1) per edit.
+"""
+import sys
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# speaker codes 0..2; any other name is interned and appended per transcript
+SPEAKERS = ("unknown", "doctor", "patient")
+
+_ID_BYTES = 16
+_COLUMNS = ("_ids", "_t_ms", "_speakers", "_texts", "_speaker_names")
+
+
+@dataclass(slots=True)
+class FinalUtterance:
+    """
+    One utterance, materialized from a Transcript.
+    """
+    utterance_id: str
+    timestamp: str
+    text: str
+    speaker: str
+
+
+class Transcript:
+    __slots__ = _COLUMNS + ("_shared", "_started_at", "_t0")
+
+    def __init__(self):
+        self._ids = bytearray()
+        self._t_ms = array("I")
+        self._speakers = array("H")
+        self._texts: List[str] = []
+        self._speaker_names: List[str] = list(SPEAKERS)
+        # columns that a copy() may still be reading
+        self._shared: set = set()
+        # wall clock of t=0, for materializing timestamps
+        self._started_at = datetime.utcnow()
+        self._t0 = time.monotonic()
+
+    @classmethod
+    def from_dicts(cls, rows: List[Dict[str, Any]]) -> "Transcript":
+        """
+        Rebuild from the on-disk form (see to_dicts); offsets are taken
+        relative to the first timestamp.
+        """
+        out = cls()
+        times = []
+        for row in rows:
+            try:
+                times.append(datetime.fromisoformat(row["timestamp"]))
+            except (KeyError, TypeError, ValueError):
+                times.append(None)
+        known = [t for t in times if t is not None]
+        if known:
+            out._started_at = known[0]
+
+        for row, t in zip(rows, times):
+            try:
+                out._ids += uuid.UUID(row.get("utterance_id")).bytes
+            except (ValueError, TypeError, AttributeError):
+                out._ids += uuid.uuid4().bytes
+            offset = (t - out._started_at).total_seconds() if t is not None else 0
+            out._t_ms.append(max(0, int(offset * 1000)))
+            out._speakers.append(out._speaker_code(row.get("speaker") or "unknown"))
+            out._texts.append(str(row.get("text", "")))
+        return out
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _own(self, *columns: str) -> None:
+        for name in columns:
+            if name in self._shared:
+                setattr(self, name, getattr(self, name)[:])
+                self._shared.discard(name)
+
+    def _speaker_code(self, speaker: str) -> int:
+        try:
+            return self._speaker_names.index(speaker)
+        except ValueError:
+            self._speaker_names.append(sys.intern(speaker))
+            return len(self._speaker_names) - 1
+
+    def append(self, text: str, speaker: str = "unknown") -> int:
+        self._own(*_COLUMNS)
+        self._ids += uuid.uuid4().bytes
+        self._t_ms.append(int((time.monotonic() - self._t0) * 1000))
+        self._speakers.append(self._speaker_code(speaker))
+        self._texts.append(text)
+        return len(self._texts) - 1
+
+    # -------- per-column access, no FinalUtterance built --------
+
+    def utterance_id(self, i: int) -> str:
+        start = i * _ID_BYTES
+        return str(uuid.UUID(bytes=bytes(self._ids[start:start + _ID_BYTES])))
+
+    def timestamp(self, i: int) -> str:
+        return (self._started_at + timedelta(milliseconds=self._t_ms[i])).isoformat()
+
+    def speaker(self, i: int) -> str:
+        return self._speaker_names[self._speakers[i]]
+
+    def text(self, i: int) -> str:
+        return self._texts[i]
+
+    def index_of(self, utterance_id: str) -> Optional[int]:
+        try:
+            key = uuid.UUID(utterance_id).bytes
+        except (ValueError, TypeError, AttributeError):
+            return None
+        pos = self._ids.find(key)
+        while pos != -1 and pos % _ID_BYTES:
+            pos = self._ids.find(key, pos + 1)
+        return None if pos == -1 else pos // _ID_BYTES
+
+    # -------- edits --------
+
+    def copy(self) -> "Transcript":
+        out = Transcript.__new__(Transcript)
+        for name in _COLUMNS:
+            setattr(out, name, getattr(self, name))
+        out._shared = set(_COLUMNS)
+        self._shared = set(_COLUMNS)
+        out._started_at = self._started_at
+        out._t0 = self._t0
+        return out
+
+    def set_text(self, i: int, text: str) -> None:
+        self._own("_texts")
+        self._texts[i] = text
+
+    def set_speaker(self, i: int, speaker: str) -> None:
+        self._own("_speakers", "_speaker_names")
+        self._speakers[i] = self._speaker_code(speaker)
+
+    # -------- materialization at the edges --------
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[FinalUtterance, List[FinalUtterance]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("transcript index out of range")
+        return FinalUtterance(
+            utterance_id=self.utterance_id(i),
+            timestamp=self.timestamp(i),
+            text=self._texts[i],
+            speaker=self.speaker(i),
+        )
+
+    def __iter__(self) -> Iterator[FinalUtterance]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self, speaker: bool = True) -> List[Dict[str, Any]]:
+        """
+        The on-disk form: utterance_id, timestamp, text (and speaker).
+        """
+        out = []
+        for i in range(len(self)):
+            row = {
+                "utterance_id": self.utterance_id(i),
+                "timestamp": self.timestamp(i),
+                "text": self._texts[i],
+            }
+            if speaker:
+                row["speaker"] = self.speaker(i)
+            out.append(row)
+        return out
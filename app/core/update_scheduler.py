@@ -0,0 +1,173 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class DebouncePolicy:
+    """
+    When pending utterances are worth an LLM update.
+
+    At a quiet point (the speaker paused) an update starts once
+    `min_utterances` are pending; during continuous speech it starts
+    once the oldest pending utterance has waited `max_delay`. Either way
+    request starts are at least `min_interval` apart.
+    """
+    min_utterances: int = 3
+    min_interval: float = 20.0
+    max_delay: float = 60.0
+
+    def delay(
+        self,
+        pending: int,
+        since_last_start: float,
+        oldest_age: float,
+        quiet: bool,
+    ) -> Optional[float]:
+        """
+        Seconds until an update should start, or None to wait for more
+        utterances or a quiet point.
+        """
+        if pending == 0:
+            return None
+
+        interval_wait = max(0.0, self.min_interval - since_last_start)
+        if quiet and pending >= self.min_utterances:
+            return interval_wait
+        return max(interval_wait, self.max_delay - oldest_age)
+
+
+class UpdateScheduler:
+    """
+    Per-session driver for incremental LLM updates.
+
+    Keeps at most one request in flight. Utterances that arrive while a
+    request runs are coalesced into the next one, and a batch is only
+    marked processed (advancing the cursor by exactly its length) once
+    its update has been applied.
+
+    run_update(start, batch) performs and applies one update;
+    load_pending(start) returns the transcript from index `start`.
+    """
+
+    def __init__(
+        self,
+        run_update: Callable[[int, List[Any]], Awaitable[None]],
+        load_pending: Callable[[int], Awaitable[List[Any]]],
+        policy: DebouncePolicy,
+    ):
+        self.run_update = run_update
+        self.load_pending = load_pending
+        self.policy = policy
+
+        self.sent_index = 0
+        self.quiet = False
+        self.updates = 0
+        self.failures = 0
+
+        self._arrivals: List[float] = []
+        self._last_start = float("-inf")
+        self._flushing = False
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._in_flight: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    def utterance_added(self) -> None:
+        self._arrivals.append(time.monotonic())
+        self._wake.set()
+
+    def set_quiet(self, quiet: bool) -> None:
+        self.quiet = quiet
+        self._wake.set()
+
+    async def flush(self) -> None:
+        """
+        Send everything still pending right away, ignoring the policy,
+        and return once it has been applied (or the update failed).
+        """
+        self._flushing = True
+        self._drained.clear()
+        self._wake.set()
+        await self._drained.wait()
+
+    async def close(self) -> None:
+        """
+        Stop scheduling and cancel any request still in flight.
+        """
+        for task in (self._task, self._in_flight):
+            if task is not None and not task.done():
+                task.cancel()
+        for task in (self._task, self._in_flight):
+            if task is not None:
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._drained.set()
+
+    async def _loop(self) -> None:
+        while True:
+            pending = await self.load_pending(self.sent_index)
+
+            if self._flushing:
+                delay: Optional[float] = 0.0 if pending else None
+                if not pending:
+                    self._flushing = False
+                    self._drained.set()
+            else:
+                now = time.monotonic()
+                oldest = self._arrivals[self.sent_index] if self.sent_index < len(self._arrivals) else now
+                delay = self.policy.delay(
+                    len(pending),
+                    now - self._last_start,
+                    now - oldest,
+                    self.quiet,
+                )
+
+            if delay is None or delay > 0:
+                # any new utterance or state change re-evaluates the wait,
+                # which replaces (debounces) the previous deadline
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._send(pending)
+
+    async def _send(self, batch: List[Any]) -> None:
+        start = self.sent_index
+        self._last_start = time.monotonic()
+        self._in_flight = asyncio.create_task(self.run_update(start, batch))
+        try:
+            await self._in_flight
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            print(f"[LLM] Update of {len(batch)} utterances failed: {e}")
+            if self._flushing:
+                # don't retry forever while the session is finishing
+                self._flushing = False
+                self._drained.set()
+            return
+        finally:
+            self._in_flight = None
+
+        self.sent_index = start + len(batch)
+        self.updates += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent_index": self.sent_index,
+            "received": len(self._arrivals),
+            "updates": self.updates,
+            "failures": self.failures,
+            "in_flight": self._in_flight is not None,
+        }
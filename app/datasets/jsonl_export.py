@@ -5,7 +5,6 @@ from typing import Dict, Any, List
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATASET_DIR = BASE_DIR / "data" / "datasets"
-DATASET_DIR.mkdir(parents=True, exist_ok=True)
 
 JSONL_PATH = DATASET_DIR / "clinical_v1.jsonl"
 
@@ -53,5 +52,6 @@ def export_session(
         },
     }
 
+    DATASET_DIR.mkdir(parents=True, exist_ok=True)
     with JSONL_PATH.open("a", encoding="utf-8") as f:
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
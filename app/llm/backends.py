@@ -0,0 +1,253 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.config import settings
+
+
+@dataclass
+class LLMResponse:
+    """
+    Provider-neutral result of one call (or one streamed chunk; usage is
+    only set on the last chunk). The gateway fills in the model that
+    actually answered.
+    """
+    text: str
+    usage: Dict[str, int] = field(default_factory=dict)
+    model: str = ""
+
+
+class LLMBackend(ABC):
+    """
+    What the gateway needs from a provider. generate_sync serves the
+    blocking helpers used by scripts.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def generate(self, model: str, contents: str, config: Dict[str, Any]) -> LLMResponse:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stream(self, model: str, contents: str, config: Dict[str, Any]) -> AsyncIterator[LLMResponse]:
+        raise NotImplementedError
+        yield
+
+    @abstractmethod
+    def generate_sync(self, model: str, contents: str, config: Dict[str, Any]) -> LLMResponse:
+        raise NotImplementedError
+
+    async def warm_up(self) -> None:
+        """
+        Create clients and open connections ahead of the first call.
+        """
+
+
+def _gemini_usage(response) -> Dict[str, int]:
+    meta = getattr(response, "usage_metadata", None)
+    return {
+        "prompt": getattr(meta, "prompt_token_count", None) or 0,
+        "cached": getattr(meta, "cached_content_token_count", None) or 0,
+        "output": getattr(meta, "candidates_token_count", None) or 0,
+    }
+
+
+class GeminiBackend(LLMBackend):
+    """
+    google-genai client, created on first use. Its sync and async sides
+    each keep one pooled HTTP connection set, sized to the gateway's
+    concurrency limit.
+    """
+    name = "gemini"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google import genai
+                    from google.genai import types
+
+                    limits = httpx.Limits(
+                        max_connections=settings.LLM_MAX_CONCURRENCY,
+                        max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+                    )
+                    self._client = genai.Client(
+                        api_key=settings.GEMINI_API_KEY,
+                        http_options=types.HttpOptions(
+                            # hard cap for the sync helpers, which bypass
+                            # the gateway's deadlines
+                            timeout=int(settings.LLM_DEADLINE_REPORT * 1000),
+                            client_args={"limits": limits},
+                            async_client_args={"limits": limits},
+                        ),
+                    )
+        return self._client
+
+    async def generate(self, model, contents, config):
+        response = await self.client.aio.models.generate_content(
+            model=model, contents=contents, config=config,
+        )
+        return LLMResponse(response.text or "", _gemini_usage(response))
+
+    async def stream(self, model, contents, config):
+        last = None
+        async for chunk in await self.client.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config,
+        ):
+            if last is not None:
+                yield LLMResponse(last.text or "")
+            last = chunk
+        if last is not None:
+            # usage_metadata on the final chunk covers the whole stream
+            yield LLMResponse(last.text or "", _gemini_usage(last))
+
+    def generate_sync(self, model, contents, config):
+        response = self.client.models.generate_content(
+            model=model, contents=contents, config=config,
+        )
+        return LLMResponse(response.text or "", _gemini_usage(response))
+
+    async def warm_up(self):
+        # a model metadata lookup: no tokens, but it opens (and pools) the
+        # TLS connection the first live update would otherwise wait for
+        await self.client.aio.models.get(model=settings.GEMINI_MODEL)
+
+
+class MockBackend(LLMBackend):
+    """
+    In-process stand-in (see app/llm/mock.py); no network involved.
+    """
+    name = "mock"
+
+    def __init__(self, responder):
+        self.responder = responder
+
+    async def generate(self, model, contents, config):
+        delay = self.responder.plan()
+        await asyncio.sleep(delay)
+        return self._response(contents, config)
+
+    async def stream(self, model, contents, config):
+        delay = self.responder.plan()
+        response = self._response(contents, config)
+        parts = self.responder.chunks(response.text)
+        for i, part in enumerate(parts):
+            await asyncio.sleep(delay / len(parts))
+            yield LLMResponse(part, response.usage if i == len(parts) - 1 else {})
+
+    def generate_sync(self, model, contents, config):
+        time.sleep(self.responder.plan())
+        return self._response(contents, config)
+
+    def _response(self, contents, config) -> LLMResponse:
+        text = self.responder.respond(contents, config)
+        # rough token estimate so usage accounting has something to add up
+        usage = {"prompt": len(contents) // 4, "cached": 0, "output": len(text) // 4}
+        return LLMResponse(text, usage)
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Minimal JSON protocol, spoken by app/llm/mock_server.py:
+
+        POST {url}/v1/generate  {"model", "contents", "config", "stream"}
+        -> {"text", "usage"}, or one such object per line when streaming
+    """
+    name = "http"
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+        )
+        timeout = httpx.Timeout(settings.LLM_DEADLINE_REPORT, connect=5.0)
+        self._async = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._sync = httpx.Client(limits=limits, timeout=timeout)
+
+    def _body(self, model, contents, config, stream: bool) -> Dict[str, Any]:
+        return {"model": model, "contents": contents, "config": config, "stream": stream}
+
+    async def generate(self, model, contents, config):
+        r = await self._async.post(f"{self.url}/v1/generate", json=self._body(model, contents, config, False))
+        r.raise_for_status()
+        data = r.json()
+        return LLMResponse(data["text"], data.get("usage", {}))
+
+    async def stream(self, model, contents, config):
+        async with self._async.stream(
+            "POST", f"{self.url}/v1/generate", json=self._body(model, contents, config, True),
+        ) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if line:
+                    data = json.loads(line)
+                    yield LLMResponse(data["text"], data.get("usage", {}))
+
+    def generate_sync(self, model, contents, config):
+        r = self._sync.post(f"{self.url}/v1/generate", json=self._body(model, contents, config, False))
+        r.raise_for_status()
+        data = r.json()
+        return LLMResponse(data["text"], data.get("usage", {}))
+
+    async def warm_up(self):
+        # any response will do; this only opens a pooled connection
+        await self._async.get(self.url)
+
+
+def create_mock_responder():
+    from app.llm.mock import LatencyModel, MockResponder, Recordings
+
+    return MockResponder(
+        LatencyModel(settings.LLM_MOCK_LATENCY),
+        error_rate=settings.LLM_MOCK_ERROR_RATE,
+        recordings=Recordings(Path(settings.LLM_MOCK_RECORDINGS) if settings.LLM_MOCK_RECORDINGS else None),
+    )
+
+
+def create_backend(name: str) -> LLMBackend:
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "mock":
+        return MockBackend(create_mock_responder())
+    if name == "http":
+        return HTTPBackend(settings.LLM_HTTP_URL)
+    raise ValueError(f"unknown LLM backend: {name}")
+
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> LLMBackend:
+    """
+    The process-wide backend selected by LLM_BACKEND.
+    """
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(settings.LLM_BACKEND)
+                print(f"[LLM] Backend: {_backend.name}")
+    return _backend
+
+
+def set_backend(backend: LLMBackend) -> None:
+    """
+    Swap the backend (benchmarks, scripts).
+    """
+    global _backend
+    _backend = backend
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+
+def canonical_json(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM results.
+
+    Keys are sha256(backend, model, prompt version, canonical JSON of the
+    inputs), so identical requests hit regardless of dict ordering and
+    answers from the mock or http stand-ins never stand in for the real
+    provider's. A bounded in-memory LRU sits in front of a directory of
+    JSON files that survives restarts; disk hits are promoted back into
+    memory.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_entries: int,
+        max_bytes: int,
+        disk_dir: Optional[Path],
+        disk_max_bytes: int,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_pid: Optional[int] = None
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(model: str, prompt_version: str, inputs: Any) -> str:
+        payload = canonical_json([settings.LLM_BACKEND, model, prompt_version, inputs])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            self._lru.move_to_end(key)
+            self.hits_memory += 1
+            return entry[0]
+
+    def _got_disk(self, key: str, raw: Optional[str]) -> Optional[Any]:
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits_disk += 1
+            self._remember(key, raw)
+        return json.loads(raw)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Blocking lookup, for the sync callers (executor threads, scripts).
+        """
+        if not self.enabled:
+            return None
+        raw = self._get_memory(key)
+        if raw is not None:
+            return json.loads(raw)
+        return self._got_disk(key, self._read_disk(key))
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        get() for the event loop: a disk lookup runs in a thread.
+        """
+        if not self.enabled:
+            return None
+        raw = self._get_memory(key)
+        if raw is not None:
+            return json.loads(raw)
+        if self.disk_dir is None:
+            return self._got_disk(key, None)
+        return self._got_disk(key, await asyncio.to_thread(self._read_disk, key))
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Stores in memory now; the disk write is queued on the writer
+        thread, so this never blocks.
+        """
+        if not self.enabled:
+            return
+
+        raw = canonical_json(value)
+        with self._lock:
+            self._remember(key, raw)
+        if self.disk_dir is not None:
+            self._writer_pool().submit(self._write_disk, key, raw)
+
+    def _writer_pool(self) -> ThreadPoolExecutor:
+        # threads don't survive a fork
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+            self._writer_pid = os.getpid()
+        return self._writer
+
+    def _remember(self, key: str, raw: str) -> None:
+        size = len(raw.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        self._lru[key] = (raw, size)
+        self._bytes += size
+
+        while len(self._lru) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._lru.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, raw: str) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(raw, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[LLM CACHE] Disk write failed: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()
+            else:
+                self._disk_bytes += len(raw.encode("utf-8"))
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._prune_disk()
+
+    def scan_disk(self) -> None:
+        """
+        Size the disk tier (and prune it if over its limit); blocking,
+        run at startup.
+        """
+        if self.disk_dir is None:
+            return
+        total = self._scan_disk()
+        with self._lock:
+            self._disk_bytes = total
+        if total > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _files(self):
+        return list(self.disk_dir.glob("*/*.json"))
+
+    def _scan_disk(self) -> int:
+        return sum(p.stat().st_size for p in self._files())
+
+    def _prune_disk(self) -> None:
+        """
+        Delete least recently written files until the tier is at 90% of
+        its limit.
+        """
+        files = []
+        for p in self._files():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+            }
+
+
+def cacheable(model: str) -> bool:
+    """
+    Only the primary model's answers are cached; fallback-model answers
+    are retried on the next call.
+    """
+    return model == settings.GEMINI_MODEL
+
+
+response_cache = ResponseCache(
+    enabled=settings.LLM_CACHE,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+    # stand-in backends keep their answers in memory only
+    disk_dir=(
+        Path(settings.LLM_CACHE_DIR)
+        if settings.LLM_CACHE_DIR and settings.LLM_BACKEND == "gemini"
+        else None
+    ),
+    disk_max_bytes=settings.LLM_CACHE_DISK_MAX_MB * 1024 * 1024,
+)
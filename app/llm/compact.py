@@ -0,0 +1,130 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Short keys used on the wire in both directions
+SECTION_KEYS = {
+    "patient": "p",
+    "symptoms": "s",
+    "medications": "m",
+    "diagnosis": "dx",
+    "advice": "adv",
+    "investigations": "inv",
+    "tests": "t",
+}
+FIELD_KEYS = {
+    "name": "n",
+    "duration": "d",
+    "dosage": "ds",
+    "value": "v",
+    "age": "a",
+    "gender": "g",
+}
+
+_SECTIONS = {v: k for k, v in SECTION_KEYS.items()}
+_FIELDS = {v: k for k, v in FIELD_KEYS.items()}
+
+
+def section_name(key: str) -> Optional[str]:
+    return _SECTIONS.get(key)
+
+
+def _name(item: Any) -> str:
+    if isinstance(item, dict):
+        item = item.get("name") or item.get("value") or ""
+    return str(item).strip().lower()
+
+
+def _mentioned(name: str, text: str) -> bool:
+    return bool(name) and re.search(rf"(?<!\w){re.escape(name)}(?!\w)", text) is not None
+
+
+def _shorten(item: Any) -> Any:
+    if not isinstance(item, dict):
+        return item
+    return {
+        FIELD_KEYS.get(k, k): v
+        for k, v in item.items()
+        if v not in (None, "")
+    }
+
+
+def _expand(item: Any) -> Any:
+    if not isinstance(item, dict):
+        return item
+    return {_FIELDS.get(k, k): v for k, v in item.items()}
+
+
+def encode_state(state: Dict[str, Any], new_texts: List[str], window: int) -> Dict[str, Any]:
+    """
+    Compact view of the state for one incremental update.
+
+    Per section only the last `window` entries plus any entry whose name
+    occurs in the new utterances are sent; empty sections are left out.
+    The size therefore stays flat as the consultation grows.
+    """
+    text = " ".join(new_texts).lower()
+    out: Dict[str, Any] = {}
+
+    patient = {
+        FIELD_KEYS[k]: v
+        for k, v in (state.get("patient") or {}).items()
+        if k in FIELD_KEYS and v is not None
+    }
+    if patient:
+        out["p"] = patient
+
+    for section, key in SECTION_KEYS.items():
+        if section == "patient":
+            continue
+        items = state.get(section) or []
+        start = max(0, len(items) - window)
+        picked = [
+            _shorten(item)
+            for i, item in enumerate(items)
+            if i >= start or _mentioned(_name(item), text)
+        ]
+        if picked:
+            out[key] = picked
+
+    return out
+
+
+def to_patch(update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Expand a compact model update into a patch for apply_state_patch.
+
+    Sections carry {"add": [...], "update": [...]}. A bare list (the
+    older changes-only form) is split by whether entries have an "id".
+    """
+    patch: Dict[str, Any] = {}
+
+    for key, value in update.items():
+        section = _SECTIONS.get(key)
+        if section is None:
+            continue
+
+        if section == "patient":
+            if isinstance(value, dict):
+                patch["patient"] = _expand(value)
+            continue
+
+        if isinstance(value, list):
+            value = {
+                "add": [e for e in value if not (isinstance(e, dict) and e.get("id"))],
+                "update": [e for e in value if isinstance(e, dict) and e.get("id")],
+            }
+        if not isinstance(value, dict):
+            continue
+
+        patch[section] = {
+            op: [_expand(e) for e in value[op]]
+            for op in ("add", "update")
+            if isinstance(value.get(op), list)
+        }
+
+    return patch
+
+
+def dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
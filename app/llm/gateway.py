@@ -0,0 +1,377 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.llm.backends import LLMResponse, get_backend
+from app.llm.policy import CallPolicy
+
+# Lower value = served first when the global limit is saturated
+LANE_LIVE = "live"                # incremental updates during a consultation
+LANE_REPORT = "report"            # final / regenerated clinical notes
+LANE_SPECULATIVE = "speculative"  # reports pre-generated before stop
+
+LANE_PRIORITY = {LANE_LIVE: 0, LANE_REPORT: 1, LANE_SPECULATIVE: 2}
+
+
+def usage_of(response: Optional[LLMResponse]) -> Dict[str, int]:
+    """
+    Token counts reported for one call (zeros if absent).
+    """
+    usage = {"prompt": 0, "cached": 0, "output": 0}
+    if response is not None:
+        usage.update(response.usage)
+    return usage
+
+
+class PriorityLimiter:
+    """
+    Global concurrency limit shared by all sessions, with per-lane caps.
+
+    Free slots go to the highest-priority waiter whose lane is under its
+    cap; a lane cap below the global limit keeps headroom for the others
+    (a burst of final reports can never take every slot from live
+    sessions).
+    """
+
+    def __init__(self, limit: int, lane_limits: Dict[str, int]):
+        self.limit = limit
+        self.lane_limits = lane_limits
+        self._in_flight = 0
+        self._lane_in_flight: Dict[str, int] = {}
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def _can_run(self, lane: str) -> bool:
+        return (
+            self._in_flight < self.limit
+            and self._lane_in_flight.get(lane, 0) < self.lane_limits.get(lane, self.limit)
+        )
+
+    def _start(self, lane: str) -> None:
+        self._in_flight += 1
+        self._lane_in_flight[lane] = self._lane_in_flight.get(lane, 0) + 1
+
+    async def acquire(self, lane: str) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (LANE_PRIORITY.get(lane, 99), next(self._seq), lane, fut))
+        self._wake()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot was handed over just before cancellation
+                self.release(lane)
+            raise
+
+    def try_acquire(self, lane: str) -> bool:
+        """
+        Take a slot only if one is free right now and nobody is waiting.
+        """
+        if any(not f.done() for *_, f in self._waiters) or not self._can_run(lane):
+            return False
+        self._start(lane)
+        return True
+
+    def release(self, lane: str) -> None:
+        self._in_flight -= 1
+        self._lane_in_flight[lane] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        skipped = []
+        while self._waiters and self._in_flight < self.limit:
+            item = heapq.heappop(self._waiters)
+            _, _, lane, fut = item
+            if fut.done():
+                continue
+            if not self._can_run(lane):
+                skipped.append(item)
+                continue
+            self._start(lane)
+            fut.set_result(None)
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "lanes": dict(self._lane_in_flight),
+            "waiting": sum(1 for *_, f in self._waiters if not f.done()),
+        }
+
+
+class TokenBucket:
+    """
+    Requests-per-second cap across all sessions; rate <= 0 disables it.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self) -> None:
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMGateway:
+    """
+    Single async entry point for every LLM call made by the server.
+    The provider behind it is whatever get_backend() returns.
+    """
+
+    def __init__(self):
+        self.limiter = PriorityLimiter(
+            settings.LLM_MAX_CONCURRENCY,
+            {
+                LANE_REPORT: settings.LLM_REPORT_CONCURRENCY,
+                LANE_SPECULATIVE: settings.LLM_SPECULATIVE_CONCURRENCY,
+            },
+        )
+        self.bucket = TokenBucket(settings.LLM_RATE_PER_SEC, settings.LLM_MAX_CONCURRENCY)
+        self.calls = {lane: 0 for lane in LANE_PRIORITY}
+        self.tokens = {lane: {"prompt": 0, "cached": 0, "output": 0} for lane in LANE_PRIORITY}
+        self.policy = CallPolicy(
+            deadlines={
+                LANE_LIVE: settings.LLM_DEADLINE_LIVE,
+                LANE_REPORT: settings.LLM_DEADLINE_REPORT,
+                LANE_SPECULATIVE: settings.LLM_DEADLINE_REPORT,
+            },
+            hedge=settings.LLM_HEDGE,
+            hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+            hedge_min=settings.LLM_HEDGE_MIN_MS / 1000,
+            hedge_max_ratio=settings.LLM_HEDGE_MAX_RATIO,
+            breaker_failures=settings.LLM_BREAKER_FAILURES,
+            breaker_cooldown=settings.LLM_BREAKER_COOLDOWN,
+            fallback_model=settings.LLM_FALLBACK_MODEL,
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        lane: str = LANE_LIVE,
+        model: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> LLMResponse:
+        """
+        One call under the lane's deadline (queueing included), hedged
+        after its p95. Raises LLMUnavailable while the circuit is open
+        (and no fallback model is usable) and asyncio.TimeoutError past
+        the deadline.
+        """
+        model = self.policy.choose_model(model or settings.GEMINI_MODEL)
+        config = config or {"temperature": 0.0}
+        deadline = time.monotonic() + self.policy.deadline(lane)
+
+        async def attempt():
+            return await get_backend().generate(model, prompt, config)
+
+        await self._acquire(lane, deadline)
+        try:
+            self._count(lane)
+            started = time.monotonic()
+            response = await self._with_policy(
+                model, lane, self._hedged(lane, lane, attempt), deadline - started,
+            )
+            self.policy.succeeded(model, lane, time.monotonic() - started)
+        finally:
+            self.limiter.release(lane)
+
+        response.model = model
+        self._record(lane, response)
+        return response
+
+    async def stream(
+        self,
+        prompt: str,
+        lane: str = LANE_LIVE,
+        model: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Like generate(), but yields response chunks as they arrive. The
+        slot is held until the stream is exhausted or closed; hedging
+        races the time to the first chunk, the deadline covers the whole
+        stream.
+        """
+        model = self.policy.choose_model(model or settings.GEMINI_MODEL)
+        config = config or {"temperature": 0.0}
+        key = f"{lane}:first_chunk"
+
+        async def attempt():
+            chunks = get_backend().stream(model, prompt, config)
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = LLMResponse("")
+            except BaseException:
+                await chunks.aclose()
+                raise
+            return chunks, first
+
+        async def discard(result):
+            await result[0].aclose()
+
+        chunks = None
+        last = None
+        deadline = time.monotonic() + self.policy.deadline(lane)
+        await self._acquire(lane, deadline)
+        try:
+            self._count(lane)
+            started = time.monotonic()
+
+            chunks, last = await self._with_policy(
+                model, lane, self._hedged(lane, key, attempt, discard), deadline - started,
+            )
+            self.policy.tracker(key).add(time.monotonic() - started)
+            last.model = model
+            yield last
+
+            while True:
+                try:
+                    chunk = await self._with_policy(
+                        model, lane, chunks.__anext__(), deadline - time.monotonic(),
+                    )
+                except StopAsyncIteration:
+                    break
+                chunk.model = model
+                last = chunk
+                yield chunk
+            self.policy.breaker(model).success()
+        finally:
+            self.limiter.release(lane)
+            if chunks is not None:
+                await chunks.aclose()
+            if last is not None:
+                # usage on the final chunk covers the whole stream
+                self._record(lane, last)
+
+    async def _acquire(self, lane: str, deadline: float) -> None:
+        """
+        Take a slot and a rate token before `deadline`. Running out of
+        time here is not the provider's fault: the breaker is untouched.
+        """
+        try:
+            await asyncio.wait_for(self.limiter.acquire(lane), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            self._queue_timeout(lane)
+            raise
+        try:
+            await asyncio.wait_for(self.bucket.take(), deadline - time.monotonic())
+        except BaseException as e:
+            self.limiter.release(lane)
+            if isinstance(e, asyncio.TimeoutError):
+                self._queue_timeout(lane)
+            raise
+
+    def _queue_timeout(self, lane: str) -> None:
+        self.policy.counters["queue_timeouts"] += 1
+        print(f"[LLM] {lane} call ran out of time waiting for a slot")
+
+    def _count(self, lane: str) -> None:
+        self.calls[lane] = self.calls.get(lane, 0) + 1
+        self.policy.counters["calls"] += 1
+
+    async def _with_policy(self, model: str, lane: str, awaitable, timeout: Optional[float] = None):
+        """
+        Await under the deadline; provider errors and timeouts count
+        against the model's circuit breaker.
+        """
+        try:
+            if timeout is None:
+                timeout = self.policy.deadline(lane)
+            return await asyncio.wait_for(awaitable, timeout)
+        except StopAsyncIteration:
+            raise
+        except asyncio.TimeoutError:
+            self.policy.failed(model, timed_out=True)
+            print(f"[LLM] {lane} call to {model} exceeded its deadline")
+            raise
+        except Exception:
+            self.policy.failed(model, timed_out=False)
+            raise
+
+    async def _hedged(self, lane: str, key: str, attempt, discard=None):
+        """
+        Run attempt(); if it hasn't returned after the p95 for `key`,
+        start a duplicate on a free slot and return whichever succeeds
+        first. The other is cancelled (or discarded, if it also finished).
+        """
+        primary = asyncio.create_task(attempt())
+        delay = None if lane == LANE_SPECULATIVE else self.policy.hedge_delay(key)
+        if delay is None:
+            return await primary
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done or not self.limiter.try_acquire(lane):
+            return await primary
+
+        self.policy.counters["hedged"] += 1
+
+        async def hedge_attempt():
+            try:
+                return await attempt()
+            finally:
+                self.limiter.release(lane)
+
+        hedge = asyncio.create_task(hedge_attempt())
+        pending = {primary, hedge}
+        error = None
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                    elif discard is not None:
+                        await discard(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            raise error
+        if winner is hedge:
+            self.policy.counters["hedge_wins"] += 1
+        return winner.result()
+
+    def _record(self, lane: str, response) -> None:
+        totals = self.tokens.setdefault(lane, {"prompt": 0, "cached": 0, "output": 0})
+        for k, v in usage_of(response).items():
+            totals[k] += v
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": get_backend().name,
+            "policy": self.policy.stats(),
+            "limiter": self.limiter.stats(),
+            "calls": dict(self.calls),
+            "tokens": {lane: dict(t) for lane, t in self.tokens.items()},
+        }
+
+
+gateway = LLMGateway()
@@ -1,13 +1,12 @@
 import json
 from typing import List, Dict, Any
 
-from google import genai
-
 from app.config import settings
+from app.llm.cache import cacheable, response_cache
+from app.llm.backends import get_backend
+from app.llm.gateway import LANE_REPORT, gateway
 from app.models import TranscriptLine
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
-
 
 def _format_transcript(transcript: List[TranscriptLine]) -> str:
     lines = []
@@ -81,11 +80,7 @@ JSON FORMAT:
 """
 
     try:
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=prompt,
-            config={"temperature": 0.0},
-        )
+        response = get_backend().generate_sync(settings.GEMINI_MODEL, prompt, {"temperature": 0.0})
     except Exception as e:
         return {
             "model": settings.GEMINI_MODEL,
@@ -123,15 +118,27 @@ JSON FORMAT:
         "data": parsed,
     }
 
-def generate_report_from_state(
-    structured_state: Dict[str, Any],
-) -> Dict[str, Any]:
+REPORT_PROMPT_VERSION = "report_v2"
+
+
+def report_input(structured_state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Generate final clinical note from structured state only.
-    No parsing. No extraction. Rendering only.
+    The part of the state a report is rendered from: the clinical
+    sections, without the transcript utterances.
     """
+    return {k: v for k, v in structured_state.items() if k != "utterances"}
 
-    prompt = f"""
+
+def report_cache_key(structured_state: Dict[str, Any]) -> str:
+    return response_cache.key(
+        settings.GEMINI_MODEL,
+        REPORT_PROMPT_VERSION,
+        report_input(structured_state),
+    )
+
+
+def _report_prompt(structured_state: Dict[str, Any]) -> str:
+    return f"""
 You are generating a draft clinical note from structured medical data.
 
 Rules:
@@ -145,7 +152,7 @@ Rules:
 - No markdown. No explanations.
 
 STRUCTURED STATE:
-{json.dumps(structured_state, ensure_ascii=False)}
+{json.dumps(report_input(structured_state), ensure_ascii=False)}
 
 Return JSON in the following format:
 {{
@@ -153,21 +160,19 @@ Return JSON in the following format:
 }}
 """
 
-    try:
-        response = client.models.generate_content(
-            model=settings.GEMINI_MODEL,
-            contents=prompt,
-            config={"temperature": 0.0},
-        )
-    except Exception as e:
-        return {
-            "model": settings.GEMINI_MODEL,
-            "error": "llm_call_failed",
-            "details": str(e),
-            "prompt_version": "report_v1",
-        }
 
+def _report_call_failed(e: Exception) -> Dict[str, Any]:
+    return {
+        "model": settings.GEMINI_MODEL,
+        "error": "llm_call_failed",
+        "details": str(e),
+        "prompt_version": REPORT_PROMPT_VERSION,
+    }
+
+
+def _parse_report(response) -> Dict[str, Any]:
     raw_text = (response.text or "").strip()
+    model = response.model or settings.GEMINI_MODEL
 
     # Defensive markdown stripping
     if raw_text.startswith("```"):
@@ -179,19 +184,73 @@ Return JSON in the following format:
         parsed = json.loads(raw_text)
     except json.JSONDecodeError:
         return {
-            "model": settings.GEMINI_MODEL,
+            "model": model,
             "error": "invalid_json",
             "raw_text": raw_text,
         }
 
     if not isinstance(parsed, dict) or "clinical_report" not in parsed:
         return {
-            "model": settings.GEMINI_MODEL,
+            "model": model,
             "error": "invalid_schema",
             "raw_text": raw_text,
         }
 
     return {
-        "model": settings.GEMINI_MODEL,
+        "model": model,
         "data": parsed,
     }
+
+
+def generate_report_from_state(
+    structured_state: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Generate final clinical note from structured state only.
+    No parsing. No extraction. Rendering only.
+    """
+    key = report_cache_key(structured_state)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = get_backend().generate_sync(
+            settings.GEMINI_MODEL, _report_prompt(structured_state), {"temperature": 0.0},
+        )
+    except Exception as e:
+        return _report_call_failed(e)
+
+    result = _parse_report(response)
+    if "data" in result and cacheable(result["model"]):
+        response_cache.put(key, result)
+    return result
+
+
+async def generate_report_from_state_async(
+    structured_state: Dict[str, Any],
+    lane: str = LANE_REPORT,
+) -> Dict[str, Any]:
+    """
+    Async generate_report_from_state, queued on the given gateway lane
+    (the report lane unless speculating).
+    """
+    key = report_cache_key(structured_state)
+    cached = await response_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = await gateway.generate(
+            _report_prompt(structured_state),
+            lane=lane,
+        )
+    except Exception as e:
+        return _report_call_failed(e)
+
+    result = _parse_report(response)
+    if "data" in result and cacheable(result["model"]):
+        # only successful results from the primary model; errors and
+        # fallback-model notes are retried on the next call
+        response_cache.put(key, result)
+    return result
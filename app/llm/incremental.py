@@ -1,22 +1,64 @@
 import json
-from typing import Dict, Any, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from google import genai
 from app.config import settings
+from app.llm import compact
+from app.llm.cache import cacheable, response_cache
+from app.llm.backends import get_backend
+from app.llm.gateway import LANE_LIVE, gateway, usage_of
+from app.llm.streaming import JSONSectionParser
 from app.pipeline.schema import normalize_structured_state
 from app.pipeline.schema import merge_utterances_with_speakers
+from app.pipeline.schema import assign_entity_ids
+from app.pipeline.schema import REQUIRED_KEYS
+from app.pipeline.schema import apply_state_patch
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+# Part of the response cache key; bump when a prompt's wording changes
+PROMPT_VERSION = "incremental_v1"
+COMPACT_PROMPT_VERSION = "incremental_patch_v3"
 
+NO_USAGE = {"prompt": 0, "cached": 0, "output": 0}
 
-def update_structured_state(
+# Static part of the compact prompt. Sent as the system instruction so the
+# per-update request carries only the state window and the new text.
+COMPACT_INSTRUCTIONS = """
+You update a structured medical record from new consultation utterances
+(Hindi/English). Use ONLY the new utterances. Do not guess, infer or
+invent; diagnosis and advice only if explicitly stated. Write values in
+English.
+
+Input JSON: {"state": <known entries>, "new": [<utterance text>]}
+"state" shows only recent/relevant entries; others may exist. Some
+entries were auto-extracted by rules: do not repeat them, but correct
+one (by id) if the utterances contradict it.
+
+Keys:
+p   patient {n: name, a: age (number), g: gender} - only if the patient
+    explicitly states it; never overwrite without a new explicit statement
+s   symptoms [{n, d: duration}]
+m   medications [{n, ds: dosage}]
+dx  diagnosis [string]
+adv advice [string]
+inv investigations: measured values stated explicitly [{n, v}]
+    e.g. "BP 120 by 80" -> {"n": "blood pressure", "v": "120/80 mmHg"}
+t   tests advised by the doctor [string], normalized English names
+
+Return ONLY changes, as a patch with the same keys:
+- p: the changed patient fields
+- other sections: {"add": [new entries], "update": [{"id", changed fields}]}
+- "update" only for known entries, by their "id"; new entries have no "id"
+- omit unchanged sections, entries and fields; nothing can be removed
+- return {} if nothing new
+Example: new ["मुझे दो दिन से बुखार है"] -> {"s":{"add":[{"n":"fever","d":"two days"}]}}
+Example: known {"id":"s1","n":"cough"}, new ["खांसी एक हफ्ते से है"]
+  -> {"s":{"update":[{"id":"s1","d":"one week"}]}}
+""".strip()
+
+
+def _build_prompt(
     current_state: Dict[str, Any],
     new_utterances: List[Dict[str, Any]],
-) -> Dict[str, Any]:
-    """
-    Incrementally update structured clinical state using new utterances.
-    Returns updated structured state.
-    """
+) -> str:
     llm_state = {
         "patient": current_state.get("patient",{}),
         "symptoms": current_state.get("symptoms", []),
@@ -33,7 +75,7 @@ def update_structured_state(
         if "text" in u
     ]
 
-    prompt = f"""
+    return f"""
 You are updating an existing structured medical record.
 
 Patient Demographics (STRICT):
@@ -134,13 +176,64 @@ Include a field ONLY if it should be added or updated.
 Do NOT remove existing data.
 """
 
-    response = client.models.generate_content(
-        model=settings.GEMINI_MODEL,
-        contents=prompt,
-        config={"temperature": 0.0},
-    )
 
-    raw_text = (response.text or "").strip()
+def _build_compact_prompt(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> str:
+    texts = [u["text"] for u in new_utterances if "text" in u]
+    return compact.dumps({
+        "state": compact.encode_state(current_state, texts, settings.LLM_PROMPT_WINDOW),
+        "new": texts,
+    })
+
+
+def _build_request(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    (contents, config) for one update, in compact or full-state form.
+    """
+    if settings.LLM_COMPACT_PROMPT:
+        return _build_compact_prompt(current_state, new_utterances), {
+            "temperature": 0.0,
+            "system_instruction": COMPACT_INSTRUCTIONS,
+            "response_mime_type": "application/json",
+        }
+    return _build_prompt(current_state, new_utterances), {"temperature": 0.0}
+
+
+def _cache_key(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> str:
+    if settings.LLM_COMPACT_PROMPT:
+        version = f"{COMPACT_PROMPT_VERSION}/w{settings.LLM_PROMPT_WINDOW}"
+    else:
+        version = PROMPT_VERSION
+    return response_cache.key(settings.GEMINI_MODEL, version, {
+        "state": {k: v for k, v in current_state.items() if k != "utterances"},
+        "new": [u["text"] for u in new_utterances if "text" in u],
+    })
+
+
+def _parse_response(
+    current_state: Dict[str, Any],
+    response,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    return _parse_text(current_state, response.text or "")
+
+
+def _parse_text(
+    current_state: Dict[str, Any],
+    raw_text: str,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    (updated state, patch). With compact prompts the response is a patch,
+    applied with apply_state_patch; the full-state prompt has none.
+    """
+    raw_text = raw_text.strip()
 
     if not raw_text:
         raise ValueError("empty_llm_response")
@@ -152,6 +245,11 @@ Do NOT remove existing data.
 
     parsed = json.loads(raw_text)
 
+    if settings.LLM_COMPACT_PROMPT:
+        patch = compact.to_patch(parsed if isinstance(parsed, dict) else {})
+        updated, _ = apply_state_patch(current_state, patch)
+        return updated, patch
+
     normalized = normalize_structured_state(
         previous=current_state,
         candidate=parsed,
@@ -162,4 +260,124 @@ Do NOT remove existing data.
         updated_utterances=normalized["utterances"],
     )
 
-    return normalized
+    return assign_entity_ids(normalized), None
+
+
+def update_structured_state(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Incrementally update structured clinical state using new utterances.
+    Returns updated structured state.
+    """
+    key = _cache_key(current_state, new_utterances)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _parse_text(current_state, cached)[0]
+
+    contents, config = _build_request(current_state, new_utterances)
+    response = get_backend().generate_sync(settings.GEMINI_MODEL, contents, config)
+    response.model = response.model or settings.GEMINI_MODEL
+    updated, _ = _parse_response(current_state, response)
+    if cacheable(response.model):
+        response_cache.put(key, response.text)
+    return updated
+
+
+async def update_structured_state_async(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], Dict[str, int]]:
+    """
+    Same as update_structured_state, but awaited on the event loop via the
+    LLM gateway (live lane) instead of occupying an executor thread.
+    Returns the updated state, the patch (None for full-state prompts)
+    and the call's token usage.
+    """
+    key = _cache_key(current_state, new_utterances)
+    cached = await response_cache.aget(key)
+    if cached is not None:
+        return (*_parse_text(current_state, cached), dict(NO_USAGE))
+
+    contents, config = _build_request(current_state, new_utterances)
+    response = await gateway.generate(contents, lane=LANE_LIVE, config=config)
+    updated, patch = _parse_response(current_state, response)
+    if cacheable(response.model):
+        response_cache.put(key, response.text)
+    return updated, patch, usage_of(response)
+
+
+def _validate_section(
+    current_state: Dict[str, Any],
+    key: str,
+    value: Any,
+) -> Optional[Tuple[str, Any]]:
+    """
+    Run one streamed section through the same merge and normalization as
+    a full response. Returns (section, merged value), or None if the
+    section is unknown or invalid.
+    """
+    if settings.LLM_COMPACT_PROMPT:
+        section = compact.section_name(key)
+        if section is None or not isinstance(value, dict if section == "patient" else (dict, list)):
+            return None
+        updated, _ = apply_state_patch(current_state, compact.to_patch({key: value}))
+        return section, updated[section]
+
+    section = key
+    candidate = {key: value}
+
+    if section == "patient":
+        if not isinstance(candidate.get("patient"), dict):
+            return None
+    elif section not in REQUIRED_KEYS or section == "utterances":
+        return None
+    elif not isinstance(candidate.get(section), list):
+        return None
+
+    normalized = assign_entity_ids(
+        normalize_structured_state(previous=current_state, candidate=candidate)
+    )
+    return section, normalized[section]
+
+
+async def stream_structured_update(
+    current_state: Dict[str, Any],
+    new_utterances: List[Dict[str, Any]],
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming update_structured_state_async. Yields
+    {"type": "section", "section", "value"} as each top-level section of
+    the response closes, then {"type": "state", "state", "patch", "usage"}
+    with the complete, normalized state and the patch it came from.
+    """
+    key = _cache_key(current_state, new_utterances)
+    parser = JSONSectionParser()
+    usage = dict(NO_USAGE)
+
+    cached = await response_cache.aget(key)
+    if cached is not None:
+        # replay the stored response through the same section path
+        for section_key, value in parser.feed(cached):
+            validated = _validate_section(current_state, section_key, value)
+            if validated is not None:
+                yield {"type": "section", "section": validated[0], "value": validated[1]}
+    else:
+        contents, config = _build_request(current_state, new_utterances)
+        last = None
+        model = None
+        async for chunk in gateway.stream(contents, lane=LANE_LIVE, config=config):
+            last = chunk
+            model = chunk.model
+            for section_key, value in parser.feed(chunk.text or ""):
+                validated = _validate_section(current_state, section_key, value)
+                if validated is not None:
+                    yield {"type": "section", "section": validated[0], "value": validated[1]}
+        usage = usage_of(last)
+
+    updated, patch = _parse_text(current_state, parser.text)
+    if cached is None and cacheable(model):
+        response_cache.put(key, parser.text)
+
+    yield {"type": "state", "state": updated, "patch": patch, "usage": usage}
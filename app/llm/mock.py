@@ -0,0 +1,142 @@
+"""
+Offline stand-in for the LLM: schema-valid responses with a
+configurable latency distribution and error rate.
+
+Used in-process by the "mock" backend and over HTTP by
+app/llm/mock_server.py. Incremental updates are answered with a patch
+adding what the rule-based fast path finds in the new utterances;
+reports with a clinical note recorded from a past session when one is
+available, otherwise a note rendered from the given state.
+"""
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.llm import compact
+from app.pipeline.fastpath import extract
+
+
+class LatencyModel:
+    """
+    Parsed from a spec string, all values in milliseconds:
+    "fixed:800", "uniform:300,1500", "normal:800,200",
+    "lognormal:800,0.5" (median, sigma).
+    """
+
+    def __init__(self, spec: str, seed: Optional[int] = None):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a]
+        self._rnd = random.Random(seed)
+
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample_ms(self) -> float:
+        a = self.args
+        if self.kind == "fixed":
+            ms = a[0]
+        elif self.kind == "uniform":
+            ms = self._rnd.uniform(a[0], a[1])
+        elif self.kind == "normal":
+            ms = self._rnd.gauss(a[0], a[1])
+        else:
+            ms = self._rnd.lognormvariate(math.log(a[0]), a[1])
+        return max(0.0, ms)
+
+
+class MockError(Exception):
+    pass
+
+
+class Recordings:
+    """
+    Clinical notes from stored sessions (structured_output.json).
+    """
+
+    def __init__(self, root: Optional[Path]):
+        self.reports: List[str] = []
+        if root is None or not root.exists():
+            return
+        for path in root.glob("*/*/structured_output.json"):
+            try:
+                report = json.loads(path.read_text(encoding="utf-8")).get("data", {}).get("clinical_report")
+            except (OSError, ValueError, AttributeError):
+                continue
+            if report:
+                self.reports.append(report)
+
+
+class MockResponder:
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        recordings: Optional[Recordings] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.recordings = recordings or Recordings(None)
+        self._rnd = random.Random(seed)
+
+    def plan(self) -> float:
+        """
+        Latency for one call in seconds; raises MockError for the share
+        of calls that should fail.
+        """
+        if self._rnd.random() < self.error_rate:
+            raise MockError("injected mock failure")
+        return self.latency.sample_ms() / 1000
+
+    def respond(self, contents: str, config: Optional[Dict[str, Any]] = None) -> str:
+        if '"clinical_report"' in contents:
+            return json.dumps({"clinical_report": self._report(contents)}, ensure_ascii=False)
+
+        if (config or {}).get("system_instruction"):
+            try:
+                texts = json.loads(contents).get("new", [])
+            except ValueError:
+                texts = []
+            return compact.dumps(self._update(texts))
+
+        # full-state prompt: lists replace the current ones, so the only
+        # safe canned answer is "no change"
+        return "{}"
+
+    def _update(self, texts: List[str]) -> Dict[str, Any]:
+        update: Dict[str, Any] = {}
+        for text in texts:
+            for section, entries in extract(text).items():
+                key = compact.SECTION_KEYS[section]
+                update.setdefault(key, {"add": []})["add"].extend(compact._shorten(e) for e in entries)
+        return update
+
+    def _report(self, contents: str) -> str:
+        if self.recordings.reports:
+            return self._rnd.choice(self.recordings.reports)
+
+        start = contents.find("STRUCTURED STATE:")
+        state: Dict[str, Any] = {}
+        if start >= 0:
+            try:
+                state, _ = json.JSONDecoder().raw_decode(contents[start + len("STRUCTURED STATE:"):].lstrip())
+            except ValueError:
+                pass
+
+        symptoms = ", ".join(
+            s.get("name", "") + (f" for {s['duration']}" if s.get("duration") else "")
+            for s in state.get("symptoms", [])
+            if isinstance(s, dict)
+        )
+        return (
+            f"Patient presents with {symptoms or 'no recorded complaints'}. "
+            "This is a mock draft for load testing."
+        )
+
+    def chunks(self, text: str, n: int = 4) -> List[str]:
+        size = max(1, math.ceil(len(text) / n))
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
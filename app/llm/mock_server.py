@@ -0,0 +1,97 @@
+"""
+Local stand-in for the LLM provider, for load tests and offline
+development. Speaks the protocol of the "http" backend:
+
+    python -m app.llm.mock_server --port 8090 --latency lognormal:800,0.4 --error-rate 0.02
+    LLM_BACKEND=http LLM_HTTP_URL=http://127.0.0.1:8090 python main.py
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.llm.mock import LatencyModel, MockError, MockResponder, Recordings
+
+
+class GenerateRequest(BaseModel):
+    model: str = ""
+    contents: str
+    config: dict = {}
+    stream: bool = False
+
+
+def create_app(responder: MockResponder) -> FastAPI:
+    app = FastAPI()
+    counters = {"requests": 0, "errors": 0, "started": time.time()}
+
+    @app.post("/v1/generate")
+    async def generate(req: GenerateRequest):
+        counters["requests"] += 1
+        try:
+            delay = responder.plan()
+        except MockError as e:
+            counters["errors"] += 1
+            raise HTTPException(status_code=503, detail=str(e))
+
+        text = responder.respond(req.contents, req.config)
+        usage = {"prompt": len(req.contents) // 4, "cached": 0, "output": len(text) // 4}
+
+        if not req.stream:
+            await asyncio.sleep(delay)
+            return {"text": text, "usage": usage}
+
+        parts = responder.chunks(text)
+
+        async def body():
+            # the sampled latency is spread over the chunks, like a
+            # provider emitting tokens
+            for i, part in enumerate(parts):
+                await asyncio.sleep(delay / len(parts))
+                chunk = {"text": part, "usage": usage if i == len(parts) - 1 else {}}
+                yield json.dumps(chunk, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            **counters,
+            "latency": responder.latency.spec,
+            "error_rate": responder.error_rate,
+            "recorded_reports": len(responder.recordings.reports),
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:800,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", default="data/sessions")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    responder = MockResponder(
+        LatencyModel(args.latency, seed=args.seed),
+        error_rate=args.error_rate,
+        recordings=Recordings(Path(args.recordings) if args.recordings else None),
+        seed=args.seed,
+    )
+    print(
+        f"[MOCK LLM] {args.latency}, error rate {args.error_rate}, "
+        f"{len(responder.recordings.reports)} recorded reports"
+    )
+    uvicorn.run(create_app(responder), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class LLMUnavailable(Exception):
+    """
+    Raised without calling the provider while its circuit is open and no
+    fallback model is usable. Live sessions keep their fast-path state.
+    """
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies (seconds).
+    """
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        None until there are enough samples to trust the estimate.
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open,
+    calls are refused; after `cooldown` seconds one probe call is let
+    through (half-open), and its outcome closes or re-opens the circuit.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing and time.monotonic() - self._probe_at < self.cooldown:
+            # a probe is out; one whose outcome was never reported
+            # (cancelled) stops blocking after another cooldown
+            return False
+        self._probing = True
+        self._probe_at = time.monotonic()
+        return True
+
+    def success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "opened": self.opened}
+
+
+class CallPolicy:
+    """
+    Deadlines, hedging thresholds and circuit breakers for the gateway.
+
+    Each lane has a deadline for a whole call, time spent waiting for a
+    gateway slot included. A call still without an
+    answer (or, when streaming, a first chunk) after the lane's recent
+    p95 gets one duplicate request; the first to answer wins. Hedges are
+    capped at `hedge_max_ratio` of calls so a slow provider is not hit
+    with twice the load. Every model has its own breaker; while the
+    primary's is open, calls go to `fallback_model` if one is set.
+    """
+
+    def __init__(
+        self,
+        deadlines: Dict[str, float],
+        hedge: bool,
+        hedge_quantile: float,
+        hedge_min: float,
+        hedge_max_ratio: float,
+        breaker_failures: int,
+        breaker_cooldown: float,
+        fallback_model: Optional[str],
+    ):
+        self.deadlines = deadlines
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min = hedge_min
+        self.hedge_max_ratio = hedge_max_ratio
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.fallback_model = fallback_model or None
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.counters = {
+            "calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0,
+            "queue_timeouts": 0, "fallbacks": 0, "refused": 0,
+        }
+
+    def deadline(self, lane: str) -> float:
+        return self.deadlines.get(lane, max(self.deadlines.values()))
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown)
+        return self.breakers[model]
+
+    def choose_model(self, model: str) -> str:
+        """
+        The model to call: `model` if its circuit allows it, else the
+        fallback. Raises LLMUnavailable if neither can be called.
+        """
+        if self.breaker(model).allow():
+            return model
+        if self.fallback_model and self.fallback_model != model and self.breaker(self.fallback_model).allow():
+            self.counters["fallbacks"] += 1
+            return self.fallback_model
+        self.counters["refused"] += 1
+        raise LLMUnavailable(f"circuit open for {model}")
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call tracked under `key`, or
+        None if it should not be hedged.
+        """
+        if not self.hedge:
+            return None
+        if self.counters["hedged"] >= self.hedge_max_ratio * self.counters["calls"]:
+            return None
+        threshold = self.tracker(key).quantile(self.hedge_quantile)
+        if threshold is None:
+            return None
+        return max(self.hedge_min, threshold)
+
+    def tracker(self, key: str) -> LatencyTracker:
+        if key not in self.latency:
+            self.latency[key] = LatencyTracker()
+        return self.latency[key]
+
+    def succeeded(self, model: str, key: str, seconds: float) -> None:
+        self.breaker(model).success()
+        self.tracker(key).add(seconds)
+
+    def failed(self, model: str, timed_out: bool) -> None:
+        self.breaker(model).failure()
+        if timed_out:
+            self.counters["timeouts"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "deadlines": dict(self.deadlines),
+            "fallback_model": self.fallback_model,
+            "breakers": {m: b.stats() for m, b in self.breakers.items()},
+            "p95_ms": {
+                k: None if t.quantile(0.95) is None else round(t.quantile(0.95) * 1000)
+                for k, t in self.latency.items()
+            },
+        }
+
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from app.llm.gateway import LANE_SPECULATIVE
+from app.llm.gemini import generate_report_from_state_async, report_cache_key
+
+
+class ReportSpeculator:
+    """
+    Pre-generates a session's clinical report while it is still running.
+
+    submit() is called with the would-be final state after every accepted
+    update; a run for an older state is cancelled, and new runs stop once
+    `max_runs` have been started (a run cancelled after it reached the
+    provider is billed all the same, so it uses up the budget too).
+    close() is called at stop: the final flush's state only cancels a
+    stale run and never starts one, since the final report belongs on
+    the report lane. result() then returns the report of a run started
+    before stop for exactly the final state. Results also land in the
+    response cache, so a finished run is a cache hit either way.
+    """
+
+    def __init__(self, max_runs: int):
+        self.max_runs = max_runs
+        # runs started, counted against max_runs
+        self.started = 0
+        # runs that completed
+        self.runs = 0
+        self.cancelled = 0
+        self._closed = False
+        self._key: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, structured_state: Dict[str, Any]) -> None:
+        key = report_cache_key(structured_state)
+        if key == self._key:
+            return
+
+        # superseded by a newer state
+        self.cancel()
+        self._key = None
+        self._task = None
+        if self._closed or self.started >= self.max_runs:
+            return
+
+        self.started += 1
+        self._key = key
+        self._task = asyncio.create_task(
+            generate_report_from_state_async(structured_state, lane=LANE_SPECULATIVE)
+        )
+        self._task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        if not task.cancelled():
+            self.runs += 1
+
+    def close(self) -> None:
+        """
+        No new runs from here on (the session is stopping).
+        """
+        self._closed = True
+
+    async def result(self, structured_state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The speculative report for this state (waiting for it if it is
+        still running; it was started before close()), or None if there
+        is no usable run for it.
+        """
+        if self._task is None or report_cache_key(structured_state) != self._key:
+            return None
+
+        try:
+            result = await self._task
+        except asyncio.CancelledError:
+            return None
+
+        return result if "data" in result else None
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "runs": self.runs,
+            "max_runs": self.max_runs,
+            "cancelled": self.cancelled,
+        }
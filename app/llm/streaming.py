@@ -0,0 +1,86 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class JSONSectionParser:
+    """
+    Incremental parser for a streamed top-level JSON object.
+
+    feed() takes text as it arrives and returns every (key, value) member
+    of the root object whose value has been fully received, so a section
+    can be used before the rest of the object is generated. Anything
+    before the first "{" (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self._buf += text
+        out: List[Tuple[str, Any]] = []
+
+        while self._pos < len(self._buf) and not self.done:
+            i = self._pos
+            c = self._buf[i]
+            self._pos += 1
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start is not None:
+                        self._key = json.loads(self._buf[self._key_start:i + 1])
+                        self._key_start = None
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._value_start is None:
+                    self._key_start = i
+                continue
+
+            if c == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif c in "[{":
+                self._depth += 1
+            elif c in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(i, out)
+                    self.done = True
+            elif c == "," and self._depth == 1:
+                self._emit(i, out)
+
+        return out
+
+    def _emit(self, end: int, out: List[Tuple[str, Any]]) -> None:
+        if self._key is not None and self._value_start is not None:
+            raw = self._buf[self._value_start:end].strip()
+            try:
+                out.append((self._key, json.loads(raw)))
+            except json.JSONDecodeError:
+                pass
+        self._key = None
+        self._value_start = None
+
+    @property
+    def text(self) -> str:
+        return self._buf
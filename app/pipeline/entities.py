@@ -0,0 +1,234 @@
+"""
+Canonical identity of structured-state entries.
+
+Every entry of a list section gets a key: its name (or value) with
+Unicode and case folded, punctuation and Hindi spelling variants
+(nukta, chandrabindu) removed, then mapped through a per-section
+synonym table, so "Fever", "बुखार" and "bukhar" are the same symptom.
+
+EntityIndex keeps dict lookups by key and by id over one section's
+list, which makes merging a batch of entries linear instead of a scan
+per entry. It is used by normalize_structured_state, apply_state_patch,
+the edit APIs, the fast path and the vector-store documents.
+"""
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+# canonical name -> other spellings, per section (symptoms come from
+# the fast-path lexicon, see _synonyms)
+SYNONYMS: Dict[str, Dict[str, List[str]]] = {
+    "investigations": {
+        "blood pressure": ["bp", "b.p.", "बीपी", "बी पी", "ब्लड प्रेशर"],
+        "body temperature": ["temperature", "temp", "तापमान", "टेंपरेचर", "टेम्परेचर"],
+        "pulse": ["heart rate", "pulse rate", "पल्स", "नब्ज", "नाड़ी"],
+        "oxygen saturation": ["spo2", "sp o2", "oxygen", "saturation", "ऑक्सीजन", "ऑक्सीजन लेवल"],
+        "blood sugar": ["sugar", "glucose", "शुगर", "ब्लड शुगर"],
+        "weight": ["वजन", "वज़न"],
+    },
+    "tests": {
+        "complete blood count": ["cbc", "blood count", "सीबीसी"],
+        "x-ray": ["xray", "x ray", "एक्स रे", "एक्सरे"],
+        "ecg": ["ekg", "electrocardiogram", "ईसीजी"],
+        "liver function test": ["lft", "liver function tests"],
+        "kidney function test": ["kft", "rft", "renal function test"],
+        "urine routine": ["urine test", "urine r/m", "पेशाब की जांच"],
+    },
+    "diagnosis": {
+        "upper respiratory tract infection": ["urti"],
+        "urinary tract infection": ["uti"],
+        # not "age": that is also the word, and keys are case-folded
+        "acute gastroenteritis": ["gastroenteritis"],
+    },
+}
+
+# Hindi marks that only change the spelling, not the word
+_DROP = {"़": "", "ँ": "ं"}  # nukta; chandrabindu -> anusvara
+
+
+def normalize_text(text: Any) -> str:
+    """
+    NFKC + casefold, punctuation and symbols to spaces, whitespace
+    collapsed. Devanagari vowel signs are kept (they are not \\w).
+    """
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    text = "".join(
+        " " if unicodedata.category(c)[0] in "PSZ" else _DROP.get(c, c)
+        for c in unicodedata.normalize("NFD", text)
+    )
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+@lru_cache(maxsize=None)
+def _synonyms() -> Dict[str, Dict[str, str]]:
+    # normalized spelling -> canonical name, per section
+    from app.pipeline.fastpath import SYMPTOM_LEXICON
+
+    tables = dict(SYNONYMS, symptoms=SYMPTOM_LEXICON)
+    return {
+        section: {
+            normalize_text(form): name
+            for name, forms in table.items()
+            for form in [name, *forms]
+        }
+        for section, table in tables.items()
+    }
+
+
+def entry_text(entry: Any) -> str:
+    if isinstance(entry, dict):
+        for field in ("name", "value", "label"):
+            if entry.get(field):
+                return str(entry[field])
+        return ""
+    return "" if entry is None else str(entry)
+
+
+def canonical_name(section: str, text: Any) -> Optional[str]:
+    """
+    The canonical name for a known spelling, else None.
+    """
+    return _synonyms().get(section, {}).get(normalize_text(text))
+
+
+def entity_key(section: str, entry: Any) -> str:
+    text = normalize_text(entry_text(entry))
+    return normalize_text(_synonyms().get(section, {}).get(text, text))
+
+
+def distinct_names(section: str, names: Iterable[str]) -> List[str]:
+    """
+    Display names with synonyms canonicalized and duplicates dropped,
+    in first-seen order.
+    """
+    out: Dict[str, str] = {}
+    for name in names:
+        key = entity_key(section, name)
+        if key and key not in out:
+            out[key] = canonical_name(section, name) or name.strip()
+    return list(out.values())
+
+
+class EntityIndex:
+    """
+    One section's entries with O(1) lookup by id and by canonical key.
+
+    Removed positions are left empty until items() so the other
+    positions stay valid.
+    """
+
+    def __init__(self, section: str, items: Iterable[Any] = ()):
+        self.section = section
+        self._items: List[Any] = []
+        self._removed = 0
+        self._by_key: Dict[str, int] = {}
+        self._by_id: Dict[str, int] = {}
+        for item in items:
+            if self.find(item) is not None or self.key(item):
+                self.add(item, overwrite=False)
+            elif item is not None:
+                # nothing to identify it by; kept as is
+                self.append(item)
+
+    def __len__(self) -> int:
+        return len(self._items) - self._removed
+
+    def items(self) -> List[Any]:
+        if not self._removed:
+            return list(self._items)
+        return [v for v in self._items if v is not None]
+
+    def get(self, pos: int) -> Any:
+        return self._items[pos]
+
+    def key(self, entry: Any) -> str:
+        return entity_key(self.section, entry)
+
+    def find_id(self, entity_id: Any) -> Optional[int]:
+        return self._by_id.get(entity_id) if entity_id else None
+
+    def find_key(self, entry: Any) -> Optional[int]:
+        return self._by_key.get(self.key(entry))
+
+    def find(self, entry: Any) -> Optional[int]:
+        """
+        By id when the entry has a known one, else by canonical key.
+        """
+        pos = self.find_id(entry.get("id")) if isinstance(entry, dict) else None
+        return pos if pos is not None else self.find_key(entry)
+
+    def _index(self, pos: int, entry: Any) -> None:
+        key = self.key(entry)
+        if key:
+            self._by_key.setdefault(key, pos)
+        if isinstance(entry, dict) and entry.get("id"):
+            self._by_id.setdefault(entry["id"], pos)
+
+    def _unindex(self, pos: int, entry: Any) -> None:
+        key = self.key(entry)
+        if self._by_key.get(key) == pos:
+            del self._by_key[key]
+        if isinstance(entry, dict) and self._by_id.get(entry.get("id")) == pos:
+            del self._by_id[entry["id"]]
+
+    def append(self, entry: Any) -> int:
+        pos = len(self._items)
+        self._items.append(entry)
+        self._index(pos, entry)
+        return pos
+
+    def replace(self, pos: int, entry: Any) -> bool:
+        current = self._items[pos]
+        if entry == current:
+            return False
+        self._unindex(pos, current)
+        self._items[pos] = entry
+        self._index(pos, entry)
+        return True
+
+    def merge(self, pos: int, entry: Any, overwrite: bool = True) -> bool:
+        """
+        Merge a dict entry's non-empty fields into the one at pos. With
+        overwrite=False only missing fields are filled. The existing id
+        and spelling of the name are kept.
+        """
+        current = self._items[pos]
+        if not (isinstance(current, dict) and isinstance(entry, dict)):
+            return False
+        fields = {
+            k: v for k, v in entry.items()
+            if v not in (None, "") and k != "id" and (k != "name" or not current.get("name"))
+        }
+        if not overwrite:
+            fields = {k: v for k, v in fields.items() if current.get(k) in (None, "")}
+        return self.replace(pos, {**current, **fields})
+
+    def add(self, entry: Any, overwrite: bool = True) -> bool:
+        """
+        Append a new entity or merge into the existing one with the same
+        id or key. Entries without a name or value are ignored.
+        """
+        pos = self.find(entry)
+        if pos is not None:
+            return self.merge(pos, entry, overwrite)
+        if not self.key(entry):
+            return False
+        self.append(entry)
+        return True
+
+    def remove(self, entry: Any) -> bool:
+        pos = self.find(entry)
+        if pos is None:
+            return False
+        self._unindex(pos, self._items[pos])
+        self._items[pos] = None
+        self._removed += 1
+        return True
+
+
+def dedupe(section: str, items: Iterable[Any]) -> List[Any]:
+    """
+    Collapse entries that name the same entity; the first keeps its id
+    and spelling and gains fields only the later ones had.
+    """
+    return EntityIndex(section, items).items()
@@ -0,0 +1,347 @@
+"""
+Rule-based extraction that runs on every final utterance, before (and
+independently of) the LLM.
+
+Common symptoms are found with an Aho-Corasick automaton over a
+Hindi/English lexicon; durations and vitals with precompiled regexes
+after spelled-out Hindi numbers ("एक सौ बीस") are turned into digits.
+Only unambiguous patterns are covered; everything else is left to the
+LLM, which sees these entries (with their ids) and can correct them.
+"""
+import re
+import unicodedata
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.pipeline.entities import EntityIndex
+from app.pipeline.schema import assign_entity_ids
+
+# canonical English name -> surface forms (Devanagari, romanized, English)
+SYMPTOM_LEXICON: Dict[str, List[str]] = {
+    "fever": ["fever", "बुखार", "बुख़ार", "ज्वर", "bukhar", "bukhaar"],
+    "cough": ["cough", "खांसी", "खाँसी", "khansi", "khaansi"],
+    "cold": ["cold", "जुकाम", "ज़ुकाम", "सर्दी", "zukam", "jukam", "sardi"],
+    "headache": ["headache", "सिर दर्द", "सिरदर्द", "सर दर्द", "सिर में दर्द", "sir dard", "sar dard"],
+    "sore throat": ["sore throat", "गले में दर्द", "गला खराब", "गले में खराश", "gale me dard"],
+    "runny nose": ["runny nose", "नाक बहना", "नाक बह रही", "बहती नाक"],
+    "body ache": ["body ache", "body pain", "बदन दर्द", "शरीर में दर्द", "बदन में दर्द", "badan dard"],
+    "stomach pain": ["stomach pain", "abdominal pain", "पेट दर्द", "पेट में दर्द", "pet dard", "pet me dard"],
+    "chest pain": ["chest pain", "सीने में दर्द", "छाती में दर्द", "seene me dard"],
+    "back pain": ["back pain", "कमर दर्द", "पीठ दर्द", "कमर में दर्द", "kamar dard"],
+    "joint pain": ["joint pain", "जोड़ों में दर्द", "जोड़ों का दर्द", "jodon me dard"],
+    "vomiting": ["vomiting", "उल्टी", "उलटी", "ulti"],
+    "nausea": ["nausea", "मतली", "जी मिचलाना", "जी मिचला"],
+    "diarrhea": ["diarrhea", "diarrhoea", "loose motion", "loose motions", "दस्त", "लूज मोशन", "dast"],
+    "dizziness": ["dizziness", "चक्कर", "chakkar"],
+    "weakness": ["weakness", "कमजोरी", "कमज़ोरी", "kamzori", "kamjori"],
+    "breathlessness": ["breathlessness", "shortness of breath", "सांस फूलना", "साँस फूलना", "सांस लेने में तकलीफ", "सांस फूल"],
+    "itching": ["itching", "खुजली", "khujli"],
+    "rash": ["rash", "चकत्ते", "दाने"],
+    "loss of appetite": ["loss of appetite", "भूख नहीं", "भूख कम", "bhookh nahi"],
+    "burning urination": ["burning urination", "पेशाब में जलन", "peshab me jalan"],
+}
+
+# 1-99 have individual names in Hindi; सौ multiplies
+HINDI_NUMBERS: Dict[str, int] = {
+    w: i + 1
+    for i, w in enumerate(
+        "एक दो तीन चार पांच छह सात आठ नौ दस "
+        "ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस बीस "
+        "इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस तीस "
+        "इकतीस बत्तीस तैंतीस चौंतीस पैंतीस छत्तीस सैंतीस अड़तीस उनतालीस चालीस "
+        "इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस सैंतालीस अड़तालीस उनचास पचास "
+        "इक्यावन बावन तिरेपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ साठ "
+        "इकसठ बासठ तिरेसठ चौंसठ पैंसठ छियासठ सड़सठ अड़सठ उनहत्तर सत्तर "
+        "इकहत्तर बहत्तर तिहत्तर चौहत्तर पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी अस्सी "
+        "इक्यासी बयासी तिरासी चौरासी पचासी छियासी सत्तासी अट्ठासी नवासी नब्बे "
+        "इक्यानवे बानवे तिरानवे चौरानवे पचानवे छियानवे सत्तानवे अट्ठानवे निन्यानवे".split()
+    )
+}
+HINDI_NUMBERS.update({"पाँच": 5, "छः": 6, "छे": 6, "सोला": 16})
+HUNDRED = "सौ"
+
+SMALL_NUMBERS: Dict[str, int] = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "ek": 1, "do": 2, "teen": 3, "char": 4, "paanch": 5, "panch": 5,
+    "chhe": 6, "saat": 7, "aath": 8, "nau": 9, "das": 10,
+}
+
+DURATION_UNITS: Dict[str, str] = {
+    **dict.fromkeys(["दिन", "din", "day", "days"], "day"),
+    **dict.fromkeys(["हफ्ते", "हफ़्ते", "हफ्ता", "हफ़्ता", "सप्ताह", "hafte", "hafta", "week", "weeks"], "week"),
+    **dict.fromkeys(["महीने", "महीना", "mahine", "mahina", "month", "months"], "month"),
+    **dict.fromkeys(["साल", "वर्ष", "saal", "year", "years"], "year"),
+    **dict.fromkeys(["घंटे", "घंटा", "ghante", "ghanta", "hour", "hours"], "hour"),
+}
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_W = r"[\wऀ-ॿ]"  # word chars, including Devanagari vowel signs
+_NUM = rf"(\d+|{_alternation(SMALL_NUMBERS)})"
+_DURATION = re.compile(rf"(?<!{_W}){_NUM}\s*({_alternation(DURATION_UNITS)})(?!{_W})")
+
+_QUESTION = re.compile(
+    rf"\?|(?<!{_W})(?:क्या|kya|do you|did you|have you|are you|is there|any)(?!{_W})"
+)
+_NEGATED_BEFORE = re.compile(rf"(?<!{_W})(?:no|not|without|बिना)\s+$")
+_NEGATED_AFTER = re.compile(rf"(?:\s+\S+)?\s+(?:नहीं|नही|nahi|nahin|not)(?!{_W})")
+
+_IS = r"\s*(?:is|was|of|hai|है|था|:|-)?\s*"
+_BY = r"\s*(?:/|by|over|बाय|बाई)\s*"
+
+
+def _vital(keywords: List[str], value: str) -> "re.Pattern":
+    return re.compile(rf"(?<!{_W})(?:{_alternation(keywords)}){_IS}{value}")
+
+
+# a number followed by a duration unit is a duration ("fever 40 days")
+_NOT_DURATION = rf"(?!\s*(?:{_alternation(DURATION_UNITS)})(?!{_W}))"
+_TEMP_UNIT = rf"\s*(?:°\s*[cf]?|degrees?|डिग्री|fahrenheit|celsius|फारेनहाइट|सेल्सियस|[cf](?!{_W}))"
+
+# "temperature"/"temp" introduce a reading; "fever" only does with a
+# unit, or a Fahrenheit-range number ("बुखार 102")
+_TEMPERATURE = re.compile(
+    rf"(?<!{_W})(?:"
+    rf"(?:{_alternation(['temperature', 'temp', 'तापमान', 'टेंपरेचर', 'टेम्परेचर'])}){_IS}"
+    rf"(?P<reading>\d{{2,3}}(?:\.\d)?)(?!\d){_NOT_DURATION}"
+    rf"|(?:{_alternation(['बुखार', 'बुख़ार', 'fever'])}){_IS}"
+    rf"(?P<fever>\d{{2,3}}(?:\.\d)?)(?!\d)(?P<unit>{_TEMP_UNIT})?{_NOT_DURATION}"
+    rf")"
+)
+
+
+VITALS: List[Tuple[str, "re.Pattern", Any]] = [
+    (
+        "blood pressure",
+        _vital(["blood pressure", "bp", "b.p.", "बीपी", "बी पी", "ब्लड प्रेशर"], rf"(\d{{2,3}}){_BY}(\d{{2,3}})"),
+        lambda m: f"{m.group(1)}/{m.group(2)} mmHg",
+    ),
+    (
+        "body temperature",
+        _TEMPERATURE,
+        lambda m: _temperature(m.group("reading") or m.group("fever"), bool(m.group("fever")), bool(m.group("unit"))),
+    ),
+    (
+        "pulse",
+        _vital(["pulse", "heart rate", "पल्स", "नब्ज", "नाड़ी"], r"(\d{2,3})(?!\d)"),
+        lambda m: f"{m.group(1)} bpm",
+    ),
+    (
+        "oxygen saturation",
+        _vital(["spo2", "sp o2", "oxygen", "saturation", "ऑक्सीजन", "ऑक्सीजन लेवल"], r"(\d{2,3})(?!\d)"),
+        lambda m: f"{m.group(1)}%" if int(m.group(1)) <= 100 else None,
+    ),
+    (
+        "blood sugar",
+        _vital(["blood sugar", "sugar", "glucose", "शुगर", "ब्लड शुगर"], r"(\d{2,3})(?!\d)"),
+        lambda m: f"{m.group(1)} mg/dL",
+    ),
+    (
+        "weight",
+        _vital(["weight", "वजन", "वज़न"], r"(\d{2,3})(?!\d)"),
+        lambda m: f"{m.group(1)} kg",
+    ),
+]
+
+
+def _temperature(raw: str, fever: bool = False, unit: bool = False) -> Optional[str]:
+    value = float(raw)
+    if 95 <= value <= 108:
+        return f"{raw} F"
+    if 35 <= value <= 43 and (unit or not fever):
+        return f"{raw} C"
+    return None
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or unicodedata.category(c).startswith("M")
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton: finds every occurrence of every pattern in a
+    single pass over the text. Built once at import.
+    """
+
+    def __init__(self, patterns: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, payload in patterns.items():
+            node = 0
+            for c in pattern:
+                nxt = self._goto[node].get(c)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][c] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), payload))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(c, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        Whole-word matches as (start, end, payload), leftmost-longest and
+        non-overlapping.
+        """
+        hits = []
+        node = 0
+        for i, c in enumerate(text):
+            while node and c not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(c, 0)
+            for length, payload in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and (
+                    end == len(text) or not _is_word_char(text[end])
+                ):
+                    hits.append((start, end, payload))
+
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        picked, last_end = [], -1
+        for h in hits:
+            if h[0] >= last_end:
+                picked.append(h)
+                last_end = h[1]
+        return picked
+
+
+SYMPTOMS = Automaton({
+    form.lower(): name
+    for name, forms in SYMPTOM_LEXICON.items()
+    for form in forms
+})
+
+
+def normalize_numbers(text: str) -> str:
+    """
+    Replace spelled-out Hindi numbers with digits:
+    "एक सौ बीस बाय अस्सी" -> "120 बाय 80".
+    """
+    out: List[str] = []
+    value: Optional[int] = None
+    after_hundred = False
+
+    def flush():
+        nonlocal value, after_hundred
+        if value is not None:
+            out.append(str(value))
+        value, after_hundred = None, False
+
+    for token in text.split():
+        n = HINDI_NUMBERS.get(token)
+        if token == HUNDRED:
+            if value is not None and value >= 100:
+                flush()
+            value = (value or 1) * 100
+            after_hundred = True
+        elif n is not None and (value is None or after_hundred):
+            value = n if value is None else value + n
+            after_hundred = False
+        else:
+            flush()
+            if n is not None:
+                value = n
+            else:
+                out.append(token)
+    flush()
+    return " ".join(out)
+
+
+def _durations(text: str) -> List[Tuple[int, int, str]]:
+    out = []
+    for m in _DURATION.finditer(text):
+        n = m.group(1)
+        n = int(n) if n.isdigit() else SMALL_NUMBERS[n]
+        unit = DURATION_UNITS[m.group(2)]
+        out.append((m.start(), m.end(), f"{n} {unit}" + ("s" if n != 1 else "")))
+    return out
+
+
+def extract(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Symptoms (with a duration when one is stated next to them) and vitals
+    found in one utterance.
+    """
+    text = normalize_numbers(text.lower())
+    found: Dict[str, List[Dict[str, Any]]] = {}
+
+    # questions ("क्या बुखार है?") are usually the doctor asking, not a
+    # finding; vitals are still taken from them
+    symptoms = [] if _QUESTION.search(text) else [
+        s for s in SYMPTOMS.find(text)
+        if not _NEGATED_BEFORE.search(text, 0, s[0]) and not _NEGATED_AFTER.match(text, s[1])
+    ]
+
+    # each duration goes to its nearest symptom: "दो दिन से बुखार",
+    # "fever for two days and cough since 3 weeks"
+    claimed: Dict[int, Tuple[int, str]] = {}
+    for d_start, d_end, label in _durations(text):
+        if not symptoms:
+            break
+        distance, i = min(
+            (max(d_start - end, start - d_end), i)
+            for i, (start, end, _) in enumerate(symptoms)
+        )
+        if i not in claimed or distance < claimed[i][0]:
+            claimed[i] = (distance, label)
+
+    for i, (_, _, name) in enumerate(symptoms):
+        entry = {"name": name, "duration": claimed[i][1] if i in claimed else None}
+        if all(s["name"] != name for s in found.get("symptoms", [])):
+            found.setdefault("symptoms", []).append(entry)
+
+    for name, pattern, fmt in VITALS:
+        # the first match that reads as a plausible value
+        value = next(filter(None, map(fmt, pattern.finditer(text))), None)
+        if value:
+            found.setdefault("investigations", []).append({"name": name, "value": value})
+
+    return found
+
+
+def apply_findings(state: Dict[str, Any], found: Dict[str, List[Dict[str, Any]]]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Merge extracted entries into the state: new entries are appended, an
+    existing symptom only gains a missing duration, an existing
+    investigation takes the newer value. Returns the new state and the
+    sections that changed.
+    """
+    out = dict(state)
+    changed = []
+
+    for section, entries in found.items():
+        index = EntityIndex(section, state.get(section) or [])
+        dirty = False
+
+        for entry in entries:
+            pos = index.find_key(entry)
+            if pos is None:
+                index.append(dict(entry))
+                dirty = True
+            else:
+                # a symptom only gains missing fields; a vital is re-measured
+                dirty = index.merge(pos, entry, overwrite=section != "symptoms") or dirty
+
+        if dirty:
+            out[section] = index.items()
+            changed.append(section)
+
+    return (assign_entity_ids(out) if changed else state), changed
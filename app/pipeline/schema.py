@@ -1,5 +1,7 @@
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional, Tuple
 from app.models import StructuredState
+from app.pipeline.entities import EntityIndex, dedupe
 
 REQUIRED_KEYS = {
     "utterances",
@@ -11,6 +13,14 @@ REQUIRED_KEYS = {
     "tests",
     }
 
+# Sections whose entries are objects; each entry gets a stable "id"
+# (prefix + counter) the first time it is seen, never reused
+ENTITY_ID_PREFIXES = {
+    "symptoms": "s",
+    "medications": "m",
+    "investigations": "i",
+}
+
 def normalize_structured_state(
     previous: StructuredState,
     candidate: Dict[str, Any],
@@ -20,13 +30,14 @@ def normalize_structured_state(
     - contains all required keys
     - does not drop existing data
     - preserves list types
+    - has one entry per entity (see entities.dedupe)
     """
 
     normalized: Dict[str, Any] = {}
 
     for key in REQUIRED_KEYS:
         if key in candidate and isinstance(candidate[key], list):
-            normalized[key] = candidate[key]
+            normalized[key] = candidate[key] if key == "utterances" else dedupe(key, candidate[key])
         else:
             # fallback to previous state if missing or invalid
             normalized[key] = previous[key]
@@ -63,4 +74,118 @@ def merge_utterances_with_speakers(
         else:
             merged.append(u)
 
-    return merged
\ No newline at end of file
+    return merged
+
+
+def assign_entity_ids(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Give every object entry in ENTITY_ID_PREFIXES sections a stable id.
+    Entries that already have one keep it; returns a new top-level dict
+    that shares every section that needed no ids.
+    """
+    out = dict(state)
+
+    for section, prefix in ENTITY_ID_PREFIXES.items():
+        items = state.get(section)
+        if not isinstance(items, list):
+            continue
+        if all(v.get("id") for v in items if isinstance(v, dict)):
+            continue
+
+        pattern = re.compile(rf"^{prefix}(\d+)$")
+        used = [
+            int(m.group(1))
+            for v in items
+            if isinstance(v, dict)
+            for m in [pattern.match(str(v.get("id", "")))]
+            if m
+        ]
+        next_id = max(used, default=0) + 1
+
+        assigned = []
+        for v in items:
+            if isinstance(v, dict) and not v.get("id"):
+                v = {**v, "id": f"{prefix}{next_id}"}
+                next_id += 1
+            assigned.append(v)
+        out[section] = assigned
+
+    return out
+
+
+# Operations of a state patch, per list section
+PATCH_OPS = ("add", "update")
+
+
+def apply_state_patch(
+    state: Dict[str, Any],
+    patch: Dict[str, Any],
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Deterministically apply an incremental update of the form
+
+        {"patient": {field: value},
+         "<section>": {"add": [entry], "update": [{"id": ..., field: value}]}}
+
+    - update: merges the non-null fields into the entry with that id
+      (an unknown id with a name is treated as an add)
+    - add: an entry naming an existing entity (same canonical key, so
+      "Fever" / "बुखार") is merged into it, keeping the existing
+      spelling; otherwise it is appended and given a new id
+    - nothing is ever removed or reordered
+
+    Returns the new state and the sections that changed.
+    """
+    out = dict(state)
+    changed: List[str] = []
+
+    patient = patch.get("patient")
+    if isinstance(patient, dict):
+        current = dict(state.get("patient") or {})
+        for field, value in patient.items():
+            if value is not None and current.get(field) != value:
+                current[field] = value
+                if "patient" not in changed:
+                    changed.append("patient")
+        if "patient" in changed:
+            out["patient"] = current
+
+    for section, ops in patch.items():
+        if section not in REQUIRED_KEYS or section == "utterances" or not isinstance(ops, dict):
+            continue
+
+        index = EntityIndex(section, state.get(section) or [])
+        dirty = False
+
+        for op in PATCH_OPS:
+            entries = ops.get(op)
+            if not isinstance(entries, list):
+                continue
+
+            for entry in entries:
+                pos: Optional[int] = None
+                if isinstance(entry, dict):
+                    entry = {k: v for k, v in entry.items() if v not in (None, "")}
+                    if op == "update":
+                        pos = index.find_id(entry.get("id"))
+                    entry.pop("id", None)
+
+                if pos is None:
+                    pos = index.find_key(entry)
+                    if pos is not None and isinstance(entry, dict):
+                        # same entity under its existing name
+                        entry.pop("name", None)
+
+                if pos is None:
+                    if not index.key(entry):
+                        continue
+                    index.append(entry)
+                    dirty = True
+                elif isinstance(index.get(pos), dict) and isinstance(entry, dict):
+                    dirty = index.replace(pos, {**index.get(pos), **entry}) or dirty
+
+        if dirty:
+            out[section] = index.items()
+            changed.append(section)
+
+    return (assign_entity_ids(out) if changed else state), changed
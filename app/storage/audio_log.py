@@ -0,0 +1,188 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.storage.session_store import _session_dir
+
+AUDIO_FILE = "audio.pcm"
+INDEX_FILE = "audio.idx"
+META_FILE = "audio.json"
+
+_RECORD = struct.Struct("<QQ")  # byte offset in audio.pcm, ms since session start
+
+# One thread does all audio-log disk I/O, in submission order, for every
+# session. The event loop only hands it references to existing buffers.
+_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-log")
+
+
+class AudioLogWriter:
+    """
+    Append-only per-session audio log.
+
+    audio.pcm holds raw 16-bit mono PCM exactly as fed to the recognizer;
+    audio.idx gets one fixed-size record per chunk mapping its byte
+    offset to arrival time, so any wall-clock instant can be located
+    without scanning the audio.
+    """
+
+    def __init__(self, session_id: str, sample_rate: int):
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.started_at = datetime.utcnow().isoformat()
+        self._t0 = time.monotonic()
+        self._offset = 0
+        self._fds: Optional[tuple] = None
+        self._failed = False
+
+        _io.submit(self._open)
+
+    def _open(self) -> None:
+        try:
+            session_dir = _session_dir(self.session_id)
+            (session_dir / META_FILE).write_text(
+                json.dumps({
+                    "format": "s16le",
+                    "channels": 1,
+                    "sample_rate": self.sample_rate,
+                    "started_at": self.started_at,
+                }),
+                encoding="utf-8",
+            )
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+            self._fds = (
+                os.open(session_dir / AUDIO_FILE, flags, 0o644),
+                os.open(session_dir / INDEX_FILE, flags, 0o644),
+            )
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, e: Exception) -> None:
+        if not self._failed:
+            print(f"[AUDIO LOG] Disabled for session {self.session_id}: {e}")
+        self._failed = True
+
+    def append(self, pcm: bytes) -> None:
+        """
+        Queue one chunk. Never blocks; the buffer itself is handed to the
+        writer thread, not copied.
+        """
+        if self._failed or not pcm:
+            return
+
+        record = _RECORD.pack(self._offset, int((time.monotonic() - self._t0) * 1000))
+        self._offset += len(pcm)
+        _io.submit(self._write, pcm, record)
+
+    def _write(self, pcm: bytes, record: bytes) -> None:
+        if self._fds is None:
+            return
+        try:
+            os.write(self._fds[0], pcm)
+            os.write(self._fds[1], record)
+        except OSError as e:
+            self._fail(e)
+
+    def close(self) -> None:
+        _io.submit(self._close)
+
+    def _close(self) -> None:
+        if self._fds is None:
+            return
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = None
+
+
+class AudioLogReader:
+    """
+    Memory-mapped, read-only view of a session's audio log.
+    """
+
+    def __init__(self, session_dir: Path):
+        self.meta: Dict[str, Any] = json.loads((session_dir / META_FILE).read_text(encoding="utf-8"))
+        self.sample_rate = self.meta["sample_rate"]
+        self._started = datetime.fromisoformat(self.meta["started_at"])
+
+        self._audio = _map(session_dir / AUDIO_FILE)
+        index = _map(session_dir / INDEX_FILE)
+        records = memoryview(index)[: len(index) // _RECORD.size * _RECORD.size].cast("Q")
+        self._offsets = records[0::2]
+        self._times = records[1::2]
+
+    def __len__(self) -> int:
+        return len(self._audio)
+
+    @property
+    def duration_ms(self) -> int:
+        return len(self._audio) * 1000 // (2 * self.sample_rate)
+
+    def _offset_at(self, t_ms: int) -> int:
+        i = bisect.bisect_right(self._times, t_ms) - 1
+        return self._offsets[i] if i >= 0 else 0
+
+    def slice_ms(self, start_ms: int, end_ms: Optional[int] = None) -> memoryview:
+        """
+        PCM between two instants (ms since session start), zero-copy.
+        """
+        start = self._offset_at(start_ms)
+        end = len(self._audio) if end_ms is None else self._offset_at(end_ms)
+        if end_ms is not None and end <= start:
+            # the instant falls inside the chunk that started at `start`
+            i = bisect.bisect_right(self._offsets, start)
+            end = self._offsets[i] if i < len(self._offsets) else len(self._audio)
+        return memoryview(self._audio)[start:end]
+
+    def ms_at(self, timestamp: str) -> int:
+        """
+        Convert an utterance's ISO timestamp to ms since session start.
+        """
+        delta = datetime.fromisoformat(timestamp) - self._started
+        return max(0, int(delta.total_seconds() * 1000))
+
+    def utterance_audio(self, utterances: List[Dict[str, Any]], utterance_id: str) -> memoryview:
+        """
+        Audio of one utterance: everything between the previous final
+        result and this one.
+        """
+        for i, u in enumerate(utterances):
+            if u["utterance_id"] == utterance_id:
+                start = self.ms_at(utterances[i - 1]["timestamp"]) if i else 0
+                return self.slice_ms(start, self.ms_at(u["timestamp"]) + 1)
+        raise KeyError(utterance_id)
+
+    def iter_chunks(self, chunk_bytes: int):
+        audio = memoryview(self._audio)
+        for i in range(0, len(audio), chunk_bytes):
+            yield audio[i:i + chunk_bytes]
+
+    def to_wav(self, path: Path, pcm: Optional[memoryview] = None) -> None:
+        data = memoryview(self._audio) if pcm is None else pcm
+        with open(path, "wb") as f:
+            f.write(_wav_header(len(data), self.sample_rate))
+            f.write(data)
+
+
+def _map(path: Path):
+    """
+    mmap a file read-only; empty files map to b"" (mmap rejects length 0).
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _wav_header(data_len: int, sample_rate: int) -> bytes:
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_len,
+    )
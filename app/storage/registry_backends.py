@@ -0,0 +1,349 @@
+"""
+Where session ownership records and session locks live.
+
+The session registry (session_registry.py) needs four atomic operations
+on short-lived keys, which every backend provides:
+
+    get(key)                              -> value or None
+    set(key, value, ttl_ms, nx=False)     -> bool (False if nx and taken)
+    compare_and_expire(key, value, ttl_ms)-> bool (refresh our own lease)
+    compare_and_delete(key, value)        -> bool (release our own lease)
+
+REGISTRY_BACKEND selects one:
+
+- memory: a dict in this process; single worker only (the default)
+- sqlite: one SQLite file in WAL mode, shared by the workers of one node
+- resp:   a Redis-compatible server at REGISTRY_RESP_URL, shared across
+          nodes; `python -m app.storage.resp_server` is a local stand-in
+
+Backends are synchronous; async code goes through call(), which runs
+them on a small dedicated executor so a slow SQLite lock or registry
+server never stalls the event loop (the process-local memory backend is
+called inline).
+"""
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.config import settings
+
+# used by compare_and_expire / compare_and_delete on RESP servers
+CAE_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+)
+CAD_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+def _now_ms() -> int:
+    # wall clock: compared across processes and machines
+    return int(time.time() * 1000)
+
+
+class RegistryBackend(ABC):
+    name = "base"
+    # whether other processes see the same keys
+    shared = True
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_ms: int, nx: bool = False) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def compare_and_expire(self, key: str, value: str, ttl_ms: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def compare_and_delete(self, key: str, value: str) -> bool:
+        raise NotImplementedError
+
+
+class MemoryBackend(RegistryBackend):
+    name = "memory"
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, int]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None or item[1] <= _now_ms():
+            self._data.pop(key, None)
+            return None
+        return item[0]
+
+    def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    def set(self, key: str, value: str, ttl_ms: int, nx: bool = False) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._data[key] = (value, _now_ms() + ttl_ms)
+        return True
+
+    def compare_and_expire(self, key: str, value: str, ttl_ms: int) -> bool:
+        if self._live(key) != value:
+            return False
+        self._data[key] = (value, _now_ms() + ttl_ms)
+        return True
+
+    def compare_and_delete(self, key: str, value: str) -> bool:
+        if self._live(key) != value:
+            return False
+        del self._data[key]
+        return True
+
+
+class SQLiteBackend(RegistryBackend):
+    """
+    One table of expiring keys. WAL lets readers run alongside the single
+    writer; every operation is one autocommitted statement.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # one connection, used from the executor's threads in turn
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS registry_keys "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_ms INTEGER NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        with self._lock:
+            return self._db().execute(sql, params)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._execute(
+            "SELECT value FROM registry_keys WHERE key = ? AND expires_ms > ?",
+            (key, _now_ms()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl_ms: int, nx: bool = False) -> bool:
+        now = _now_ms()
+        # an expired row counts as absent for NX
+        condition = "WHERE registry_keys.expires_ms <= ?" if nx else "WHERE ? IS NOT NULL"
+        cursor = self._execute(
+            "INSERT INTO registry_keys (key, value, expires_ms) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            f"expires_ms = excluded.expires_ms {condition}",
+            (key, value, now + ttl_ms, now),
+        )
+        return cursor.rowcount == 1
+
+    def compare_and_expire(self, key: str, value: str, ttl_ms: int) -> bool:
+        now = _now_ms()
+        cursor = self._execute(
+            "UPDATE registry_keys SET expires_ms = ? WHERE key = ? AND value = ? AND expires_ms > ?",
+            (now + ttl_ms, key, value, now),
+        )
+        return cursor.rowcount == 1
+
+    def compare_and_delete(self, key: str, value: str) -> bool:
+        cursor = self._execute(
+            "DELETE FROM registry_keys WHERE key = ? AND value = ?",
+            (key, value),
+        )
+        return cursor.rowcount == 1
+
+
+class RESPError(Exception):
+    pass
+
+
+class RESPBackend(RegistryBackend):
+    """
+    Minimal RESP2 client over one blocking socket (reconnected after a
+    fork or an error): GET, SET NX PX, and EVAL for the two
+    compare-and-* scripts.
+    """
+    name = "resp"
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock, self._file, self._pid = sock, sock.makefile("rb"), os.getpid()
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", str(self.db))
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    @staticmethod
+    def encode(*args: str) -> bytes:
+        out = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _read(self) -> Any:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("RESP server closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RESPError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = self._file.read(n + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RESPError(f"bad reply: {line!r}")
+
+    def _roundtrip(self, *args: str) -> Any:
+        self._sock.sendall(self.encode(*args))
+        return self._read()
+
+    def command(self, *args: str) -> Any:
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None or self._pid != os.getpid():
+                        self._connect()
+                    return self._roundtrip(*args)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt == 2:
+                        raise
+
+    def get(self, key: str) -> Optional[str]:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: str, ttl_ms: int, nx: bool = False) -> bool:
+        args: List[str] = ["SET", key, value, "PX", str(ttl_ms)]
+        if nx:
+            args.append("NX")
+        return self.command(*args) == "OK"
+
+    def compare_and_expire(self, key: str, value: str, ttl_ms: int) -> bool:
+        return self.command("EVAL", CAE_SCRIPT, "1", key, value, str(ttl_ms)) == 1
+
+    def compare_and_delete(self, key: str, value: str) -> bool:
+        return self.command("EVAL", CAD_SCRIPT, "1", key, value) == 1
+
+
+def create_backend(name: str) -> RegistryBackend:
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(settings.REGISTRY_SQLITE_PATH)
+    if name == "resp":
+        return RESPBackend(settings.REGISTRY_RESP_URL)
+    raise ValueError(f"Unknown REGISTRY_BACKEND: {name}")
+
+
+_backend: Optional[RegistryBackend] = None
+
+
+def get_backend() -> RegistryBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend(settings.REGISTRY_BACKEND)
+        print(f"[SESSIONS] Registry backend: {_backend.name}")
+    return _backend
+
+
+def set_backend(backend: Optional[RegistryBackend]) -> None:
+    global _backend
+    _backend = backend
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    # threads don't survive a fork
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="registry")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+async def run_blocking(fn, *args, **kwargs) -> Any:
+    """
+    Run a function that makes blocking backend calls on the registry's
+    executor.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _pool(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+async def call(method: str, *args, **kwargs) -> Any:
+    """
+    Run one backend operation without blocking the event loop.
+    """
+    backend = get_backend()
+    fn = getattr(backend, method)
+    if not backend.shared:
+        return fn(*args, **kwargs)
+    return await run_blocking(fn, *args, **kwargs)
+
+
+def submit(method: str, *args) -> None:
+    """
+    Fire-and-forget backend operation (cleanup after a cancellation).
+    """
+    backend = get_backend()
+    if backend.shared:
+        _pool().submit(getattr(backend, method), *args)
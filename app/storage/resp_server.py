@@ -0,0 +1,182 @@
+"""
+Local stand-in for a Redis-compatible server, for multi-worker tests and
+offline development. Implements only what the "resp" registry backend
+uses (GET, SET with NX/XX/PX/EX, DEL, PEXPIRE, PTTL, the two EVAL
+scripts) plus PING, SELECT, AUTH, DBSIZE and FLUSHDB:
+
+    python -m app.storage.resp_server --port 6390
+    REGISTRY_BACKEND=resp REGISTRY_RESP_URL=redis://127.0.0.1:6390/0 python main.py --workers 4
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.storage.registry_backends import CAD_SCRIPT, CAE_SCRIPT
+
+
+class Store:
+    def __init__(self):
+        # key -> (value, expires at in ms or None)
+        self._data: Dict[str, Tuple[str, Optional[int]]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.time() * 1000:
+            del self._data[key]
+            return None
+        return item[0]
+
+    def set(self, key: str, value: str, ttl_ms: Optional[int]) -> None:
+        expires = int(time.time() * 1000) + ttl_ms if ttl_ms is not None else None
+        self._data[key] = (value, expires)
+
+    def delete(self, key: str) -> int:
+        live = self.get(key) is not None
+        self._data.pop(key, None)
+        return int(live)
+
+    def pexpire(self, key: str, ttl_ms: int) -> int:
+        value = self.get(key)
+        if value is None:
+            return 0
+        self.set(key, value, ttl_ms)
+        return 1
+
+    def pttl(self, key: str) -> int:
+        if self.get(key) is None:
+            return -2
+        expires = self._data[key][1]
+        return -1 if expires is None else max(0, expires - int(time.time() * 1000))
+
+    def size(self) -> int:
+        return sum(1 for key in list(self._data) if self.get(key) is not None)
+
+
+class CommandError(Exception):
+    pass
+
+
+def execute(store: Store, args: List[str]) -> Any:
+    """
+    One command; returns the reply value (str for simple strings, bytes
+    for bulk strings, int, None) or raises CommandError.
+    """
+    if not args:
+        raise CommandError("ERR empty command")
+    name, rest = args[0].upper(), args[1:]
+
+    if name == "PING":
+        return "PONG"
+    if name in ("SELECT", "AUTH"):
+        # one keyspace, no auth
+        return "OK"
+    if name == "GET":
+        value = store.get(rest[0])
+        return None if value is None else value.encode()
+    if name == "SET":
+        key, value, options = rest[0], rest[1], [o.upper() for o in rest[2:]]
+        ttl_ms = None
+        if "PX" in options:
+            ttl_ms = int(rest[2 + options.index("PX") + 1])
+        elif "EX" in options:
+            ttl_ms = int(rest[2 + options.index("EX") + 1]) * 1000
+        exists = store.get(key) is not None
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return None
+        store.set(key, value, ttl_ms)
+        return "OK"
+    if name == "DEL":
+        return sum(store.delete(key) for key in rest)
+    if name == "PEXPIRE":
+        return store.pexpire(rest[0], int(rest[1]))
+    if name == "PTTL":
+        return store.pttl(rest[0])
+    if name == "DBSIZE":
+        return store.size()
+    if name == "FLUSHDB":
+        store._data.clear()
+        return "OK"
+    if name == "EVAL":
+        script, key, value = rest[0], rest[2], rest[3]
+        if store.get(key) != value:
+            return 0
+        if script == CAD_SCRIPT:
+            return store.delete(key)
+        if script == CAE_SCRIPT:
+            return store.pexpire(key, int(rest[4]))
+        raise CommandError("ERR only the registry scripts are supported")
+    raise CommandError(f"ERR unknown command '{args[0]}'")
+
+
+def encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return f"+{value}\r\n".encode()
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[str]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # inline command (redis-cli / telnet)
+        return line.decode().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        n = int(header[1:-2])
+        data = await reader.readexactly(n + 2)
+        args.append(data[:-2].decode("utf-8"))
+    return args
+
+
+def serve(store: Store):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                try:
+                    reply = encode_reply(execute(store, args))
+                except CommandError as e:
+                    reply = f"-{e}\r\n".encode()
+                except (IndexError, ValueError):
+                    reply = b"-ERR syntax error\r\n"
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def run(host: str, port: int):
+    server = await asyncio.start_server(serve(Store()), host, port)
+    print(f"[RESP] stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,356 @@
-from typing import Dict
-from app.core.session_models import SessionState
+"""
+In-memory registry of sessions, bounded.
 
-_sessions: Dict[str, SessionState] = {}
+Live sessions always stay resident. A finished session whose artifacts
+are on disk is evicted once it has not been touched for
+SESSION_IDLE_TTL seconds, or least recently used first while more than
+SESSION_MAX_RESIDENT sessions are resident. Before it goes, whatever
+only lives in memory (edits, the edited state, a regenerated report) is
+written to session.json next to its artifacts, and get_session() loads
+it back from data/sessions on the next access. Sessions that were
+abandoned before finalization have nothing on disk and are just dropped
+after the TTL. Eviction only runs in the background sweeper, and files
+are read and written in threads, so lookups never block the event loop
+on disk.
 
-def register_session(session: SessionState):
+With a shared registry backend (REGISTRY_BACKEND=sqlite or resp) every
+resident session is owned by exactly one worker: an `owner:<session_id>`
+lease holding the worker's id and REGISTRY_ADVERTISE_URL, refreshed by
+the sweeper and released on eviction. get_session() on any other worker
+raises SessionElsewhere, which main.py turns into a redirect to the
+owner; a session nobody owns is claimed and rehydrated where it is asked
+for.
+"""
+import asyncio
+import os
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.frozen import freeze
+from app.core.session_models import SessionState, StructuredEdit, Transcript, TranscriptEdit
+from app.storage.registry_backends import call, get_backend, run_blocking
+from app.storage.session_store import load_session_artifacts, store_session_spill
+
+# least recently used first
+_sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+_last_used: Dict[str, float] = {}
+_sweeper: Optional[asyncio.Task] = None
+# set when the resident limit is exceeded, to sweep before the interval
+_sweep_soon: Optional[asyncio.Event] = None
+
+_stats = {
+    "evicted": 0,
+    "dropped": 0,
+    "spill_errors": 0,
+    "rehydrated": 0,
+    "rehydrate_misses": 0,
+    "redirected": 0,
+    "ownership_lost": 0,
+}
+
+
+class SessionElsewhere(Exception):
+    """
+    The session is resident on another worker; `url` is that worker's
+    base URL, or empty if it did not advertise one.
+    """
+    def __init__(self, session_id: str, url: str):
+        super().__init__(session_id)
+        self.session_id = session_id
+        self.url = url
+
+
+def _touch(session_id: str) -> None:
+    _sessions.move_to_end(session_id)
+    _last_used[session_id] = time.monotonic()
+
+
+async def register_session(session: SessionState):
     _sessions[session.session_id] = session
+    _touch(session.session_id)
+    if get_backend().shared:
+        try:
+            # a new id, so nobody else can hold it
+            await _claim(session.session_id, force=True)
+        except Exception as e:
+            # the session still works on this worker; only routing suffers
+            print(f"[SESSIONS] Claiming {session.session_id} failed: {e}")
+    _check_limit()
+
+
+async def get_session(session_id: str) -> SessionState:
+    """
+    The resident session, or one rebuilt from its stored artifacts.
+    Raises SessionElsewhere if another worker has it resident, KeyError
+    if it exists nowhere.
+    """
+    session = _sessions.get(session_id)
+    if session is None:
+        await _take_ownership(session_id)
+        try:
+            loaded = await _rehydrate(session_id)
+        except KeyError:
+            await _release(session_id)
+            raise
+        # a concurrent lookup may have loaded it first
+        session = _sessions.setdefault(session_id, loaded)
+        _check_limit()
+    _touch(session_id)
+    return session
+
+
+async def remove_session(session_id: str):
+    _sessions.pop(session_id, None)
+    _last_used.pop(session_id, None)
+    await _release(session_id)
+
+
+# ---------------- ownership ----------------
+
+def _owner_key(session_id: str) -> str:
+    return f"owner:{session_id}"
+
+
+def _owner_value() -> str:
+    # per process: workers are forked after this module is imported
+    return f"{socket.gethostname()}:{os.getpid()} {settings.REGISTRY_ADVERTISE_URL}"
+
+
+def _lease_ms() -> int:
+    return int(settings.REGISTRY_LEASE_SECONDS * 1000)
+
+
+async def _claim(session_id: str, force: bool = False) -> bool:
+    return await call("set", _owner_key(session_id), _owner_value(), _lease_ms(), nx=not force)
+
+
+async def _release(session_id: str) -> None:
+    if get_backend().shared:
+        try:
+            await call("compare_and_delete", _owner_key(session_id), _owner_value())
+        except Exception as e:
+            # the lease runs out on its own
+            print(f"[SESSIONS] Releasing {session_id} failed: {e}")
+
+
+async def _take_ownership(session_id: str) -> None:
+    """
+    Claim a session that is not resident here before rehydrating it.
+    """
+    if not get_backend().shared or await _claim(session_id):
+        return
+    value = await call("get", _owner_key(session_id))
+    if value is None:
+        # the owner released it in between
+        if await _claim(session_id):
+            return
+        value = await call("get", _owner_key(session_id)) or ""
+    url = value.partition(" ")[2]
+    if url and url == settings.REGISTRY_ADVERTISE_URL:
+        # a previous process at this address (a restarted worker); its
+        # in-memory changes were spilled or are gone
+        await _claim(session_id, force=True)
+        return
+    _stats["redirected"] += 1
+    raise SessionElsewhere(session_id, url)
+
+
+def _refresh_leases(session_ids: List[str]) -> List[str]:
+    # blocking; runs on the registry executor
+    backend = get_backend()
+    value, ttl_ms = _owner_value(), _lease_ms()
+    lost = []
+    for session_id in session_ids:
+        key = _owner_key(session_id)
+        if not (backend.compare_and_expire(key, value, ttl_ms) or backend.set(key, value, ttl_ms, nx=True)):
+            lost.append(session_id)
+    return lost
+
+
+async def heartbeat() -> None:
+    """
+    Refresh the ownership leases of the resident sessions. A session
+    whose lease ran out and was claimed by another worker is dropped
+    here without a spill: requests already go to the new owner.
+    """
+    if not get_backend().shared:
+        return
+    for session_id in await run_blocking(_refresh_leases, list(_sessions)):
+        if session_id not in _sessions:
+            continue
+        _stats["ownership_lost"] += 1
+        print(f"[SESSIONS] Lost ownership of {session_id}")
+        if _evictable(_sessions[session_id]):
+            _sessions.pop(session_id, None)
+            _last_used.pop(session_id, None)
+
+
+# ---------------- spill / rehydrate ----------------
+
+async def _spill(session: SessionState) -> None:
+    # snapshot on the loop, write in a thread
+    spill = {
+        "session_id": session.session_id,
+        "structured_state": session.final_structured_state,
+        "transcript_edits": [asdict(e) for e in session.transcript_edits],
+        "structured_edits": [asdict(e) for e in session.structured_edits],
+        "final_clinical_report": session.final_clinical_report,
+    }
+    await asyncio.to_thread(store_session_spill, session.session_id, spill)
+
+
+async def _rehydrate(session_id: str) -> SessionState:
+    stored = await asyncio.to_thread(load_session_artifacts, session_id)
+    if stored is None:
+        _stats["rehydrate_misses"] += 1
+        raise KeyError(session_id)
+
+    from app.api.websocket import apply_transcript_edits
+
+    spill = stored["spill"]
+    transcript_edits = [TranscriptEdit(**e) for e in spill.get("transcript_edits", [])]
+    session = SessionState(
+        session_id=session_id,
+        session_date=stored["session_date"],
+        raw_transcript=Transcript.from_dicts(stored["raw_transcript"]),
+        # the corrected file predates edits made after stop; replaying
+        # every edit is idempotent
+        final_transcript=apply_transcript_edits(
+            Transcript.from_dicts(stored["final_transcript"]),
+            transcript_edits,
+        ),
+        final_structured_state=freeze(spill.get("structured_state") or stored["structured_state"]),
+        final_clinical_report=spill.get("final_clinical_report"),
+        transcript_edits=transcript_edits,
+        structured_edits=[StructuredEdit(**e) for e in spill.get("structured_edits", [])],
+        active=False,
+        persisted=True,
+    )
+    _stats["rehydrated"] += 1
+    print(f"[SESSIONS] Rehydrated {session_id} from disk")
+    return session
+
+
+# ---------------- eviction ----------------
+
+def _evictable(session: SessionState) -> bool:
+    # never a live session, nor one that an endpoint is working on
+    return not session.active and not session.lock.locked()
+
+
+def _spilled_version(session: SessionState) -> tuple:
+    # with the state's identity (it is frozen: replaced, never mutated),
+    # this changes whenever the session is used or the spill would differ
+    return (
+        _last_used.get(session.session_id),
+        len(session.transcript_edits),
+        len(session.structured_edits),
+        session.final_clinical_report,
+    )
+
+
+async def _evict(session_id: str) -> bool:
+    session = _sessions[session_id]
+    if session.persisted:
+        version, state = _spilled_version(session), session.final_structured_state
+        try:
+            await _spill(session)
+        except Exception as e:
+            # keep it resident rather than lose the in-memory changes
+            _stats["spill_errors"] += 1
+            print(f"[SESSIONS] Spill of {session_id} failed: {e}")
+            return False
+        if (
+            _sessions.get(session_id) is not session
+            or not _evictable(session)
+            or session.final_structured_state is not state
+            or _spilled_version(session) != version
+        ):
+            # used or changed while the spill was being written; the
+            # next sweep writes a fresh one
+            return False
+        _stats["evicted"] += 1
+    else:
+        _stats["dropped"] += 1
+    await remove_session(session_id)
+    return True
+
+
+async def sweep() -> int:
+    """
+    Evict idle sessions, then the least recently used ones over the
+    resident limit. Returns how many were evicted.
+    """
+    now = time.monotonic()
+    before = len(_sessions)
+
+    # abandoned (never persisted) sessions only go here, so a
+    # finalization that is still writing its artifacts is not cut short
+    for session_id in list(_sessions):
+        if session_id not in _sessions:
+            continue
+        idle = now - _last_used.get(session_id, now)
+        if idle >= settings.SESSION_IDLE_TTL and _evictable(_sessions[session_id]):
+            await _evict(session_id)
+
+    excess = len(_sessions) - settings.SESSION_MAX_RESIDENT
+    for session_id in list(_sessions):
+        if excess <= 0:
+            break
+        session = _sessions.get(session_id)
+        if session is not None and _evictable(session) and session.persisted:
+            if await _evict(session_id):
+                excess -= 1
+
+    return before - len(_sessions)
+
+
+def _check_limit() -> None:
+    if len(_sessions) > settings.SESSION_MAX_RESIDENT and _sweep_soon is not None:
+        _sweep_soon.set()
+
+
+async def _sweep_periodically() -> None:
+    # ownership leases must be refreshed well before they run out
+    interval = settings.SESSION_SWEEP_INTERVAL
+    if get_backend().shared:
+        interval = min(interval, settings.REGISTRY_LEASE_SECONDS / 3)
+    last_sweep = time.monotonic()
+    while True:
+        try:
+            await asyncio.wait_for(_sweep_soon.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await heartbeat()
+        except Exception as e:
+            print(f"[SESSIONS] Heartbeat failed: {e}")
+        if _sweep_soon.is_set() or time.monotonic() - last_sweep >= settings.SESSION_SWEEP_INTERVAL:
+            _sweep_soon.clear()
+            last_sweep = time.monotonic()
+            try:
+                await sweep()
+            except Exception as e:
+                print(f"[SESSIONS] Sweep failed: {e}")
+
+
+def start_sweeper() -> asyncio.Task:
+    global _sweeper, _sweep_soon
+    _sweep_soon = asyncio.Event()
+    _sweeper = asyncio.create_task(_sweep_periodically())
+    return _sweeper
 
-def get_session(session_id: str) -> SessionState:
-    return _sessions[session_id]
 
-def remove_session(session_id: str):
-    _sessions.pop(session_id, None)
\ No newline at end of file
+def stats() -> Dict[str, Any]:
+    return {
+        "resident": len(_sessions),
+        "live": sum(1 for s in _sessions.values() if s.active),
+        "max_resident": settings.SESSION_MAX_RESIDENT,
+        "idle_ttl": settings.SESSION_IDLE_TTL,
+        "backend": get_backend().name,
+        **_stats,
+    }
@@ -1,21 +1,7 @@
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, List
-
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    Table,
-    TableStyle,
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.enums import TA_LEFT
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from typing import Any, Dict, List, Optional
 
 BASE_DIR = Path("data/sessions")
 
@@ -62,6 +48,8 @@ def _render_section(
     section_style,
     body_style,
 ):
+    from reportlab.platypus import Paragraph
+
     story.append(Paragraph(title, section_style))
     if items:
         for item in items:
@@ -76,6 +64,22 @@ def store_pdf_report(
     structured_state: dict,
     clinical_report: str,
 ):
+    # reportlab is only needed here; importing it lazily keeps it off
+    # the server's startup path
+    from reportlab.platypus import (
+        SimpleDocTemplate,
+        Paragraph,
+        Spacer,
+        Table,
+        TableStyle,
+    )
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.enums import TA_LEFT
+    from reportlab.lib import colors
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
     session_dir = _session_dir(session_id)
     pdf_path = session_dir / "clinical_report.pdf"
 
@@ -238,4 +242,54 @@ def store_structured_state(session_id: str, structured_state: dict):
 
 def store_suggestions(session_id: str, suggestions: Dict[str, Any]) -> None:
     path = _session_dir(session_id) / "suggestions.json"
-    path.write_text(json.dumps(suggestions, ensure_ascii=False, indent=2), encoding="utf-8")
\ No newline at end of file
+    path.write_text(json.dumps(suggestions, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def find_session_dir(session_id: str) -> Optional[Path]:
+    """
+    Where a finalized session's artifacts are, whatever day they were
+    written on; None if it was never stored.
+    """
+    dirs = sorted(BASE_DIR.glob(f"*/{session_id}")) if BASE_DIR.exists() else []
+    return dirs[-1] if dirs else None
+
+
+def store_session_spill(session_id: str, spill: Dict[str, Any]) -> None:
+    """
+    What only lived in memory (edits, regenerated report), written next
+    to the artifacts when the session is evicted from the registry.
+    """
+    session_dir = find_session_dir(session_id) or _session_dir(session_id)
+    path = session_dir / "session.json"
+    path.write_text(json.dumps(spill, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _read_json(path: Path) -> Any:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_session_artifacts(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    The stored pieces needed to rebuild a session, or None if it has no
+    structured_state.json.
+    """
+    session_dir = find_session_dir(session_id)
+    if session_dir is None:
+        return None
+
+    structured_state = _read_json(session_dir / "structured_state.json")
+    if structured_state is None:
+        return None
+
+    raw_transcript = _read_json(session_dir / "raw_transcript.json") or []
+    corrected = session_dir.parent / f"{session_id}_corrected" / "raw_transcript.json"
+
+    return {
+        "session_date": session_dir.parent.name,
+        "structured_state": structured_state,
+        "raw_transcript": raw_transcript,
+        "final_transcript": _read_json(corrected) or raw_transcript,
+        "spill": _read_json(session_dir / "session.json") or {},
+    }
@@ -1,24 +1,52 @@
 from typing import Dict, Any, List
 from pathlib import Path
-import chromadb
-from chromadb.config import Settings
+import threading
 import uuid
 
+from app.pipeline.entities import distinct_names
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 CHROMA_DIR = BASE_DIR / "data" / "chroma"
-CHROMA_DIR.mkdir(parents=True, exist_ok=True)
 
-print("[CHROMA] Persist dir:", CHROMA_DIR)
+_collection = None
+_lock = threading.Lock()
+
+
+def get_collection():
+    """
+    The clinical_knowledge collection, opened on first use. Opening the
+    persistent client is slow (and chromadb's import alone is heavy), so
+    it stays off the import path; warm-up calls this at startup.
+    """
+    global _collection
 
+    if _collection is None:
+        with _lock:
+            if _collection is None:
+                import chromadb
+                from chromadb.config import Settings
 
-client = chromadb.PersistentClient(
-    path=str(CHROMA_DIR),
-    settings=Settings(anonymized_telemetry=False),
-)
+                CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+                print("[CHROMA] Persist dir:", CHROMA_DIR)
 
-collection = client.get_or_create_collection(
-    name="clinical_knowledge"
-)
+                client = chromadb.PersistentClient(
+                    path=str(CHROMA_DIR),
+                    settings=Settings(anonymized_telemetry=False),
+                )
+                _collection = client.get_or_create_collection(
+                    name="clinical_knowledge"
+                )
+    return _collection
+
+
+def warm_up() -> None:
+    """
+    Open the collection and run one query, which loads the embedding
+    model. Blocking; run it off the event loop.
+    """
+    collection = get_collection()
+    if collection.count():
+        collection.query(query_texts=["warm-up"], n_results=1)
 
 def _normalize_to_strings(value: Any) -> List[str]:
     """
@@ -53,35 +81,36 @@ def _normalize_to_strings(value: Any) -> List[str]:
     return out
 
 
-def _safe_join(value: Any) -> str:
+def _safe_join(value: Any, section: str = "") -> str:
 
-    parts = _normalize_to_strings(value)
-    return ", ".join(p for p in parts if p.strip())
+    parts = [p for p in _normalize_to_strings(value) if p.strip()]
+    # one canonical name per entity, so duplicates don't skew the embedding
+    return ", ".join(distinct_names(section, parts))
 
 def build_document(structured_state: Dict[str, Any]) -> str:
     sections: List[str] = []
 
-    diagnosis = _safe_join(structured_state.get("diagnosis"))
+    diagnosis = _safe_join(structured_state.get("diagnosis"), "diagnosis")
     if diagnosis:
         sections.append(f"Diagnosis: {diagnosis}")
 
-    medications = _safe_join(structured_state.get("medications"))
+    medications = _safe_join(structured_state.get("medications"), "medications")
     if medications:
         sections.append(f"Medications: {medications}")
 
-    tests = _safe_join(structured_state.get("tests"))
+    tests = _safe_join(structured_state.get("tests"), "tests")
     if tests:
         sections.append(f"Tests advised: {tests}")
 
-    symptoms = _safe_join(structured_state.get("symptoms"))
+    symptoms = _safe_join(structured_state.get("symptoms"), "symptoms")
     if symptoms:
         sections.append(f"Symptoms: {symptoms}")
 
-    investigations = _safe_join(structured_state.get("investigations"))
+    investigations = _safe_join(structured_state.get("investigations"), "investigations")
     if investigations:
         sections.append(f"Investigations: {investigations}")
 
-    advice = _safe_join(structured_state.get("advice"))
+    advice = _safe_join(structured_state.get("advice"), "advice")
     if advice:
         sections.append(f"Advice: {advice}")
 
@@ -94,11 +123,11 @@ def build_document(structured_state: Dict[str, Any]) -> str:
 def build_metadata(structured_state: Dict[str, Any]) -> Dict[str, str]:
     metadata: Dict[str, str] = {}
 
-    diagnosis = _safe_join(structured_state.get("diagnosis"))
+    diagnosis = _safe_join(structured_state.get("diagnosis"), "diagnosis")
     if diagnosis:
         metadata["diagnosis"] = diagnosis
 
-    tests = _safe_join(structured_state.get("tests"))
+    tests = _safe_join(structured_state.get("tests"), "tests")
     if tests:
         metadata["tests"] = tests
 
@@ -116,7 +145,7 @@ def store_consultation(
         document = build_document(structured_state)
         metadata = build_metadata(structured_state)
 
-        collection.add(
+        get_collection().add(
             ids=[f"{session_id}_{uuid.uuid4().hex}"],
             documents=[document],
             metadatas=[metadata],
@@ -2,7 +2,8 @@ from typing import Dict, Any, List
 from collections import Counter
 
 # Reuse the same Chroma collection
-from app.vectorstore.chroma_store import collection
+from app.vectorstore.chroma_store import get_collection
+from app.pipeline.entities import distinct_names
 
 
 # ----------------------------
@@ -42,11 +43,11 @@ def build_query_text(structured_state: Dict[str, Any]) -> str:
     """
     parts: List[str] = []
 
-    symptoms = _normalize_list(structured_state.get("symptoms"))
+    symptoms = distinct_names("symptoms", _normalize_list(structured_state.get("symptoms")))
     if symptoms:
         parts.append("Symptoms: " + ", ".join(symptoms))
 
-    investigations = _normalize_list(structured_state.get("investigations"))
+    investigations = distinct_names("investigations", _normalize_list(structured_state.get("investigations")))
     if investigations:
         parts.append("Investigations: " + ", ".join(investigations))
 
@@ -80,7 +81,7 @@ def generate_system_suggestions(
         }
 
     try:
-        results = collection.query(
+        results = get_collection().query(
             query_texts=[query_text],
             n_results=top_k,
         )
@@ -0,0 +1,101 @@
+"""
+Startup warm-up and profile.
+
+Nothing heavy happens at import: the Vosk model, the Chroma collection
+(and its embedding model) and the LLM client are created on first use.
+At startup, start() runs the steps listed in WARMUP in the background so
+the first session doesn't pay for them. Each step's duration, and how
+long `import main` took, are kept for /metrics.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+
+def _asr() -> None:
+    from app.asr.vosk_adapter import warm_up
+    warm_up()
+
+
+def _vectorstore() -> None:
+    from app.vectorstore.chroma_store import warm_up
+    warm_up()
+
+
+async def _llm() -> None:
+    from app.llm.backends import get_backend
+    await get_backend().warm_up()
+
+
+def _llm_cache() -> None:
+    from app.llm.cache import response_cache
+    response_cache.scan_disk()
+
+
+# name -> (function, runs in an executor thread)
+STEPS = {
+    "asr": (_asr, True),
+    "vectorstore": (_vectorstore, True),
+    "llm": (_llm, False),
+    "llm_cache": (_llm_cache, True),
+}
+
+_profile: Dict[str, Any] = {"import_seconds": None, "steps": {}}
+_task: Optional[asyncio.Task] = None
+
+
+def record_import(seconds: float) -> None:
+    _profile["import_seconds"] = round(seconds, 3)
+
+
+def configured_steps():
+    names = [s.strip() for s in settings.WARMUP.split(",") if s.strip()]
+    unknown = [n for n in names if n not in STEPS]
+    if unknown:
+        print(f"[WARMUP] Ignoring unknown steps: {unknown}")
+    return [n for n in names if n in STEPS]
+
+
+async def _run_step(name: str) -> None:
+    fn, blocking = STEPS[name]
+    step = _profile["steps"][name] = {"state": "running"}
+    start = time.perf_counter()
+    try:
+        if blocking:
+            await asyncio.get_running_loop().run_in_executor(None, fn)
+        else:
+            await fn()
+    except Exception as e:
+        # warm-up is an optimization; the resource is retried on first use
+        step.update(state="failed", error=str(e))
+        print(f"[WARMUP] {name} failed: {e}")
+    else:
+        step["state"] = "done"
+    step["seconds"] = round(time.perf_counter() - start, 3)
+
+
+async def run() -> None:
+    """
+    Run the configured steps concurrently and log the profile.
+    """
+    names = configured_steps()
+    start = time.perf_counter()
+    await asyncio.gather(*(_run_step(n) for n in names))
+    if names:
+        steps = ", ".join(f"{n} {_profile['steps'][n]['seconds']:.2f}s" for n in names)
+        print(f"[WARMUP] Done in {time.perf_counter() - start:.2f}s ({steps})")
+
+
+def start() -> asyncio.Task:
+    global _task
+    _task = asyncio.create_task(run())
+    return _task
+
+
+def profile() -> Dict[str, Any]:
+    return {
+        "import_seconds": _profile["import_seconds"],
+        "steps": {k: dict(v) for k, v in _profile["steps"].items()},
+    }
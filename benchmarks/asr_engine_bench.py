@@ -0,0 +1,139 @@
+"""
+Event-loop lag and chunk latency vs. concurrent session count.
+
+Compares decoding inline on the event loop (the old behaviour) with the
+lane-based ASREngine. Uses a stand-in recognizer so it runs without the
+Vosk model: each chunk costs --decode-ms, of which --gil-pct percent is
+spent holding the GIL (Python work) and the rest in a GIL-free wait, the
+way native Kaldi decoding behaves.
+
+    python benchmarks/asr_engine_bench.py --sessions 1,5,10,20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.asr.engine import ASREngine, ASRStream, decode_chunk  # noqa: E402
+
+CHUNK_SAMPLES = 4096
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = CHUNK_SAMPLES / SAMPLE_RATE
+
+
+class FakeRecognizer:
+    def __init__(self, decode_ms: float, gil_pct: float):
+        self._gil_s = decode_ms * gil_pct / 100 / 1000
+        self._free_s = decode_ms * (100 - gil_pct) / 100 / 1000
+        self._n = 0
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        end = time.perf_counter() + self._gil_s
+        while time.perf_counter() < end:
+            pass
+        time.sleep(self._free_s)
+        self._n += 1
+        return self._n % 12 == 0
+
+    def Result(self) -> str:
+        return json.dumps({"text": "बुखार"})
+
+    def PartialResult(self) -> str:
+        return json.dumps({"partial": "बु"})
+
+
+def _pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _lag_probe(stop: asyncio.Event, lags: list):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _session(mode, engine, args, latencies):
+    factory = lambda: FakeRecognizer(args.decode_ms, args.gil_pct)  # noqa: E731
+    chunk = b"\x00" * (CHUNK_SAMPLES * 2)
+
+    if mode == "engine":
+        stream = await ASRStream(engine, factory).open()
+    else:
+        recognizer = factory()
+
+    next_at = time.perf_counter()
+    deadline = next_at + args.seconds
+
+    while next_at < deadline:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        start = time.perf_counter()
+        if mode == "engine":
+            await stream.accept(chunk)
+        else:
+            decode_chunk(recognizer, chunk)
+        latencies.append(time.perf_counter() - start)
+        next_at += CHUNK_SECONDS
+
+    if mode == "engine":
+        await stream.close()
+
+
+async def _run(mode, sessions, engine, args):
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_lag_probe(stop, lags))
+
+    await asyncio.gather(*[
+        _session(mode, engine, args, latencies) for _ in range(sessions)
+    ])
+
+    stop.set()
+    await probe
+
+    return {
+        "lag_p50": _pct(lags, 0.50) * 1000,
+        "lag_p99": _pct(lags, 0.99) * 1000,
+        "lag_max": max(lags, default=0.0) * 1000,
+        "chunk_p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "chunk_p99": _pct(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,5,10,20")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--decode-ms", type=float, default=20.0)
+    parser.add_argument("--gil-pct", type=float, default=10.0)
+    args = parser.parse_args()
+
+    engine = ASREngine(args.workers)
+
+    print(
+        f"{'mode':<7} {'sessions':>8} {'lag p50':>9} {'lag p99':>9} "
+        f"{'lag max':>9} {'chunk p50':>10} {'chunk p99':>10}  (ms)"
+    )
+    for n in [int(s) for s in args.sessions.split(",")]:
+        for mode in ("inline", "engine"):
+            r = asyncio.run(_run(mode, n, engine, args))
+            print(
+                f"{mode:<7} {n:>8} {r['lag_p50']:>9.1f} {r['lag_p99']:>9.1f} "
+                f"{r['lag_max']:>9.1f} {r['chunk_p50']:>10.1f} {r['chunk_p99']:>10.1f}"
+            )
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
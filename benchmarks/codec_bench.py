@@ -0,0 +1,82 @@
+"""
+Server-side decode cost per session for each /ws audio codec.
+
+Encodes one 4096-sample frame of synthetic speech-band audio, then
+times decoding it. Reports wire bitrate, microseconds per frame and the
+share of one CPU core a single real-time session costs.
+
+    python benchmarks/codec_bench.py
+"""
+import math
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.asr.codecs import (  # noqa: E402
+    decode_ima_adpcm,
+    decode_mulaw,
+    encode_ima_adpcm,
+    encode_mulaw,
+)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 4096
+FRAME_SECONDS = FRAME_SAMPLES / SAMPLE_RATE
+
+
+def _frame() -> bytes:
+    rnd = random.Random(0)
+    samples = [
+        int(
+            6000 * math.sin(2 * math.pi * 180 * i / SAMPLE_RATE)
+            + 2500 * math.sin(2 * math.pi * 1200 * i / SAMPLE_RATE)
+            + rnd.gauss(0, 300)
+        )
+        for i in range(FRAME_SAMPLES)
+    ]
+    return struct.pack(f"<{FRAME_SAMPLES}h", *samples)
+
+
+def _time(fn, payload, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return (time.perf_counter() - start) / rounds
+
+
+def _snr_db(ref: bytes, out: bytes) -> float:
+    a = struct.unpack(f"<{FRAME_SAMPLES}h", ref)
+    b = struct.unpack(f"<{FRAME_SAMPLES}h", out[: FRAME_SAMPLES * 2])
+    signal = sum(x * x for x in a)
+    noise = sum((x - y) ** 2 for x, y in zip(a, b)) or 1
+    return 10 * math.log10(signal / noise)
+
+
+def main():
+    pcm = _frame()
+    codecs = [
+        ("pcm16", pcm, bytes),
+        ("mulaw", encode_mulaw(pcm), decode_mulaw),
+        ("ima-adpcm", encode_ima_adpcm(pcm), decode_ima_adpcm),
+    ]
+
+    print(
+        f"{'codec':<10} {'kbit/s':>7} {'us/frame':>9} "
+        f"{'core % / session':>17} {'SNR dB':>7}"
+    )
+    for name, wire, decode in codecs:
+        per_frame = _time(decode, wire, 200)
+        kbps = len(wire) * 8 / FRAME_SECONDS / 1000
+        snr = _snr_db(pcm, decode(wire)) if name != "pcm16" else float("inf")
+        print(
+            f"{name:<10} {kbps:>7.0f} {per_frame * 1e6:>9.1f} "
+            f"{per_frame / FRAME_SECONDS * 100:>17.3f} {snr:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
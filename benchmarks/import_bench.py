@@ -0,0 +1,90 @@
+"""
+Import-time profile of the server, to catch startup regressions.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter
+(best of --runs) and prints the total and the slowest modules. Exits
+non-zero if the total exceeds --budget-ms or if a module that must stay
+lazy (--forbid) was imported.
+
+    python benchmarks/import_bench.py --top 15 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Loaded on first use / by warm-up, never by `import main`
+DEFAULT_FORBID = "vosk,chromadb,google.genai,reportlab"
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _profile(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = int(m[1]), int(m[2]), len(m[3]), m[4]
+        modules[name] = (self_us, cumulative_us)
+        if indent == 1:
+            # top-level imports; their cumulative times add up to the total
+            total += cumulative_us
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=0, help="0 = no budget")
+    parser.add_argument("--forbid", default=DEFAULT_FORBID)
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        total, modules = _profile(args.module)
+        if best is None or total < best[0]:
+            best = (total, modules)
+    total, modules = best
+
+    print(f"import {args.module}: {total / 1000:.0f} ms, {len(modules)} modules (best of {args.runs})")
+    print(f"{'cumulative':>10} {'self':>8}  module  (ms)")
+    ranked = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in ranked[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>8.1f}  {name}")
+
+    failed = False
+    forbidden = [
+        name for name in modules
+        for f in args.forbid.split(",")
+        if f and (name == f or name.startswith(f + "."))
+    ]
+    if forbidden:
+        print(f"FAIL: imported eagerly: {', '.join(sorted(forbidden))}")
+        failed = True
+    if args.budget_ms and total / 1000 > args.budget_ms:
+        print(f"FAIL: {total / 1000:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Offline throughput and tail latency of the LLM side of the pipeline.
+
+Simulates N concurrent consultations: utterances arrive every
+--utterance-ms, each session's UpdateScheduler batches them into
+streamed incremental updates, speculative reports run in the background,
+and at stop the session waits for its clinical note. No provider is
+contacted: the "mock" backend answers in-process, "http" talks to
+app/llm/mock_server.py (or anything else speaking its protocol).
+Transcripts are replayed from --recordings when stored sessions exist.
+
+    python benchmarks/pipeline_bench.py --sessions 1,10,50 --latency lognormal:800,0.4
+    python benchmarks/pipeline_bench.py --backend http --url http://127.0.0.1:8090
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SCRIPT = [
+    "namaste doctor sahab",
+    "mujhe teen din se bukhar hai",
+    "aur sir dard bhi ho raha hai",
+    "khansi kab se hai",
+    "khansi ek hafte se hai",
+    "raat ko zyada hoti hai",
+    "BP 130 by 85 hai",
+    "temperature 101 degree hai",
+    "koi dawai li aapne",
+    "paracetamol li thi",
+    "gale mein kharash bhi hai",
+    "CBC test karwa lijiye",
+    "paani zyada pijiye",
+    "do din baad dikhaiye",
+]
+
+
+def _base_state():
+    return {
+        "patient": {"name": None, "age": None, "gender": None},
+        "utterances": [],
+        "symptoms": [],
+        "medications": [],
+        "diagnosis": [],
+        "advice": [],
+        "investigations": [],
+        "tests": [],
+    }
+
+
+def _load_scripts(root: Path):
+    scripts = []
+    if root.exists():
+        for path in root.glob("*/*/raw_transcript.json"):
+            try:
+                lines = [u["text"] for u in json.loads(path.read_text(encoding="utf-8")) if u.get("text")]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if lines:
+                scripts.append(lines)
+    return scripts or [SCRIPT]
+
+
+def _pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+
+async def _session(lines, args, policy, m):
+    from app.core.update_scheduler import UpdateScheduler
+    from app.llm.gemini import generate_report_from_state_async
+    from app.llm.incremental import stream_structured_update
+    from app.llm.speculative import ReportSpeculator
+
+    gap = args.utterance_ms / 1000
+    current = {"state": _base_state()}
+    transcript = []
+    speculator = ReportSpeculator(args.speculative_runs) if args.speculative_runs else None
+
+    async def run_update(start, batch):
+        t0 = time.perf_counter()
+        first = None
+        updated = None
+        utterance_dicts = [
+            {"index": start + i + 1, "speaker": u["speaker"], "text": u["text"], "timestamp": u["timestamp"]}
+            for i, u in enumerate(batch)
+        ]
+        async for event in stream_structured_update(deepcopy(current["state"]), utterance_dicts):
+            if event["type"] == "section" and first is None:
+                first = time.perf_counter() - t0
+            elif event["type"] == "state":
+                updated = event["state"]
+        m["update"].append(time.perf_counter() - t0)
+        if first is not None:
+            m["first_section"].append(first)
+        current["state"] = updated
+        if speculator is not None:
+            speculator.submit(updated)
+
+    async def load_pending(start):
+        return transcript[start:]
+
+    scheduler = UpdateScheduler(run_update, load_pending, policy)
+    scheduler.start()
+
+    # sessions don't start in lockstep
+    await asyncio.sleep(random.uniform(0, gap))
+    for i, text in enumerate(lines[:args.utterances]):
+        await asyncio.sleep(gap * random.uniform(0.5, 1.5))
+        transcript.append({
+            "speaker": "doctor" if i % 2 == 0 else "patient",
+            "text": text,
+            "timestamp": time.time(),
+        })
+        scheduler.set_quiet(False)
+        scheduler.utterance_added()
+        if (i + 1) % 4 == 0:
+            scheduler.set_quiet(True)
+
+    t0 = time.perf_counter()
+    if speculator is not None:
+        speculator.close()
+    await scheduler.flush()
+    result = None
+    if speculator is not None:
+        result = await speculator.result(current["state"])
+        m["speculative_hits"] += result is not None
+    if result is None:
+        result = await generate_report_from_state_async(current["state"])
+    m["stop_to_report"].append(time.perf_counter() - t0)
+    if "data" not in result:
+        m["report_errors"] += 1
+
+    m["update_errors"] += scheduler.failures
+    await scheduler.close()
+
+
+async def _run(n, scripts, args):
+    from app.core.update_scheduler import DebouncePolicy
+    from app.llm.gateway import gateway
+
+    gap = args.utterance_ms / 1000
+    # the production policy, scaled to the simulated speaking rate
+    policy = DebouncePolicy(min_utterances=3, min_interval=gap * 2, max_delay=gap * 6)
+
+    m = {
+        "update": [], "first_section": [], "stop_to_report": [],
+        "update_errors": 0, "report_errors": 0, "speculative_hits": 0,
+    }
+    calls_before = sum(gateway.calls.values())
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_session(scripts[i % len(scripts)], args, policy, m) for i in range(n)))
+    elapsed = time.perf_counter() - t0
+
+    m["elapsed"] = elapsed
+    m["calls"] = sum(gateway.calls.values()) - calls_before
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,10,50")
+    parser.add_argument("--utterances", type=int, default=14)
+    parser.add_argument("--utterance-ms", type=float, default=300.0)
+    parser.add_argument("--backend", choices=["mock", "http"], default="mock")
+    parser.add_argument("--url", default="http://127.0.0.1:8090")
+    parser.add_argument("--latency", default="lognormal:800,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", default="data/sessions")
+    parser.add_argument("--speculative-runs", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # settings are read at import time; identical sessions would otherwise
+    # be answered from the response cache
+    os.environ.update({
+        "LLM_BACKEND": args.backend,
+        "LLM_HTTP_URL": args.url,
+        "LLM_MOCK_LATENCY": args.latency,
+        "LLM_MOCK_ERROR_RATE": str(args.error_rate),
+        "LLM_MOCK_RECORDINGS": args.recordings,
+        "LLM_MAX_CONCURRENCY": str(args.concurrency),
+        "LLM_CACHE": "false",
+        "LLM_STREAMING": "true",
+    })
+    os.environ.setdefault("GEMINI_MODEL", "mock")
+
+    scripts = _load_scripts(Path(args.recordings))
+    if args.backend == "http":
+        print(f"backend=http url={args.url} scripts={len(scripts)}")
+    else:
+        print(f"backend=mock latency={args.latency} error_rate={args.error_rate} scripts={len(scripts)}")
+    print(
+        f"{'sessions':>8} {'upd p50':>8} {'upd p95':>8} {'upd p99':>8} {'1st p50':>8} "
+        f"{'rpt p50':>8} {'rpt p99':>8} {'calls/s':>8} {'spec':>5} {'errors':>7}  (ms)"
+    )
+    asyncio.run(_main(scripts, args))
+
+
+async def _main(scripts, args):
+    from app.llm.gateway import gateway
+
+    # one loop for all rounds: the http backend's pooled connections are
+    # bound to the loop they were opened on
+    for n in [int(s) for s in args.sessions.split(",")]:
+        m = await _run(n, scripts, args)
+        print(
+            f"{n:>8} {_pct(m['update'], 50):>8.0f} {_pct(m['update'], 95):>8.0f} "
+            f"{_pct(m['update'], 99):>8.0f} {_pct(m['first_section'], 50):>8.0f} "
+            f"{_pct(m['stop_to_report'], 50):>8.0f} {_pct(m['stop_to_report'], 99):>8.0f} "
+            f"{m['calls'] / m['elapsed']:>8.1f} {m['speculative_hits']:>5} "
+            f"{m['update_errors'] + m['report_errors']:>7}"
+        )
+    print(json.dumps(gateway.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
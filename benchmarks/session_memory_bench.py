@@ -0,0 +1,113 @@
+"""
+RAM per live session for the session data model.
+
+Builds --sessions sessions of --utterances utterances each and measures
+the allocated memory with tracemalloc, once with the current model
+(slotted classes, columnar Transcript) and once with the previous one
+(a dataclass with __dict__ per utterance, UUID and ISO timestamp strings,
+a raw and a final copy of every utterance), reproduced here.
+
+    python benchmarks/session_memory_bench.py --sessions 200 --utterances 900
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.session_models import SessionState  # noqa: E402
+
+TEXTS = [
+    "मुझे दो दिन से बुखार है",
+    "aur sir dard bhi ho raha hai",
+    "khansi ek hafte se hai",
+    "BP 130 by 85 hai",
+    "paracetamol li thi",
+]
+
+
+@dataclass
+class _LegacyUtterance:
+    utterance_id: str
+    timestamp: str
+    text: str
+    speaker: str
+
+
+@dataclass
+class _LegacyRaw:
+    utterance_id: str
+    timestamp: str
+    text: str
+
+
+@dataclass
+class _LegacySession:
+    session_id: str
+    session_date: str
+    raw_transcript: list = field(default_factory=list)
+    final_transcript: list = field(default_factory=list)
+
+
+def _legacy(n: int, utterances: int):
+    sessions = []
+    for s in range(n):
+        state = _LegacySession(session_id=f"s{s}", session_date="2025-01-01")
+        for i in range(utterances):
+            # texts come from ASR, so every utterance is its own string
+            text = "".join(TEXTS[i % len(TEXTS)])
+            raw = _LegacyRaw(str(uuid.uuid4()), datetime.utcnow().isoformat(), text)
+            state.raw_transcript.append(raw)
+            state.final_transcript.append(
+                _LegacyUtterance(raw.utterance_id, raw.timestamp, text, "unknown")
+            )
+        sessions.append(state)
+    return sessions
+
+
+def _current(n: int, utterances: int):
+    sessions = []
+    for s in range(n):
+        state = SessionState(session_id=f"s{s}", session_date="2025-01-01")
+        for i in range(utterances):
+            state.final_transcript.append("".join(TEXTS[i % len(TEXTS)]))
+        sessions.append(state)
+    return sessions
+
+
+def measure(build, n: int, utterances: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    sessions = build(n, utterances)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--utterances", type=int, default=900, help="per session (~1 h at 4 s each)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, build in (("legacy", _legacy), ("current", _current)):
+        size = measure(build, args.sessions, args.utterances)
+        results[name] = size
+        print(
+            f"{name:<8} {size / 2**20:8.1f} MiB total  "
+            f"{size / args.sessions / 1024:8.1f} KiB/session  "
+            f"{size / args.sessions / args.utterances:6.0f} B/utterance"
+        )
+
+    print(f"saved {1 - results['current'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold-start time and per-worker memory for each serving mode.
+
+Starts `python main.py` as a subprocess, polls /health/ready until ASR
+is warm, then reads RSS and PSS (proportional set size, which splits
+shared pages between the processes mapping them) for the master and
+every worker from /proc. Linux only; needs the real Vosk model.
+
+    python benchmarks/startup_bench.py --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _children(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _memory_kb(pid: int):
+    rss = pss = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def _wait_ready(port: int, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1) as r:
+                if r.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    raise TimeoutError("server did not become ready")
+
+
+def run(workers: int, preload: bool, port: int, timeout: float):
+    cmd = [sys.executable, "main.py", "--port", str(port), "--workers", str(workers)]
+    if preload:
+        cmd.append("--preload")
+
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready_s = _wait_ready(port, timeout)
+        # every worker must be warm, not just the one that answered
+        time.sleep(1.0)
+        pids = [proc.pid] + _children(proc.pid)
+        mem = [_memory_kb(p) for p in pids]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    label = f"{'preload' if preload else 'per-worker'} x{workers}"
+    print(f"{label:<16} ready {ready_s:6.1f}s")
+    for pid, (rss, pss) in zip(pids, mem):
+        role = "master" if pid == proc.pid else "worker"
+        print(f"    {role:<6} {pid:>7}  RSS {rss / 1024:8.1f} MB  PSS {pss / 1024:8.1f} MB")
+    print(f"    total PSS {sum(p for _, p in mem) / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    run(args.workers, preload=False, port=args.port, timeout=args.timeout)
+    run(args.workers, preload=True, port=args.port, timeout=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Cost of session-state snapshots and edits over a long consultation.
+
+Replays a synthetic --minutes long session (one utterance every
+--utterance-s, an incremental patch every --batch utterances, plus a
+doctor edit now and then) twice: with the deepcopy-per-call handling the
+server used to do, and with the frozen, structurally shared state
+(app/core/frozen.py). After the live part, --edits edits are posted to
+the finalized session, whose state then holds the whole transcript.
+
+    python benchmarks/state_bench.py --minutes 60
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.api.websocket import _base_structured_state, apply_structured_edits  # noqa: E402
+from app.core.frozen import freeze  # noqa: E402
+from app.core.session_models import StructuredEdit  # noqa: E402
+from app.pipeline.schema import apply_state_patch  # noqa: E402
+
+SECTIONS = ["symptoms", "medications", "investigations", "diagnosis", "advice", "tests"]
+
+
+def _patch(i: int):
+    # roughly what a consultation accumulates: a new entry every few
+    # updates, updates to existing ones in between
+    section = SECTIONS[i % len(SECTIONS)]
+    if section in ("diagnosis", "advice", "tests"):
+        return {section: {"add": [f"{section} {i // 4}"]}}
+    if i % 3:
+        prefix = {"symptoms": "s", "medications": "m", "investigations": "i"}[section]
+        return {section: {"update": [{"id": f"{prefix}1", "duration": f"{i} days", "value": str(i)}]}}
+    return {section: {"add": [{"name": f"{section} {i // 3}", "duration": "2 days"}]}}
+
+
+def _edit(i: int) -> StructuredEdit:
+    return StructuredEdit(
+        edit_id=str(i),
+        section="medications",
+        action="add",
+        value={"name": f"drug {i}", "dosage": "1-0-1"},
+        edited_by="doctor",
+        edited_at="",
+    )
+
+
+def _utterance(i: int):
+    return {
+        "index": i + 1,
+        "speaker": "doctor" if i % 2 else "patient",
+        "text": "mujhe teen din se bukhar hai aur sir dard bhi ho raha hai " * 2,
+        "timestamp": f"2025-01-01T10:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+
+
+def run(mode: str, utterances: int, batch: int, edit_every: int, post_edits: int):
+    state = _base_structured_state()
+    if mode == "deepcopy":
+        state = json.loads(json.dumps(state))  # plain, mutable dicts and lists
+    edits = []
+    update_ms, edit_ms = [], []
+
+    for n, i in enumerate(range(0, utterances, batch)):
+        start = time.perf_counter()
+        if mode == "deepcopy":
+            snapshot = deepcopy(state)
+            state, _ = apply_state_patch(snapshot, _patch(n))
+            # speculative report input: edits replayed on a copy
+            apply_structured_edits(deepcopy(state), edits)
+        else:
+            snapshot = state
+            state, _ = apply_state_patch(snapshot, _patch(n))
+            state = freeze(state)
+            apply_structured_edits(state, edits)
+        update_ms.append((time.perf_counter() - start) * 1000)
+
+        if edit_every and n % edit_every == 0:
+            edits.append(_edit(n))
+
+    # finalization puts the whole transcript into the state
+    final = {**apply_structured_edits(state, edits), "utterances": [_utterance(i) for i in range(utterances)]}
+    state = final if mode == "deepcopy" else freeze(final)
+
+    for i in range(post_edits):
+        start = time.perf_counter()
+        if mode == "deepcopy":
+            state = apply_structured_edits(deepcopy(state), [_edit(10_000 + i)])
+        else:
+            state = freeze(apply_structured_edits(state, [_edit(10_000 + i)]))
+        edit_ms.append((time.perf_counter() - start) * 1000)
+
+    return update_ms, edit_ms, state
+
+
+def _summary(label: str, ms):
+    ms = sorted(ms)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    return (
+        f"{label:<18} n={len(ms):<5} total={sum(ms):8.1f} ms  "
+        f"p50={statistics.median(ms):.3f} p99={p99:.3f} max={ms[-1]:.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--utterance-s", type=float, default=4.0)
+    parser.add_argument("--batch", type=int, default=3, help="utterances per LLM update")
+    parser.add_argument("--edit-every", type=int, default=25, help="updates between doctor edits, 0 = none")
+    parser.add_argument("--edits", type=int, default=50, help="edits posted after finalization")
+    args = parser.parse_args()
+
+    utterances = int(args.minutes * 60 / args.utterance_s)
+    print(f"{args.minutes:g} min session: {utterances} utterances, {utterances // args.batch} updates")
+
+    results = {}
+    for mode in ("deepcopy", "frozen"):
+        update_ms, edit_ms, state = run(mode, utterances, args.batch, args.edit_every, args.edits)
+        results[mode] = state
+        print(f"\n[{mode}]")
+        print(_summary("live update", update_ms))
+        print(_summary("post-final edit", edit_ms))
+
+    same = results["deepcopy"] == results["frozen"]
+    print(f"\nfinal states equal: {same}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
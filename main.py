@@ -1,29 +1,175 @@
+import time
+
+_import_started = time.perf_counter()
+
+import argparse
+import gc
+import os
+import signal
+import socket
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from app.api.websocket import ws_router
 from app.api.edits import router as edits_router
 from app.api.regenerate import router as regenerate_router
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
+from app.api.memory import router as memory_router
+from app.asr.vosk_adapter import shut_down as shut_down_asr, warm_up as warm_up_asr
+from app.config import settings
+from app import warmup
+from app.storage import session_registry
+from app.storage.session_registry import SessionElsewhere
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up ASR, Chroma and the LLM client in the background;
+    # /health/ready flips once ASR is loaded. The ASR step is a no-op in
+    # workers forked from a --preload master. Finished sessions are
+    # evicted from memory by the registry's sweeper.
+    warmup.start()
+    session_registry.start_sweeper()
+    yield
+    shut_down_asr()
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/data", StaticFiles(directory="data"), name="data")
+# data/ is created by the first stored session, not at import
+app.mount("/data", StaticFiles(directory="data", check_dir=False), name="data")
 
 app.include_router(ws_router)
 app.include_router(edits_router)
 app.include_router(regenerate_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(memory_router)
+
+
+@app.exception_handler(SessionElsewhere)
+async def session_elsewhere(request: Request, exc: SessionElsewhere):
+    # 307 keeps the method and body, so edits are replayed on the owner
+    if not exc.url:
+        return JSONResponse({"detail": "Session is owned by another worker"}, status_code=503)
+    url = exc.url.rstrip("/") + request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    return RedirectResponse(url, status_code=307)
+
+warmup.record_import(time.perf_counter() - _import_started)
 
 @app.get("/", response_class=HTMLResponse)
 def index():
     with open("templates/index.html", encoding="utf-8") as f:
         return f.read()
 
+
+def advertise_url(host: str, port: int) -> str:
+    if host in ("", "0.0.0.0", "::"):
+        host = socket.gethostname()
+    return f"http://{host}:{port}"
+
+
+def serve_forked(host: str, port: int, workers: int, preload: bool):
+    """
+    Bind once, optionally load the Vosk model, then fork the workers.
+
+    With --preload the model is loaded in this master process before
+    forking, so workers share its pages copy-on-write and are ready as
+    soon as they start accepting connections.
+
+    With a shared REGISTRY_BACKEND worker i also listens on port + 1 + i
+    alone, and advertises that address, so requests for a session can be
+    redirected to the worker that has it in memory.
+    """
+    if settings.ASR_MODE == "processes":
+        # each server worker starts its own ASR worker pool after the fork
+        # (ShardedASR creates its queues and processes per pid)
+        if preload:
+            print("[SERVER] --preload has no effect with ASR_MODE=processes")
+            preload = False
+        if workers > 1:
+            print(
+                f"[SERVER] ASR_MODE=processes: {workers} server workers x "
+                f"{settings.ASR_PROCESSES} ASR processes, one pool each"
+            )
+
+    if preload:
+        warm_up_asr()
+        # Keep the cyclic GC from touching (and un-sharing) preloaded objects
+        gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    routed = settings.REGISTRY_BACKEND != "memory"
+    if not routed and workers > 1:
+        print("[SERVER] REGISTRY_BACKEND=memory: each worker only sees its own sessions")
+
+    children = []
+    for i in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            sockets = [sock]
+            if routed:
+                own = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                own.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                own.bind((host, port + 1 + i))
+                own.listen(2048)
+                sockets.append(own)
+                settings.REGISTRY_ADVERTISE_URL = advertise_url(host, port + 1 + i)
+            server = uvicorn.Server(uvicorn.Config(app, reload=False))
+            server.run(sockets=sockets)
+            os._exit(0)
+        children.append(pid)
+
+    print(f"[SERVER] master {os.getpid()} forked workers {children} on {host}:{port}")
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        reload=False,
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="load the Vosk model once in the master and fork workers that share it",
+    )
+    args = parser.parse_args()
+
+    if not settings.REGISTRY_ADVERTISE_URL:
+        settings.REGISTRY_ADVERTISE_URL = advertise_url(args.host, args.port)
+
+    if args.workers > 1 or args.preload:
+        serve_forked(args.host, args.port, args.workers, args.preload)
+    else:
+        uvicorn.run(
+            app,
+            host=args.host,
+            port=args.port,
+            reload=False,
+        )
@@ -0,0 +1,204 @@
+"""
+Batch re-transcription of archived sessions.
+
+Streams each session's stored audio (audio.pcm) through KaldiRecognizer
+in large chunks, fanned out over a process pool with one model per
+process. Writes raw_transcript.<tag>.json next to the original and
+reports real-time factor, throughput and WER against the doctor-corrected
+transcript (<session_id>_corrected).
+
+Sessions that already have output for the tag are skipped, so an
+interrupted run can simply be restarted.
+
+    python retranscribe.py --workers 4 --tag hi-0.22-beam13
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.storage.audio_log import AUDIO_FILE, INDEX_FILE, META_FILE, AudioLogReader
+
+SESSIONS_DIR = Path("data/sessions")
+
+_model = None
+
+
+def _init_worker(model_path: str) -> None:
+    global _model
+    from vosk import Model
+
+    _model = Model(model_path)
+
+
+def _transcribe(session_dir: str, chunk_seconds: float) -> Dict[str, Any]:
+    from vosk import KaldiRecognizer
+
+    reader = AudioLogReader(Path(session_dir))
+    sample_rate = reader.sample_rate
+    started = datetime.fromisoformat(reader.meta["started_at"])
+    recognizer = KaldiRecognizer(_model, sample_rate)
+
+    utterances: List[Dict[str, Any]] = []
+    position = 0
+
+    def emit(result_json: str) -> None:
+        text = json.loads(result_json).get("text", "").strip()
+        if text:
+            at = started + timedelta(seconds=position / (2 * sample_rate))
+            utterances.append({
+                "utterance_id": str(uuid.uuid4()),
+                "timestamp": at.isoformat(),
+                "text": text,
+            })
+
+    start = time.perf_counter()
+    for chunk in reader.iter_chunks(int(chunk_seconds * sample_rate) * 2):
+        position += len(chunk)
+        if recognizer.AcceptWaveform(bytes(chunk)):
+            emit(recognizer.Result())
+    emit(recognizer.FinalResult())
+    decode_seconds = time.perf_counter() - start
+
+    return {
+        "session_dir": session_dir,
+        "utterances": utterances,
+        "audio_seconds": len(reader) / (2 * sample_rate),
+        "decode_seconds": decode_seconds,
+    }
+
+
+def word_error_rate(reference: List[str], hypothesis: List[str]) -> Dict[str, int]:
+    """
+    Word-level Levenshtein distance, returned as raw counts so rates can
+    be aggregated across sessions.
+    """
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return {"errors": previous[-1], "words": len(reference)}
+
+
+def _words(transcript: List[Dict[str, Any]]) -> List[str]:
+    return " ".join(u.get("text", "") for u in transcript).lower().split()
+
+
+def _reference(session_dir: Path) -> Optional[List[Dict[str, Any]]]:
+    path = session_dir.parent / f"{session_dir.name}_corrected" / "raw_transcript.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def find_sessions(root: Path) -> List[Path]:
+    return sorted(
+        p.parent
+        for p in root.glob(f"*/*/{AUDIO_FILE}")
+        if (p.parent / META_FILE).exists()
+        and (p.parent / INDEX_FILE).exists()
+        and not p.parent.name.endswith("_corrected")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions-dir", type=Path, default=SESSIONS_DIR)
+    parser.add_argument("--model-path", default=settings.VOSK_MODEL_PATH)
+    parser.add_argument("--tag", default=None, help="output version label (default: model dir name)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-seconds", type=float, default=8.0)
+    parser.add_argument("--force", action="store_true", help="redo sessions that already have output")
+    args = parser.parse_args()
+
+    tag = args.tag or Path(args.model_path).name
+    out_name = f"raw_transcript.{tag}.json"
+    report_name = f"retranscribe.{tag}.json"
+
+    sessions = find_sessions(args.sessions_dir)
+    todo = [s for s in sessions if args.force or not (s / report_name).exists()]
+    print(f"[RETRANSCRIBE] {len(sessions)} sessions, {len(sessions) - len(todo)} already done, tag={tag}")
+    if not todo:
+        return
+
+    total_audio = total_decode = 0.0
+    total_errors = total_words = 0
+    failed: List[str] = []
+    wall_start = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.model_path,),
+    ) as pool:
+        futures = {pool.submit(_transcribe, str(s), args.chunk_seconds): s for s in todo}
+
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # one corrupt session must not abort the batch; it is
+                # retried on the next run
+                failed.append(futures[future].name)
+                print(f"[RETRANSCRIBE] {futures[future].name}: failed: {e!r}")
+                continue
+            session_dir = Path(result["session_dir"])
+
+            report: Dict[str, Any] = {
+                "tag": tag,
+                "model_path": args.model_path,
+                "created_at": datetime.utcnow().isoformat(),
+                "audio_seconds": result["audio_seconds"],
+                "decode_seconds": result["decode_seconds"],
+                "rtf": result["decode_seconds"] / max(result["audio_seconds"], 1e-9),
+            }
+
+            reference = _reference(session_dir)
+            if reference is not None:
+                wer = word_error_rate(_words(reference), _words(result["utterances"]))
+                report["wer"] = wer["errors"] / max(wer["words"], 1)
+                total_errors += wer["errors"]
+                total_words += wer["words"]
+
+            # transcript first, report last: the report marks the session done
+            _write_json(session_dir / out_name, result["utterances"])
+            _write_json(session_dir / report_name, report)
+
+            total_audio += result["audio_seconds"]
+            total_decode += result["decode_seconds"]
+            print(
+                f"[RETRANSCRIBE] {session_dir.name}: "
+                f"{result['audio_seconds']:.1f}s audio, RTF {report['rtf']:.3f}"
+                + (f", WER {report['wer']:.1%}" if "wer" in report else "")
+            )
+
+    wall = time.perf_counter() - wall_start
+    print(f"[RETRANSCRIBE] audio {total_audio:.1f}s in {wall:.1f}s wall")
+    print(f"[RETRANSCRIBE] throughput {total_audio / max(wall, 1e-9):.1f}x real time")
+    print(f"[RETRANSCRIBE] mean RTF per worker {total_decode / max(total_audio, 1e-9):.3f}")
+    if total_words:
+        print(f"[RETRANSCRIBE] WER {total_errors / total_words:.1%} over {total_words} reference words")
+    if failed:
+        print(f"[RETRANSCRIBE] {len(failed)} sessions failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,11 @@ let currentStructuredState = null;
 let lineCount = 0;
 let partialElement = null;
 
+// Audio codec negotiated with the server; nothing is sent until it answers
+const FRAME_SAMPLES = 4096;
+const OFFERED_CODECS = ["mulaw", "pcm16"];
+let audioCodec = null;
+
 startBtn.onclick = startRecording;
 stopBtn.onclick = stopRecording;
 copyBtn.onclick = copyToClipboard;
@@ -70,19 +75,28 @@ async function startRecording() {
     const wsScheme = location.protocol === "https:" ? "wss" : "ws";
     ws = new WebSocket(`${wsScheme}://${location.host}/ws`);
 
+    audioCodec = null;
     ws.onmessage = handleWsMessage;
+    ws.onopen = () => {
+        ws.send(JSON.stringify({
+            type: "config",
+            codecs: OFFERED_CODECS,
+            sample_rate: 16000,
+            frame_samples: FRAME_SAMPLES,
+        }));
+    };
 
     stream = await navigator.mediaDevices.getUserMedia({ audio: true });
     audioContext = new AudioContext({ sampleRate: 16000 });
     source = audioContext.createMediaStreamSource(stream);
-    processor = audioContext.createScriptProcessor(4096, 1, 1);
+    processor = audioContext.createScriptProcessor(FRAME_SAMPLES, 1, 1);
 
     source.connect(processor);
     processor.connect(audioContext.destination);
 
     processor.onaudioprocess = (e) => {
-        if (ws?.readyState === WebSocket.OPEN) {
-            ws.send(floatTo16BitPCM(e.inputBuffer.getChannelData(0)));
+        if (audioCodec && ws?.readyState === WebSocket.OPEN) {
+            ws.send(encodeAudio(e.inputBuffer.getChannelData(0)));
         }
     };
 }
@@ -99,6 +113,11 @@ function stopRecording() {
 function handleWsMessage(event) {
     const data = JSON.parse(event.data);
 
+    if (data.type === "config") {
+        audioCodec = data.codec;
+        return;
+    }
+
     if (data.type === "partial") {
         showPartial(data.text);
         return;
@@ -110,6 +129,15 @@ function handleWsMessage(event) {
         return;
     }
 
+    if (data.type === "structured_partial") {
+        // one section of a live update, already validated server-side
+        activeSessionId = data.session_id;
+        currentStructuredState = currentStructuredState || {};
+        currentStructuredState[data.section] = data.value;
+        renderStructured(currentStructuredState);
+        return;
+    }
+
     if (data.type === "structured") {
         activeSessionId = data.session_id;
         currentStructuredState = data.structured_state;
@@ -386,6 +414,10 @@ function autoRegenerateOnce() {
 
 /* ================== UTILS ================== */
 
+function encodeAudio(input) {
+    return audioCodec === "mulaw" ? floatToMulaw(input) : floatTo16BitPCM(input);
+}
+
 function floatTo16BitPCM(input) {
     const buf = new ArrayBuffer(input.length * 2);
     const view = new DataView(buf);
@@ -393,6 +425,20 @@ function floatTo16BitPCM(input) {
     return buf;
 }
 
+// G.711 mu-law: 8 bits per sample, half the bandwidth of raw PCM
+function floatToMulaw(input) {
+    const out = new Uint8Array(input.length);
+    input.forEach((f, i) => {
+        let s = Math.max(-32768, Math.min(32767, Math.round(f * 0x7fff)));
+        const sign = s < 0 ? 0x80 : 0;
+        s = Math.min(sign ? -s : s, 32635) + 0x84;
+        const exponent = 31 - Math.clz32(s >> 7);
+        const mantissa = (s >> (exponent + 3)) & 0x0f;
+        out[i] = ~(sign | (exponent << 4) | mantissa) & 0xff;
+    });
+    return out.buffer;
+}
+
 function cleanupAudio() {
     processor?.disconnect();
     source?.disconnect();
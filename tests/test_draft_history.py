@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.draft_history import DraftHistory, apply_diff, state_diff
+from app.core.frozen import freeze
+from app.core.session_models import LLMDraft
+
+
+def draft(i):
+    return LLMDraft(draft_id=i, created_at=0.0, input_range=(0, i), structured_patch={}, model="mock")
+
+
+STATES = [
+    {"symptoms": [{"name": "fever"}], "patient": {}},
+    {"symptoms": [{"name": "fever", "duration": "2 days"}, {"name": "cough"}], "patient": {}},
+    {"symptoms": [{"name": "fever", "duration": "2 days"}, {"name": "cough"}], "patient": {"age": 30}, "advice": ["rest"]},
+    {"symptoms": [{"name": "fever", "duration": "2 days"}], "patient": {"age": 30}},
+]
+
+
+def test_version_round_trip():
+    history = DraftHistory()
+    for i, state in enumerate(STATES, 1):
+        history.record(draft(i), freeze(state))
+
+    assert len(history) == len(STATES)
+    assert history.version(0) == {}
+    for n, state in enumerate(STATES, 1):
+        assert history.version(n) == state
+    assert history.version() == STATES[-1]
+    with pytest.raises(IndexError):
+        history.version(len(STATES) + 1)
+
+
+def test_diff_holds_only_changes():
+    history = DraftHistory()
+    history.record(draft(1), freeze(STATES[0]))
+    second = history.record(draft(2), freeze(STATES[1]))
+    assert second.structured_patch == {
+        "lists": {"symptoms": {"len": 2, "at": [[0, STATES[1]["symptoms"][0]], [1, {"name": "cough"}]]}},
+    }
+
+
+def test_apply_diff_matches_state_diff():
+    for previous, current in zip(STATES, STATES[1:]):
+        assert apply_diff(previous, state_diff(previous, current)) == current
@@ -0,0 +1,61 @@
+from app.pipeline.entities import EntityIndex, dedupe, distinct_names, entity_key, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("  Fever!! ") == "fever"
+    assert normalize_text("बुख़ार") == normalize_text("बुखार")
+    assert normalize_text("साँस") == normalize_text("सांस")
+
+
+def test_synonyms_share_a_key():
+    assert entity_key("symptoms", {"name": "Fever"}) == "fever"
+    assert entity_key("symptoms", {"name": "बुखार"}) == "fever"
+    assert entity_key("symptoms", "bukhar") == "fever"
+    assert entity_key("investigations", {"name": "BP"}) == "blood pressure"
+    assert entity_key("tests", "CBC") == "complete blood count"
+
+
+def test_ambiguous_words_are_not_synonyms():
+    assert entity_key("diagnosis", "age") == "age"
+    assert entity_key("diagnosis", "AGE") == "age"
+    assert entity_key("diagnosis", "Gastroenteritis") == "acute gastroenteritis"
+
+
+def test_distinct_names():
+    assert distinct_names("investigations", ["bp", "Blood Pressure", "sugar"]) == [
+        "blood pressure",
+        "blood sugar",
+    ]
+
+
+def test_index_finds_by_id_and_key():
+    index = EntityIndex("symptoms", [{"id": "s1", "name": "Fever"}, {"id": "s2", "name": "cough"}])
+    assert index.find({"name": "बुखार"}) == 0
+    assert index.find({"id": "s2", "name": "something else"}) == 1
+    assert index.find_id("s3") is None
+    assert index.find({"name": "headache"}) is None
+
+
+def test_add_merges_into_the_existing_entity():
+    index = EntityIndex("symptoms", [{"id": "s1", "name": "Fever", "duration": None}])
+    assert index.add({"name": "बुखार", "duration": "2 days"})
+    assert index.items() == [{"id": "s1", "name": "Fever", "duration": "2 days"}]
+
+    assert not index.add({"name": "fever", "duration": "3 days"}, overwrite=False)
+    assert index.add({"name": "cough"})
+    assert not index.add({"name": ""})
+    assert len(index) == 2
+
+
+def test_remove_keeps_other_positions():
+    index = EntityIndex("symptoms", [{"name": "fever"}, {"name": "cough"}, {"name": "cold"}])
+    assert index.remove({"name": "cough"})
+    assert not index.remove({"name": "cough"})
+    assert index.find({"name": "cold"}) == 2
+    assert [e["name"] for e in index.items()] == ["fever", "cold"]
+    assert len(index) == 2
+
+
+def test_dedupe():
+    items = [{"id": "s1", "name": "Fever"}, {"name": "बुखार", "duration": "2 days"}, "cough", None]
+    assert dedupe("symptoms", items) == [{"id": "s1", "name": "Fever", "duration": "2 days"}, "cough"]
@@ -0,0 +1,62 @@
+from app.pipeline.fastpath import extract, normalize_numbers
+
+
+def vitals(text):
+    return {v["name"]: v["value"] for v in extract(text).get("investigations", [])}
+
+
+def symptoms(text):
+    return {s["name"]: s["duration"] for s in extract(text).get("symptoms", [])}
+
+
+def test_symptom_with_duration():
+    assert symptoms("मुझे दो दिन से बुखार है") == {"fever": "2 days"}
+    assert symptoms("fever for two days and cough since 3 weeks") == {
+        "fever": "2 days",
+        "cough": "3 weeks",
+    }
+
+
+def test_negated_symptoms_are_skipped():
+    assert symptoms("no fever") == {}
+    assert symptoms("खांसी नहीं है") == {}
+    assert symptoms("no fever but cough") == {"cough": None}
+
+
+def test_questions_give_no_symptoms_but_keep_vitals():
+    assert extract("क्या बुखार है?") == {}
+    assert extract("do you have cough") == {}
+    assert vitals("क्या बीपी 130/85 है?") == {"blood pressure": "130/85 mmHg"}
+
+
+def test_hindi_numerals():
+    assert normalize_numbers("एक सौ बीस बाय अस्सी") == "120 बाय 80"
+    assert normalize_numbers("दो सौ पांच") == "205"
+    assert vitals("बीपी एक सौ बीस बाय अस्सी") == {"blood pressure": "120/80 mmHg"}
+    assert vitals("पल्स बहत्तर") == {"pulse": "72 bpm"}
+
+
+def test_vitals():
+    assert vitals("bp 120/80 pulse 88 spo2 97 sugar 140 weight 70") == {
+        "blood pressure": "120/80 mmHg",
+        "pulse": "88 bpm",
+        "oxygen saturation": "97%",
+        "blood sugar": "140 mg/dL",
+        "weight": "70 kg",
+    }
+    assert vitals("spo2 120") == {}
+
+
+def test_temperature():
+    assert vitals("temperature 101.5") == {"body temperature": "101.5 F"}
+    assert vitals("temp 38.5") == {"body temperature": "38.5 C"}
+    assert vitals("बुखार एक सौ दो") == {"body temperature": "102 F"}
+    assert vitals("fever 39 degree") == {"body temperature": "39 C"}
+    assert vitals("temperature 60") == {}
+
+
+def test_duration_is_not_a_temperature():
+    assert extract("fever 40 days") == {"symptoms": [{"name": "fever", "duration": "40 days"}]}
+    assert vitals("बुखार 40 दिन से") == {}
+    assert vitals("fever 38") == {}
+    assert vitals("fever 40 days, temperature 101") == {"body temperature": "101 F"}
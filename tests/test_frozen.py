@@ -0,0 +1,78 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from app.core.frozen import FrozenDict, FrozenList, freeze
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda d: d.__setitem__("a", 2),
+    lambda d: d.__delitem__("a"),
+    lambda d: d.update(b=1),
+    lambda d: d.setdefault("b", 1),
+    lambda d: d.pop("a"),
+    lambda d: d.popitem(),
+    lambda d: d.clear(),
+])
+def test_frozen_dict_rejects_mutation(mutate):
+    d = freeze({"a": 1})
+    with pytest.raises(TypeError):
+        mutate(d)
+    assert d == {"a": 1}
+
+
+def test_frozen_dict_rejects_in_place_or():
+    d = freeze({"a": 1})
+    with pytest.raises(TypeError):
+        d |= {"b": 2}
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda v: v.__setitem__(0, 9),
+    lambda v: v.__delitem__(0),
+    lambda v: v.append(3),
+    lambda v: v.extend([3]),
+    lambda v: v.insert(0, 3),
+    lambda v: v.pop(),
+    lambda v: v.remove(1),
+    lambda v: v.clear(),
+    lambda v: v.sort(),
+    lambda v: v.reverse(),
+])
+def test_frozen_list_rejects_mutation(mutate):
+    v = freeze([1, 2])
+    with pytest.raises(TypeError):
+        mutate(v)
+    assert v == [1, 2]
+
+
+def test_frozen_list_rejects_augmented_assignment():
+    v = freeze([1])
+    with pytest.raises(TypeError):
+        v += [2]
+    with pytest.raises(TypeError):
+        v *= 2
+
+
+def test_freeze_is_deep_and_shares_frozen_subtrees():
+    section = freeze([{"name": "fever"}])
+    state = freeze({"symptoms": section, "patient": {"age": 30}, "advice": ("rest",)})
+    assert state["symptoms"] is section
+    assert isinstance(state["patient"], FrozenDict)
+    assert isinstance(state["advice"], FrozenList)
+    with pytest.raises(TypeError):
+        state["symptoms"][0]["name"] = "cough"
+
+
+def test_copies_behave_like_plain_values():
+    state = freeze({"symptoms": [{"name": "fever"}]})
+    assert copy.copy(state) is state
+    assert copy.deepcopy(state) is state
+    assert json.loads(json.dumps(state)) == state
+    assert pickle.loads(pickle.dumps(state)) == state
+
+    derived = {**state, "advice": ["rest"]}
+    derived["advice"].append("fluids")
+    assert "advice" not in state
@@ -0,0 +1,65 @@
+from app.pipeline.schema import apply_state_patch, assign_entity_ids
+
+
+def state(**sections):
+    base = {
+        "utterances": [], "symptoms": [], "medications": [], "diagnosis": [],
+        "advice": [], "investigations": [], "tests": [], "patient": {},
+    }
+    return {**base, **sections}
+
+
+def test_add_assigns_fresh_ids():
+    before = state(symptoms=[{"id": "s1", "name": "fever"}, {"id": "s3", "name": "cough"}])
+    after, changed = apply_state_patch(before, {"symptoms": {"add": [{"name": "cold"}, {"name": "headache"}]}})
+    assert changed == ["symptoms"]
+    assert [s["id"] for s in after["symptoms"]] == ["s1", "s3", "s4", "s5"]
+
+
+def test_duplicate_add_merges_into_existing_entry():
+    before = state(symptoms=[{"id": "s1", "name": "Fever", "duration": None}])
+    after, changed = apply_state_patch(before, {"symptoms": {"add": [{"id": "s9", "name": "बुखार", "duration": "2 days"}]}})
+    assert changed == ["symptoms"]
+    assert after["symptoms"] == [{"id": "s1", "name": "Fever", "duration": "2 days"}]
+
+
+def test_update_by_id():
+    before = state(medications=[{"id": "m1", "name": "paracetamol", "dosage": "500 mg"}])
+    after, _ = apply_state_patch(before, {"medications": {"update": [{"id": "m1", "dosage": "650 mg", "frequency": None}]}})
+    assert after["medications"] == [{"id": "m1", "name": "paracetamol", "dosage": "650 mg"}]
+
+    # an unknown id with a name is an add
+    after, _ = apply_state_patch(before, {"medications": {"update": [{"id": "m7", "name": "cetirizine"}]}})
+    assert after["medications"][1] == {"id": "m2", "name": "cetirizine"}
+
+
+def test_nothing_is_removed():
+    before = state(symptoms=[{"id": "s1", "name": "fever"}], advice=["rest"])
+    patch = {
+        "symptoms": {"add": [], "remove": [{"id": "s1"}], "update": [{"id": "s1"}]},
+        "advice": {"add": ["fluids"]},
+        "utterances": {"add": [{"text": "x"}]},
+    }
+    after, changed = apply_state_patch(before, patch)
+    assert changed == ["advice"]
+    assert after["symptoms"] == before["symptoms"]
+    assert after["advice"] == ["rest", "fluids"]
+    assert after["utterances"] == []
+
+
+def test_unchanged_state_is_returned_as_is():
+    before = state(symptoms=[{"id": "s1", "name": "fever", "duration": "2 days"}], patient={"age": 30})
+    after, changed = apply_state_patch(before, {"symptoms": {"add": [{"name": "fever"}]}, "patient": {"age": 30, "sex": None}})
+    assert after is before
+    assert changed == []
+
+
+def test_patient_fields():
+    after, changed = apply_state_patch(state(patient={"age": 30}), {"patient": {"sex": "F", "age": None}})
+    assert changed == ["patient"]
+    assert after["patient"] == {"age": 30, "sex": "F"}
+
+
+def test_assign_entity_ids_keeps_existing():
+    out = assign_entity_ids(state(investigations=[{"name": "bp"}, {"id": "i2", "name": "pulse"}]))
+    assert [v["id"] for v in out["investigations"]] == ["i3", "i2"]